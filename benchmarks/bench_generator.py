@@ -0,0 +1,34 @@
+"""
+Words-per-second comparison between WordGenerator.generate_word and generate_batch.
+
+    python benchmarks/bench_generator.py [count]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import WordGenerator
+
+
+def words_per_second(fn, count):
+    start = time.perf_counter()
+    fn(count)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    scalar_count = min(count, 200_000)
+
+    scalar = words_per_second(lambda n: [WordGenerator.generate_word() for _ in range(n)], scalar_count)
+    batch = words_per_second(lambda n: WordGenerator.generate_batch(n, seed=0), count)
+
+    print(f"scalar  generate_word   {scalar_count:>10,} words  {scalar:>12,.0f} words/s")
+    print(f"batch   generate_batch  {count:>10,} words  {batch:>12,.0f} words/s")
+    print(f"speedup {batch / scalar:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
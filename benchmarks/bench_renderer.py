@@ -0,0 +1,75 @@
+"""
+apply_visual_fixes throughput against the original per-character implementation.
+
+    python benchmarks/bench_renderer.py [count]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lore import TABLE_SIZE_CORRECTIONS, HEADER_SIZE_CORRECTIONS, apply_visual_fixes, apply_visual_fixes_batch
+from generator import WordGenerator
+
+
+def apply_visual_fixes_original(text, mode='table'):
+    if not text: return ""
+
+    if mode == 'header':
+        corrections = HEADER_SIZE_CORRECTIONS
+        base_size = "32px"
+    else:
+        corrections = TABLE_SIZE_CORRECTIONS
+        base_size = "14pt"
+
+    html = ""
+    for char in text:
+        if char in corrections:
+            scale = corrections[char]
+            html += f"<span style='font-size:{scale};'>{char}</span>"
+        else:
+            html += char
+
+    return f"<span style='font-size:{base_size};'>{html}</span>"
+
+
+def timed(fn, words, mode):
+    start = time.perf_counter()
+    for word in words:
+        fn(word, mode)
+    return len(words) / (time.perf_counter() - start)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    words, _ = WordGenerator.generate_batch(count, seed=0)
+    words[::1000] = [""] * len(words[::1000])
+
+    for mode in ('table', 'header'):
+        expected = [apply_visual_fixes_original(w, mode) for w in words]
+        assert [apply_visual_fixes(w, mode) for w in words] == expected, f"apply_visual_fixes differs in {mode} mode"
+        assert apply_visual_fixes_batch(words, mode) == expected, f"apply_visual_fixes_batch differs in {mode} mode"
+
+    # Typing re-renders the same few glyphs and words over and over.
+    repeated = words[:500] * (count // 500)
+    phrases = [" ".join(words[i:i + 8]) for i in range(0, count, 8)]
+    for mode in ('table', 'header'):
+        apply_visual_fixes.cache_clear()
+        original = timed(apply_visual_fixes_original, words, mode)
+        single = timed(apply_visual_fixes, words, mode)
+        original_repeated = timed(apply_visual_fixes_original, repeated, mode)
+        cached = timed(apply_visual_fixes, repeated, mode)
+        start = time.perf_counter()
+        apply_visual_fixes_batch(words, mode)
+        batch = len(words) / (time.perf_counter() - start)
+        print(f"{mode:<7} distinct words: original {original:>11,.0f}/s  compiled {single:>11,.0f}/s ({single / original:.1f}x)"
+              f"  batch {batch:>12,.0f}/s ({batch / original:.1f}x)")
+        print(f"{'':<7} repeated words: original {original_repeated:>11,.0f}/s  cached   {cached:>11,.0f}/s ({cached / original_repeated:.1f}x)")
+        original_phrases = timed(apply_visual_fixes_original, phrases, mode)
+        compiled_phrases = timed(apply_visual_fixes, phrases, mode)
+        print(f"{'':<7} 8-word phrases: original {original_phrases:>11,.0f}/s  compiled {compiled_phrases:>11,.0f}/s ({compiled_phrases / original_phrases:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
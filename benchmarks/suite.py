@@ -0,0 +1,439 @@
+"""
+Benchmark suite: generator, renderer, lexicon I/O, search, near-duplicate words, the JSON server
+and the Qt tables, on synthetic lexicons of 1k, 100k and 1M entries.
+
+    python benchmarks/suite.py                          # everything, every size
+    python benchmarks/suite.py --sizes 1k,100k --only io,qt
+    python benchmarks/suite.py -o before.json
+    python benchmarks/suite.py --compare before.json    # run again and show the change
+
+Fixtures are built from a fixed seed into benchmarks/fixtures/ the first time
+they are needed, so every run reads the same files. Qt cases use the offscreen
+platform unless QT_QPA_PLATFORM is already set, so they run on a headless box.
+Results are written as JSON to benchmarks/results/<time>.json unless -o is given.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import threading
+import http.client
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from generator import WordGenerator
+from lore import apply_visual_fixes, apply_visual_fixes_batch
+from lexicon import CATEGORIES, JsonStore, JournalStore, dump_lexicon, write_atomic, save_lexicon
+from search import SearchIndex
+from similar import NearWords
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+RESULTS = os.path.join(HERE, "results")
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+SEED = 2024
+
+# ==========================================
+#              FIXTURES
+# ==========================================
+
+GLOSSES = ["water", "stone", "fire", "to walk", "to speak", "river", "night", "bright", "old", "house",
+           "the king", "small", "to give", "sky", "hand", "red", "friend", "to see", "far", "bread"]
+ROOTS = ["", "", "", "from the old tongue", "root: sky", "compound", "borrowed", "root: stone"]
+
+def make_lexicon(size, seed=SEED):
+    """A lexicon of `size` entries: nine in ten dictionary words, the rest three-word phrases."""
+    words, _ = WordGenerator.generate_batch(size, seed=seed)
+    data = {cat: [] for cat in CATEGORIES}
+    for i, word in enumerate(words):
+        gloss = f"{GLOSSES[i % len(GLOSSES)]} {i}"
+        notes = ROOTS[i % len(ROOTS)]
+        if i % 10 == 9:
+            phrase = " ".join(words[i - 2:i + 1])
+            data["phrases"].append({"conlang": phrase, "english": gloss, "notes": notes})
+        else:
+            data["dictionary"].append({"conlang": word, "english": gloss, "notes": notes})
+    return data
+
+def fixture_path(label):
+    path = os.path.join(FIXTURES, f"lexicon_{label}.json")
+    if not os.path.exists(path):
+        os.makedirs(FIXTURES, exist_ok=True)
+        write_atomic(path, dump_lexicon(make_lexicon(SIZES[label])))
+    return path
+
+class Fixture:
+    """One lexicon size: its file, plus anything a case wants to build once and share."""
+
+    def __init__(self, label):
+        self.label = label
+        self.size = SIZES[label]
+        self.path = fixture_path(label)
+        self.cache = {}
+        self.scratch = None
+
+    def get(self, key, build):
+        if key not in self.cache: self.cache[key] = build()
+        return self.cache[key]
+
+    @property
+    def data(self):
+        return self.get("data", lambda: JsonStore(self.path).load())
+
+    def scratch_copy(self):
+        """A fresh copy of the fixture file, with no journal, for cases that write to it."""
+        if self.scratch is None: self.scratch = tempfile.mkdtemp(prefix="wordforge-bench-")
+        path = os.path.join(self.scratch, os.path.basename(self.path))
+        for leftover in (path + ".journal", path + ".tmp"):
+            if os.path.exists(leftover): os.remove(leftover)
+        shutil.copyfile(self.path, path)
+        return path
+
+    def close(self):
+        self.cache.clear()
+        if self.scratch: shutil.rmtree(self.scratch, ignore_errors=True)
+
+# ==========================================
+#              CASES
+# ==========================================
+
+# Each case takes a Fixture (None for cases that do not depend on lexicon size)
+# and returns (run, items) or (run, items, teardown). Only `run` is timed.
+CASES = []
+
+def case(group, name, sized=True):
+    def register(fn):
+        CASES.append((group, name, sized, fn))
+        return fn
+    return register
+
+@case("generator", "generate_word", sized=False)
+def generator_scalar(fx):
+    n = 100_000
+    return lambda: [WordGenerator.generate_word() for _ in range(n)], n
+
+@case("generator", "generate_batch", sized=False)
+def generator_batch(fx):
+    n = 1_000_000
+    return lambda: WordGenerator.generate_batch(n, seed=SEED), n
+
+def renderer_words(n=100_000):
+    words, _ = WordGenerator.generate_batch(n, seed=SEED + 1)
+    return words
+
+@case("renderer", "apply_visual_fixes", sized=False)
+def renderer_uncached(fx):
+    words = renderer_words()
+    apply_visual_fixes.cache_clear()
+    return lambda: [apply_visual_fixes(w) for w in words], len(words)
+
+@case("renderer", "apply_visual_fixes_cached", sized=False)
+def renderer_cached(fx):
+    # Typing and scrolling re-render the same words over and over.
+    words = renderer_words(500) * 200
+    return lambda: [apply_visual_fixes(w) for w in words], len(words)
+
+@case("renderer", "apply_visual_fixes_batch", sized=False)
+def renderer_batch(fx):
+    words = renderer_words()
+    return lambda: apply_visual_fixes_batch(words), len(words)
+
+@case("io", "load")
+def io_load(fx):
+    return lambda: JsonStore(fx.path).load(), fx.size
+
+@case("io", "save")
+def io_save(fx):
+    data, path = fx.data, fx.scratch_copy()
+    return lambda: save_lexicon(data, path), fx.size
+
+@case("io", "journal_append")
+def io_append(fx):
+    store = JournalStore(fx.scratch_copy(), compact_every=10 ** 9)
+    data = store.load()
+    n = 200
+
+    def run():
+        for i in range(n):
+            entry = {"conlang": f"bench{i}", "english": "appended", "notes": ""}
+            data["dictionary"].append(entry)
+            store.append("dictionary", entry)
+    return run, n, store.journal.close
+
+@case("search", "index")
+def search_index(fx):
+    data = fx.data
+    return lambda: fx.cache.__setitem__("index", build_index(data)), fx.size
+
+def build_index(data):
+    index = SearchIndex()
+    index.index_more(data)
+    return index
+
+@case("search", "query")
+def search_query(fx):
+    index = fx.get("index", lambda: build_index(fx.data))
+    words = [e["conlang"] for e in fx.data["dictionary"][:100]]
+    queries = [(w[:2], "prefix") for w in words] + [(w[1:4], "substring") for w in words] + [(w, "exact") for w in words]
+    queries += [(g.split()[0], "substring") for g in GLOSSES]
+    return lambda: [index.search(q, mode) for q, mode in queries], len(queries)
+
+@case("near", "index")
+def near_index(fx):
+    data = fx.data
+    return lambda: fx.cache.__setitem__("near", build_near(data)), fx.size
+
+def build_near(data):
+    index = NearWords()
+    index.index_more(data)
+    return index
+
+@case("near", "query")
+def near_query(fx):
+    # Saved words with one glyph changed: the typo-twins an add would warn about.
+    index = fx.get("near", lambda: build_near(fx.data))
+    words = [e["conlang"] for e in fx.data["dictionary"][:1000]]
+    queries = [w[:len(w) // 2] + w[-1] + w[len(w) // 2 + 1:] for w in words]
+    return lambda: [index.near(q) for q in queries], len(queries)
+
+def start_server(fx):
+    """`wordforge serve` on a scratch copy, in a thread of its own. Returns (port, stop)."""
+    import asyncio
+    import server
+    started, state = threading.Event(), {}
+
+    async def main():
+        state["task"] = asyncio.current_task()
+        await server.serve(fx.scratch_copy(), port=0, ready=lambda port: (state.update(port=port), started.set()))
+
+    def run():
+        state["loop"] = asyncio.new_event_loop()
+        try:
+            state["loop"].run_until_complete(main())
+        except asyncio.CancelledError:
+            pass
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait()
+
+    def stop():
+        state["loop"].call_soon_threadsafe(state["task"].cancel)
+        thread.join()
+    return state["port"], stop
+
+def post(connection, path, body):
+    raw = json.dumps(body).encode("utf-8")
+    connection.request("POST", path, raw, {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    return json.loads(response.read())
+
+@case("server", "lookup")
+def server_lookup(fx):
+    # One keep-alive connection, one request per lookup: the client shares the CPU with the server.
+    port, stop = start_server(fx)
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    queries = [e["english"] for e in fx.data["dictionary"][:1000]]
+    return lambda: [post(connection, "/lookup", {"query": q}) for q in queries], len(queries), lambda: (connection.close(), stop())
+
+@case("server", "batch_lookup")
+def server_batch(fx):
+    port, stop = start_server(fx)
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    queries = [{"op": "lookup", "query": e["english"]} for e in fx.data["dictionary"][:10_000]]
+    batches = [queries[i:i + 100] for i in range(0, len(queries), 100)]
+    return lambda: [post(connection, "/batch", b) for b in batches], len(queries), lambda: (connection.close(), stop())
+
+def qt_app():
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance()
+    if app is None:
+        app = QApplication([])
+        app.setStyle("Fusion")
+    return app
+
+def open_window(fx):
+    from gui import VocabVault
+    window = VocabVault(fx.scratch_copy())
+    window.show()
+    return window
+
+def close_window(window):
+    window.close()
+    window.deleteLater()
+    qt_app().processEvents()
+
+@case("qt", "open")
+def qt_open(fx):
+    # Constructor to first screen: the window shows the first slice of rows before the rest streams in.
+    app = qt_app()
+    path = fx.scratch_copy()
+
+    def run():
+        from gui import VocabVault
+        window = VocabVault(path)
+        window.show()
+        app.processEvents()
+        opened.append(window)
+    opened = []
+    return run, 1, lambda: close_window(opened.pop())
+
+@case("qt", "load_all")
+def qt_load_all(fx):
+    app = qt_app()
+    path = fx.scratch_copy()
+
+    def run():
+        from gui import VocabVault
+        window = VocabVault(path)
+        window.show()
+        # Let the window's own timer slices stream the rest in, painting between them.
+        while window.session.loading:
+            app.processEvents()
+        opened.append(window)
+    opened = []
+    return run, fx.size, lambda: close_window(opened.pop())
+
+def loaded_window(fx):
+    window = open_window(fx)
+    # Wait for the background search indexing too, so it does not run inside the timed part.
+    while window.session.loading or len(window.session.search_index) < sum(window.session.counts.values()):
+        qt_app().processEvents()
+    return window
+
+@case("qt", "reset_model")
+def qt_reset_model(fx):
+    # Every row handed to the table models again, as finish_loading does after replaying a journal.
+    app = qt_app()
+    window = loaded_window(fx)
+
+    def run():
+        session = window.session
+        for category in window.categories:
+            session.models[category].set_entries(session.data[category])
+        app.processEvents()
+    return run, fx.size, lambda: close_window(window)
+
+@case("qt", "paint")
+def qt_paint(fx):
+    # One full repaint of the visible rows through LoreWordDelegate.
+    window = loaded_window(fx)
+    viewport = window.tables[window.categories[0]].viewport()
+    frames = 20
+
+    def run():
+        for _ in range(frames):
+            viewport.grab()
+    return run, frames, lambda: close_window(window)
+
+@case("qt", "append_entry")
+def qt_append(fx):
+    app = qt_app()
+    window = loaded_window(fx)
+    model = window.session.models["dictionary"]
+    n = 100
+
+    def run():
+        for i in range(n):
+            model.append_entry({"conlang": f"bench{i}", "english": "appended", "notes": ""})
+            app.processEvents()
+    return run, n, lambda: close_window(window)
+
+# ==========================================
+#              RUNNER
+# ==========================================
+
+def measure(fn, fx, repeat):
+    times, items = [], 0
+    for _ in range(repeat):
+        run, items, *teardown = fn(fx)
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+        for done in teardown: done()
+    return times, items
+
+def machine_info():
+    info = {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor(), "cpus": os.cpu_count()}
+    for module in ("numpy", "PySide6"):
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = None
+    try:
+        info["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                        capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        info["commit"] = None
+    return info
+
+def key(result):
+    return (result["group"], result["name"], result["size"])
+
+def report(result, baseline=None):
+    size = f"{result['size']:,}" if result["size"] else "-"
+    line = (f"{result['group']:<10}{result['name']:<28}{size:>10}  median {result['median'] * 1000:>10.2f} ms"
+            f"  {result['per_second']:>14,.0f}/s")
+    if baseline:
+        change = result["median"] / baseline["median"] - 1
+        line += f"  {change:+7.1%}" + ("  SLOWER" if change > 0.10 else "")
+    print(line, flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(SIZES), help="comma-separated fixture sizes (default: %(default)s)")
+    parser.add_argument("--only", help="comma-separated groups: " + ", ".join(dict.fromkeys(g for g, *_ in CASES)))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the median is reported (default: %(default)s)")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    labels = [label.strip().lower() for label in args.sizes.split(",") if label.strip()]
+    unknown = [label for label in labels if label not in SIZES]
+    if unknown: parser.error(f"unknown size {unknown[0]!r}; choose from {', '.join(SIZES)}")
+    groups = set(args.only.split(",")) if args.only else None
+    baseline = {}
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = {key(r): r for r in json.load(f)["results"]}
+
+    cases = [c for c in CASES if groups is None or c[0] in groups]
+    results = []
+    started = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def record(group, name, fn, fx):
+        times, items = measure(fn, fx, args.repeat)
+        median = statistics.median(times)
+        result = {"group": group, "name": name, "size": fx.size if fx else None, "repeat": args.repeat,
+                  "items": items, "best": min(times), "median": median, "times": times,
+                  "per_second": items / median if median else None}
+        results.append(result)
+        report(result, baseline.get(key(result)))
+
+    for group, name, sized, fn in cases:
+        if not sized: record(group, name, fn, None)
+    for label in labels:
+        fx = Fixture(label)
+        for group, name, sized, fn in cases:
+            if sized: record(group, name, fn, fx)
+        fx.close()  # Drop the loaded lexicon, index and scratch files before the next size.
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS, exist_ok=True)
+        output = os.path.join(RESULTS, started.replace(":", "") + ".json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({"started": started, "machine": machine_info(), "results": results}, f, indent=4)
+        f.write("\n")
+    print(f"results written to {output}")
+
+if __name__ == "__main__":
+    main()
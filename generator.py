@@ -0,0 +1,268 @@
+import os
+import math
+import random
+
+from lore import LORE
+from phonotactics import load_phonotactics
+from wordspace import WordSpace
+
+# ==========================================
+#            WORD GENERATOR
+# ==========================================
+
+# Above this many words (or whenever a seed is given) the NumPy batch path is worth loading.
+BATCH_THRESHOLD = 1000
+
+class WordGenerator:
+    GEN_SHORT = [LORE.A_SHORT, LORE.E_SHORT, LORE.I_SHORT, LORE.O_SHORT, LORE.U_SHORT]
+    GEN_LONG = [LORE.A_LONG, LORE.E_LONG, LORE.I_LONG, LORE.O_LONG, LORE.U_LONG, 
+                LORE.YE, LORE.YO, LORE.OO, LORE.YA, LORE.OE]
+    
+    ALL_VOWELS = GEN_SHORT + GEN_LONG
+
+    # Structures, weights and adjacency rules come from phonotactics.json.
+    RULES = load_phonotactics()
+    STRUCTURES = RULES.names
+    STRUCTURE_WEIGHTS = RULES.weights
+
+    BATCH_CHUNK = 1 << 18
+    SPACES = {}
+
+    @staticmethod
+    def word_space(min_syllables=1, max_syllables=3):
+        """Counting, uniform sampling and rank/unrank over every word generate_word can make (built once per range)."""
+        key = (min_syllables, max_syllables)
+        if key not in WordGenerator.SPACES:
+            WordGenerator.SPACES[key] = WordSpace(WordGenerator.RULES, min_syllables, max_syllables)
+        return WordGenerator.SPACES[key]
+
+    @staticmethod
+    def generate_word(min_syllables=1, max_syllables=3):
+        syllables = random.randint(min_syllables, max_syllables)
+        return WordGenerator.RULES.sample_word(syllables)
+
+    @staticmethod
+    def generate_batch(n, min_syllables=1, max_syllables=3, seed=None):
+        """
+        Generates n words at once by sampling structures and glyphs as whole arrays.
+        Follows the same rules as generate_word, and the same seed always gives the same batch:
+        the one generate_parallel gives for that seed, with any number of workers.
+        Returns (words, structures) as two lists.
+        """
+        words, structures = [], []
+        for job in WordGenerator._shards(n, min_syllables, max_syllables, seed, WordGenerator.BATCH_CHUNK):
+            chunk_words, chunk_structures = _generate_shard(job)
+            words.extend(chunk_words)
+            structures.extend(chunk_structures)
+        return words, structures
+
+    @staticmethod
+    def generate_parallel(n, min_syllables=1, max_syllables=3, seed=None, workers=None, shard_size=BATCH_CHUNK):
+        """
+        Generates n words across a process pool, yielding (words, structures) one shard at a time, in order.
+
+        Shard i always holds words [i * shard_size, (i + 1) * shard_size) and draws from
+        its own stream, derived from (seed, i). The corpus therefore depends only on the
+        seed and shard_size, never on how many workers share the work.
+        """
+        jobs = WordGenerator._shards(n, min_syllables, max_syllables, seed, shard_size)
+        if not jobs: return
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) == 1:
+            yield from map(_generate_shard, jobs)
+            return
+        from concurrent.futures import ProcessPoolExecutor  # Deferred like NumPy: multiprocessing is slow to import.
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            # map() hands results back in submission order while later shards are still running.
+            yield from pool.map(_generate_shard, jobs)
+
+    @staticmethod
+    def write_parallel(path, n, min_syllables=1, max_syllables=3, seed=None, workers=None, structure=False):
+        """Streams a generate_parallel corpus straight to a text file, one word per line. Returns the word count."""
+        written = 0
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            for words, structures in WordGenerator.generate_parallel(n, min_syllables, max_syllables, seed, workers):
+                lines = (f"{w}\t{s}" for w, s in zip(words, structures)) if structure else words
+                f.write("\n".join(lines) + "\n")
+                written += len(words)
+        return written
+
+    @staticmethod
+    def generate_unique_word(seen, min_syllables=1, max_syllables=3, attempts=1000):
+        """
+        Like generate_word, but skips anything in `seen` (a SeenWords) and records the result there.
+        Returns (None, None) if `attempts` words in a row were all taken.
+        """
+        for _ in range(attempts):
+            word, structure = WordGenerator.generate_word(min_syllables, max_syllables)
+            if seen.add_new([word])[0]:
+                return word, structure
+        return None, None
+
+    @staticmethod
+    def generate_unique_batch(n, seen, min_syllables=1, max_syllables=3, seed=None):
+        """
+        Like generate_batch, but every word is new: not in `seen` (a SeenWords)
+        and not repeated within the run. Accepted words are added to `seen`.
+        Stops short of n only if a whole round finds nothing new, i.e. the
+        word space for these syllable counts is used up.
+        """
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        words, structures = [], []
+        while len(words) < n:
+            # Over-draw by the rejection rate seen so far so most runs finish in one or two rounds.
+            want = n - len(words)
+            size = min(WordGenerator.BATCH_CHUNK, int(want / max(1.0 - seen.rejection_rate, 0.05)) + 16)
+            chunk_words, chunk_structures = WordGenerator._batch_chunk(np, rng, size, min_syllables, max_syllables)
+            keep = seen.add_new(chunk_words, limit=want)
+            if not any(keep): break
+            words.extend(w for w, k in zip(chunk_words, keep) if k)
+            structures.extend(s for s, k in zip(chunk_structures, keep) if k)
+        return words, structures
+
+    @staticmethod
+    def _shards(n, min_syllables, max_syllables, seed, shard_size):
+        """Jobs for _generate_shard: shard i holds words [i * shard_size, (i + 1) * shard_size)."""
+        import numpy as np  # Deferred so the GUI and scalar path never load NumPy.
+
+        # Fix the entropy up front so an unseeded run is still consistent across its own shards.
+        entropy = np.random.SeedSequence(seed).entropy
+        return [(entropy, i, min(shard_size, n - start), min_syllables, max_syllables)
+                for i, start in enumerate(range(0, n, shard_size))]
+
+    @staticmethod
+    def _batch_chunk(np, rng, size, min_syllables, max_syllables):
+        return WordGenerator.RULES.sample_batch(np, rng, size, min_syllables, max_syllables)
+
+def _generate_shard(job):
+    # Module-level so worker processes can unpickle it.
+    import numpy as np
+    entropy, index, size, min_syllables, max_syllables = job
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+    return WordGenerator._batch_chunk(np, rng, size, min_syllables, max_syllables)
+
+# ==========================================
+#            UNIQUE GENERATION
+# ==========================================
+
+class SeenWords:
+    """
+    Words that generation must not produce again: the saved lexicon plus
+    everything emitted so far.
+
+    Exact (a set) by default. With `capacity` it is a fixed-size Bloom filter
+    instead, for runs of millions of words: memory stays at about 1.8 bytes per
+    word at the default error rate. A Bloom filter never lets a duplicate
+    through, but it rejects roughly `error_rate` of genuinely new words.
+    """
+    FNV_OFFSET = 0xcbf29ce484222325
+    FNV_PRIME = 0x100000001b3
+
+    def __init__(self, words=(), capacity=None, error_rate=0.001):
+        self.accepted = 0
+        self.rejected = 0
+        self.capacity = capacity
+        if capacity is None:
+            self.words = set(words)
+        else:
+            import numpy as np
+            self.np = np
+            self.bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+            self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+            self.table = np.zeros((self.bits + 7) // 8, dtype=np.uint8)
+            words = list(words)
+            for start in range(0, len(words), WordGenerator.BATCH_CHUNK):
+                self.mark(self.positions(words[start:start + WordGenerator.BATCH_CHUNK]))
+
+    @property
+    def rejection_rate(self):
+        total = self.accepted + self.rejected
+        return self.rejected / total if total else 0.0
+
+    def add(self, word):
+        """Marks a saved word as taken without counting it as generated."""
+        if self.capacity is None:
+            self.words.add(word)
+        else:
+            self.mark(self.positions([word]))
+
+    def __contains__(self, word):
+        if self.capacity is None:
+            return word in self.words
+        return bool(self.present(self.positions([word]))[0])
+
+    def add_new(self, words, limit=None):
+        """
+        Returns one bool per word: True if it was new (and is now marked taken).
+        A word repeated within `words` only counts the first time. At most
+        `limit` words are accepted; later ones are left unmarked.
+        """
+        if self.capacity is None:
+            return self._exact(words, limit)
+        return self._bloom(words, limit)
+
+    def _exact(self, words, limit):
+        keep, seen = [], self.words
+        taken = 0
+        for word in words:
+            if limit is not None and taken >= limit:
+                keep.append(False)
+            elif word in seen:
+                keep.append(False)
+                self.rejected += 1
+            else:
+                seen.add(word)
+                keep.append(True)
+                taken += 1
+        self.accepted += taken
+        return keep
+
+    def _bloom(self, words, limit):
+        np = self.np
+        if not words: return []
+        positions, first_hash = self.positions(words, with_hash=True)
+        new = ~self.present(positions)
+        # Repeats inside this batch: only the first occurrence can be new.
+        _, first = np.unique(first_hash, return_index=True)
+        unique = np.zeros(len(words), dtype=bool)
+        unique[first] = True
+        keep = new & unique
+        considered = len(words)
+        if limit is not None:
+            cut = np.flatnonzero(keep)
+            if len(cut) > limit:
+                considered = int(cut[limit])
+                keep[considered:] = False
+        self.mark(positions[:, keep])
+        taken = int(keep.sum())
+        self.accepted += taken
+        self.rejected += considered - taken
+        return keep.tolist()
+
+    def positions(self, words, with_hash=False):
+        # FNV-1a over code points, then double hashing for the k bit positions.
+        np = self.np
+        arr = np.array(words, dtype=str)
+        if arr.dtype.itemsize == 0:
+            arr = arr.astype('<U1')
+        codes = arr.view(np.uint32).reshape(len(words), -1).astype(np.uint64)
+        h1 = np.full(len(words), self.FNV_OFFSET, dtype=np.uint64)
+        for column in codes.T:
+            h1 = np.where(column != 0, (h1 ^ column) * np.uint64(self.FNV_PRIME), h1)
+        h2 = (h1 ^ (h1 >> np.uint64(31))) * np.uint64(0x9e3779b97f4a7c15) | np.uint64(1)
+        k = np.arange(self.hashes, dtype=np.uint64)[:, None]
+        positions = (h1[None, :] + k * h2[None, :]) % np.uint64(self.bits)
+        return (positions, h1) if with_hash else positions
+
+    def present(self, positions):
+        np = self.np
+        hits = self.table[positions >> np.uint64(3)] & (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8))
+        return (hits != 0).all(axis=0)
+
+    def mark(self, positions):
+        np = self.np
+        positions = positions.ravel()
+        np.bitwise_or.at(self.table, positions >> np.uint64(3), (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
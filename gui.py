@@ -0,0 +1,1219 @@
+import os
+import sys
+import math
+import time
+from collections import OrderedDict
+from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
+                               QHBoxLayout, QTabWidget, QLineEdit, QPushButton, 
+                               QTableView, QHeaderView, QStyledItemDelegate, QStyle,
+                               QStackedWidget, QComboBox, QCheckBox, QTableWidget, QTableWidgetItem,
+                               QMessageBox, QGridLayout, QFrame, QLabel, QTextEdit, QFileDialog)
+from PySide6.QtGui import (QFont, QFontMetricsF, QPalette, QTextCursor, QKeySequence, QShortcut, QColor, QImage,
+                           QPainter, QPixmap, QScreen)
+from PySide6.QtCore import Qt, QObject, QEvent, QAbstractTableModel, QModelIndex, QPointF, QRectF, QSize, QTimer, Signal
+
+from lore import (VOWELS, KEYBOARD_LAYOUT, DISABLED_KEYS, TABLE_SIZE_CORRECTIONS, HEADER_SIZE_CORRECTIONS,
+                  apply_visual_fixes)
+from keymap import BASE_KEYS, SHIFT_KEYS, ComboMachine
+from generator import WordGenerator, SeenWords
+from ngram import cache_path, load_or_train, lexicon_words
+from reverse import REVERSE_MODES, ReverseIndex, cache_path as index_cache_path
+from lexicon import DEFAULT_FILENAME, CATEGORIES, LexiconError, BackgroundWriter, Entry, open_store
+from library import Lexicon, LexiconLibrary
+from search import SearchIndex
+from similar import NearWords
+import instrument
+from instrument import RECORDER, timed
+
+class RichLineEdit(QTextEdit):
+    """
+    A Custom Widget that looks like a QLineEdit but supports Rich Text (HTML).
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setAcceptRichText(True)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setTabChangesFocus(True)
+        self.setLineWrapMode(QTextEdit.NoWrap)
+        self.setFixedHeight(50) 
+        
+        self.setStyleSheet("""
+            QTextEdit {
+                font-size: 14pt; 
+                font-weight: bold;
+                padding-top: 8px; 
+                padding-left: 5px;
+                padding-right: 5px;
+                border: 1px solid #555; 
+                border-radius: 2px;
+                background-color: #2b2b2b; 
+                color: white;
+            }
+        """)
+
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
+            return 
+        super().keyPressEvent(event)
+
+    def setText(self, text):
+        styled = apply_visual_fixes(text, mode='table')
+        self.setHtml(styled)
+        self.moveCursor(QTextCursor.End)
+        
+    def text(self):
+        return self.toPlainText()
+        
+    def insert(self, text):
+        styled = apply_visual_fixes(text, mode='table')
+        self.textCursor().insertHtml(styled)
+        
+    def backspace(self):
+        self.textCursor().deletePreviousChar()
+
+    def replace_last(self, n, text):
+        # One edit: select the last n glyphs and type over them.
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.Left, QTextCursor.KeepAnchor, n)
+        cursor.insertHtml(apply_visual_fixes(text, mode='table'))
+
+class LexiconTableModel(QAbstractTableModel):
+    """
+    Read-only view of one lexicon category. Qt only asks for the rows it is showing.
+    """
+    HEADERS = ["Lore Word", "Definition", "Notes"]
+    KEYS = ["conlang", "english", "notes"]
+
+    def __init__(self, entries, parent=None):
+        super().__init__(parent)
+        self.entries = entries
+        self.font = QFont("Arial", 12)
+
+    def set_entries(self, entries):
+        self.beginResetModel()
+        self.entries = entries
+        self.endResetModel()
+
+    def append_entry(self, entry):
+        row = len(self.entries)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.entries.append(entry)
+        self.endInsertRows()
+
+    def append_entries(self, entries):
+        if not entries: return
+        row = len(self.entries)
+        self.beginInsertRows(QModelIndex(), row, row + len(entries) - 1)
+        self.entries.extend(entries)
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        # Contiguous runs, bottom first, so earlier row numbers stay valid.
+        runs = []
+        for row in sorted(set(rows)):
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.entries[first:last + 1]
+            self.endRemoveRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.KEYS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.entries[index.row()].get(self.KEYS[index.column()], '')
+        if role == Qt.FontRole and index.column() > 0:
+            return self.font
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        # The Lore word needs the Lore keyboard, so only the plain-text columns edit in place.
+        return flags | Qt.ItemIsEditable if index.column() > 0 else flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or index.column() == 0: return False
+        value = value.strip()
+        if index.column() == 1 and not value: return False
+        self.entries[index.row()][self.KEYS[index.column()]] = value
+        self.dataChanged.emit(index, index)
+        return True
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole: return None
+        return self.HEADERS[section] if orientation == Qt.Horizontal else section + 1
+
+class SearchResultsModel(LexiconTableModel):
+    """
+    Read-only list of search hits from every category, and with show_languages,
+    every language.
+    """
+    HEADERS = LexiconTableModel.HEADERS + ["Category"]
+
+    def __init__(self, parent=None):
+        super().__init__([], parent)
+        self.hits = []
+        self.show_languages = False
+
+    def set_hits(self, hits, show_languages=False):
+        """hits: (lexicon, category, entry) triples."""
+        self.beginResetModel()
+        self.hits = hits
+        self.entries = [entry for _, _, entry in hits]
+        self.show_languages = show_languages
+        self.endResetModel()
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.column() == len(self.KEYS):
+            if role != Qt.DisplayRole: return None
+            lexicon, category, _ = self.hits[index.row()]
+            return f"{lexicon.name}: {category.title()}" if self.show_languages else category.title()
+        return super().data(index, role)
+
+    def flags(self, index):
+        return QAbstractTableModel.flags(self, index)
+
+class GlyphFace:
+    """
+    The glyphs of one visual mode in one font, colour and screen. Each glyph is
+    rasterized once, at its corrected size, into a transparent pixmap with its
+    offset from the pen position and its advance. A word is composited from
+    those pixmaps the first time it is drawn and kept (the WORDS most recently
+    drawn), so repainting a row is a single drawPixmap with no text layout.
+    """
+    WORDS = 4096
+
+    def __init__(self, corrections, base_size, font, dpi, ratio, color):
+        self.corrections = corrections
+        self.base_size = base_size
+        self.base_font = font
+        self.ratio = ratio
+        self.color = color
+        # Glyphs are drawn off screen, so a tiny image at the screen's DPI stands in for it when sizing fonts.
+        self.metrics_device = self.image(1, 1, dpi)
+        self.dpi = dpi
+        self.fonts = {}     # size string -> (QFont, QFontMetricsF)
+        self.glyphs = {}    # char -> (pixmap, left, top, advance, ascent, descent)
+        self.words = OrderedDict()  # text -> the same, least recently drawn first
+
+    def image(self, width, height, dpi):
+        image = QImage(max(width, 1), max(height, 1), QImage.Format_ARGB32_Premultiplied)
+        dots = round(dpi / 0.0254)
+        image.setDotsPerMeterX(dots)
+        image.setDotsPerMeterY(dots)
+        image.fill(Qt.transparent)
+        return image
+
+    def font_for(self, size):
+        if size not in self.fonts:
+            font = QFont(self.base_font)
+            value = float(size[:-2])
+            font.setPointSizeF(value if size.endswith("pt") else value * 72 / self.dpi)
+            self.fonts[size] = (font, QFontMetricsF(font, self.metrics_device))
+        return self.fonts[size]
+
+    def glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            font, metrics = self.font_for(self.corrections.get(char, self.base_size))
+            advance = metrics.horizontalAdvance(char)
+            # Room for anything that overhangs the advance, such as a diacritic.
+            box = metrics.boundingRect(char).united(QRectF(0, -metrics.ascent(), advance, metrics.height()))
+            left, top = math.floor(box.left()), math.floor(box.top())
+            image = self.image(math.ceil((box.right() - left) * self.ratio), math.ceil((box.bottom() - top) * self.ratio), self.dpi)
+            image.setDevicePixelRatio(self.ratio)
+            painter = QPainter(image)
+            painter.setFont(font)
+            painter.setPen(self.color)
+            painter.drawText(QPointF(-left, -top), char)
+            painter.end()
+            glyph = self.glyphs[char] = (QPixmap.fromImage(image), left, top, advance, metrics.ascent(), metrics.descent())
+        return glyph
+
+    def word(self, text):
+        word = self.words.get(text)
+        if word is not None:
+            self.words.move_to_end(text)
+            return word
+        placed, x = [], 0.0
+        for glyph in map(self.glyph, text):
+            placed.append((x + glyph[1], glyph))
+            x += glyph[3]
+        left = math.floor(min((at for at, _ in placed), default=0))
+        top = min((g[2] for _, g in placed), default=0)
+        right = max((at + g[0].width() / self.ratio for at, g in placed), default=0)
+        bottom = max((g[2] + g[0].height() / self.ratio for _, g in placed), default=0)
+        image = self.image(math.ceil((right - left) * self.ratio), math.ceil((bottom - top) * self.ratio), self.dpi)
+        image.setDevicePixelRatio(self.ratio)
+        painter = QPainter(image)
+        for at, glyph in placed:
+            painter.drawPixmap(QPointF(at - left, glyph[2] - top), glyph[0])
+        painter.end()
+        word = self.words[text] = (QPixmap.fromImage(image), left, top, x,
+                                   max((g[4] for _, g in placed), default=0), max((g[5] for _, g in placed), default=0))
+        if len(self.words) > self.WORDS: self.words.popitem(last=False)
+        return word
+
+    def measure(self, text):
+        """(width, ascent, descent) of `text` as draw() lays it out."""
+        return self.word(text)[3:]
+
+    def draw(self, painter, x, baseline, text):
+        pixmap, left, top, width, _, _ = self.word(text)
+        painter.drawPixmap(QPointF(x + left, baseline + top), pixmap)
+        return x + width
+
+class GlyphCache:
+    """
+    GlyphFaces by mode, font, colour, DPI and device pixel ratio, so moving the
+    window to another screen or changing a font simply picks a new face. clear()
+    drops them all; the window calls it when the fonts or its screen change.
+    """
+    MODES = {
+        'table':  (TABLE_SIZE_CORRECTIONS, "14pt"),
+        'header': (HEADER_SIZE_CORRECTIONS, "32px"),
+    }
+
+    def __init__(self):
+        self.faces = {}
+
+    def face(self, mode, font, device, color):
+        """The face for a paint device (widget, image) or, before anything is shown, a QScreen."""
+        if isinstance(device, QScreen):
+            # Rounded as QPaintDevice.logicalDpiY() is, so the screen and its widgets share faces.
+            dpi, ratio = round(device.logicalDotsPerInchY()), device.devicePixelRatio()
+        else:
+            dpi, ratio = device.logicalDpiY(), device.devicePixelRatioF()
+        key = (mode, font.key(), dpi, ratio, color.rgba())
+        face = self.faces.get(key)
+        if face is None:
+            corrections, base_size = self.MODES[mode]
+            # Copies: the font and colour of a style option do not outlive the paint call.
+            face = self.faces[key] = GlyphFace(corrections, base_size, QFont(font), key[2], key[3], QColor(color))
+        return face
+
+    def clear(self):
+        self.faces.clear()
+
+GLYPHS = GlyphCache()
+
+class LoreWordDelegate(QStyledItemDelegate):
+    """
+    Paints Lore words straight onto the cell from GLYPHS, with
+    TABLE_SIZE_CORRECTIONS applied, so no QLabel or text layout is built per row.
+    """
+    PADDING = 2
+
+    @timed("table.paint")
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        text = option.text
+        option.text = ""
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+        if not text: return
+
+        role = QPalette.HighlightedText if option.state & QStyle.State_Selected else QPalette.Text
+        face = GLYPHS.face('table', option.font, painter.device(), option.palette.color(role))
+        _, ascent, descent = face.measure(text)
+        rect = option.rect
+        baseline = rect.top() + (rect.height() - ascent - descent) / 2 + ascent
+        painter.save()
+        painter.setClipRect(rect)
+        face.draw(painter, rect.left() + self.PADDING, baseline, text)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        device = option.widget or QApplication.primaryScreen()
+        face = GLYPHS.face('table', option.font, device, option.palette.color(QPalette.Text))
+        width, ascent, descent = face.measure(index.data() or "")
+        return QSize(math.ceil(width) + 2 * self.PADDING + 1, math.ceil(ascent + descent) + 2 * self.PADDING)
+
+class LoreWordLabel(QWidget):
+    """
+    The generated word, centred and drawn from GLYPHS with HEADER_SIZE_CORRECTIONS.
+    """
+
+    def __init__(self, text="", color="white", parent=None):
+        super().__init__(parent)
+        self.word = text
+        self.color = QColor(color)
+
+    def text(self):
+        return self.word
+
+    def setText(self, text):
+        self.word = text
+        self.update()
+
+    def paintEvent(self, event):
+        if not self.word: return
+        painter = QPainter(self)
+        face = GLYPHS.face('header', self.font(), self, self.color)
+        width, ascent, descent = face.measure(self.word)
+        rect = self.contentsRect()
+        baseline = rect.top() + (rect.height() - ascent - descent) / 2 + ascent
+        face.draw(painter, rect.left() + (rect.width() - width) / 2, baseline, self.word)
+
+class GlyphButton(QPushButton):
+    """A touch keyboard key showing its Lore glyph from GLYPHS."""
+
+    def __init__(self, glyph, color, parent=None):
+        super().__init__(parent)
+        self.glyph = glyph
+        self.color = QColor(color)
+        self.setAccessibleName(glyph)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        painter = QPainter(self)
+        face = GLYPHS.face('table', self.font(), self, self.color)
+        width, ascent, descent = face.measure(self.glyph)
+        rect = self.rect()
+        face.draw(painter, (rect.width() - width) / 2, (rect.height() - ascent - descent) / 2 + ascent, self.glyph)
+
+class StatsPanel(QWidget):
+    """
+    Live per-operation timings from the instrumentation layer, refreshed twice a
+    second while open. Only offered when WORDFORGE_PROFILE or --profile is set.
+    """
+    COLUMNS = ["Operation", "Count", "p50 ms", "p99 ms", "Max ms", "Total ms"]
+    KEYS = ["count", "p50_ms", "p99_ms", "max_ms", "total_ms"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.Window)
+        self.setWindowTitle("Timings")
+        self.resize(640, 420)
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        btn_reset = QPushButton("Reset")
+        btn_reset.clicked.connect(self.reset)
+        btn_save = QPushButton("Save JSON...")
+        btn_save.clicked.connect(self.save)
+        buttons.addStretch()
+        buttons.addWidget(btn_reset)
+        buttons.addWidget(btn_save)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        summary = RECORDER.summary()
+        self.table.setRowCount(len(summary))
+        for row, (name, stats) in enumerate(summary.items()):
+            values = [name, str(stats["count"])] + [f"{stats[key]:.3f}" for key in self.KEYS[1:]]
+            for col, value in enumerate(values):
+                item = self.table.item(row, col)
+                if item is None:
+                    item = QTableWidgetItem()
+                    if col: item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                    self.table.setItem(row, col, item)
+                item.setText(value)
+
+    def reset(self):
+        RECORDER.reset()
+        self.refresh()
+
+    def save(self):
+        filename, _ = QFileDialog.getSaveFileName(self, "Save Timings", "timings.json", "JSON (*.json)")
+        if filename: RECORDER.dump(filename)
+
+class PhysicalKeyFilter(QObject):
+    def __init__(self, parent_window):
+        super().__init__()
+        self.window = parent_window
+        self.key_map = BASE_KEYS
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.KeyPress:
+            handled = self.key_press(event)
+            if handled is not None: return handled
+        return super().eventFilter(obj, event)
+
+    @timed("key.filter")
+    def key_press(self, event):
+        """Returns True/False to stop or pass on the event, or None to leave it to the default filter."""
+        key_text = event.text().lower()
+        if key_text in DISABLED_KEYS: return True 
+        if event.key() == Qt.Key_Backspace:
+            self.window.backspace()
+            return True 
+        if event.key() == Qt.Key_Space:
+            self.window.input_conlang.insert(" ")
+            return True
+        
+        if event.modifiers() & Qt.ShiftModifier:
+            self.window.shift_active = True
+            self.window.shift_btn.setChecked(True)
+        if event.modifiers() & Qt.AltModifier:
+            self.window.alt_active = True
+            self.window.alt_btn.setChecked(True)
+
+        if event.modifiers() & (Qt.ControlModifier): return False
+        
+        if key_text in self.key_map:
+            lore_char = self.key_map[key_text]
+            self.window.handle_keypress(key_text, lore_char)
+            return True 
+        return None
+
+class LexiconSession(Lexicon):
+    """
+    A Lexicon as the window holds it: streamed in between UI events, saved by
+    a BackgroundWriter, with its own table models, search index and generator
+    state. Dropped by reset() when the library unloads it.
+    """
+
+    def __init__(self, filename, window):
+        super().__init__(filename)
+        self.window = window
+        self.models = {}
+        self.reset()
+
+    def reset(self):
+        for model in self.models.values():
+            model.deleteLater()
+        self.store = self.data = self.pages = self.writer = None
+        self.loading = False
+        self.models = {}
+        self.counts = {}
+        self.search_index = SearchIndex()
+        self.reverse_index = ReverseIndex()
+        # The snapshot the reverse index was read from or last saved under, so an unchanged one is not rewritten.
+        self.reverse_snapshot = None
+        self.near_words = NearWords()
+        self.seen_words = None
+        # Built on first use; ngram_snapshot names the file state it may be cached under.
+        self.ngram = None
+        self.ngram_snapshot = None
+
+    @property
+    def busy(self):
+        return self.loading
+
+    def load(self):
+        self.store = open_store(self.filename)
+        self.data, self.pages = self.store.open_pages()
+        self.writer = BackgroundWriter(self.store, lambda dirty, error: self.window.save_state.emit(self.filename, dirty, error))
+        self.loading = True
+        for category in self.window.categories:
+            self.models[category] = self.window.create_model(self, category)
+            self.counts[category] = 0
+        # The first slice runs now so the first screen of rows is ready when it is shown.
+        self.window.load_more(self)
+
+    def unload(self):
+        self.writer.flush()
+        self.writer.close()
+        self.save_caches()
+        self.reset()
+
+    def save_caches(self):
+        # The file now matches self.data, so the model and indexes can be cached against it for next time.
+        snapshot = self.store.snapshot
+        if self.store.pending or not snapshot: return
+        try:
+            if self.ngram is not None:
+                self.ngram.save(cache_path(self.filename), snapshot)
+            if self.reverse_snapshot != snapshot and len(self.reverse_index) == sum(self.counts.values()):
+                self.reverse_index.save(index_cache_path(self.filename), snapshot, self.data)
+                self.reverse_snapshot = snapshot
+        except OSError:
+            pass
+
+class VocabVault(QMainWindow):
+    # Seconds of loading per event-loop turn while a large lexicon streams in.
+    LOAD_SLICE = 0.012
+    # Near-duplicate checks: words listed before saving, and generator draws before giving up.
+    NEAR_SHOWN = 8
+    NEAR_ATTEMPTS = 200
+    # Languages kept in memory at once; switching to another unloads the one used longest ago.
+    LOADED = 3
+    # (filename, dirty, error) from a background writer, delivered on the UI thread.
+    save_state = Signal(str, bool, str)
+
+    def __init__(self, filename=DEFAULT_FILENAME, others=()):
+        super().__init__()
+        self.setWindowTitle("Word Forge")
+        self.resize(1200, 750)
+        font = QFont("Arial", 12)
+        self.setFont(font)
+        self.categories = list(CATEGORIES)
+        self.tables = {} 
+        self.library = LexiconLibrary([filename, *others], self.LOADED, lambda name: LexiconSession(name, self))
+        self.session = None
+        
+        self.shift_active = False
+        self.alt_active = False 
+        self.combo = ComboMachine()
+        
+        self.setup_ui()
+        self.save_state.connect(self.show_save_state)
+        # New font files can change how a glyph rasterizes without changing its font key.
+        QApplication.instance().fontDatabaseChanged.connect(GLYPHS.clear)
+        self.screen_watched = False
+        self.key_filter = PhysicalKeyFilter(self)
+        self.input_conlang.installEventFilter(self.key_filter)
+        for lexicon in self.library:
+            self.language_box.addItem(lexicon.name, lexicon.filename)
+            self.language_box.setItemData(self.language_box.count() - 1, lexicon.filename, Qt.ToolTipRole)
+        self.switch_language(self.library.add(filename))
+
+    # --- Languages ---
+
+    def switch_language(self, lexicon):
+        """Shows `lexicon` (a LexiconSession), loading it first if it is not in memory."""
+        previous, self.session = self.session, lexicon
+        try:
+            self.library.get(lexicon.filename)
+        except LexiconError:
+            self.session = previous
+            raise
+        for category, table in self.tables.items():
+            table.setModel(lexicon.models[category])
+            self.fit_columns(table)
+        self.set_editable(not lexicon.loading)
+        self.language_box.setCurrentIndex(self.language_box.findData(lexicon.filename))
+        self.setWindowTitle(f"Word Forge - {lexicon.name}")
+        writer = lexicon.writer
+        self.show_save_state(lexicon.filename, writer.dirty, str(writer.error) if writer.error else "")
+        self.gen_result_display.setText("...")
+        self.gen_structure_display.setText("")
+        self.update_stats()
+        self.run_search()
+
+    def open_language(self, lexicon):
+        """switch_language for the UI: a lexicon that cannot be read is reported and dropped. Returns success."""
+        if lexicon is self.session: return True
+        try:
+            self.switch_language(lexicon)
+            return True
+        except LexiconError as e:
+            QMessageBox.critical(self, "Cannot Open Lexicon", str(e))
+            self.drop_language(lexicon)
+            return False
+
+    def drop_language(self, lexicon):
+        # Only used before a lexicon finishes loading, when nothing of it can have been saved.
+        lexicon.reset()
+        self.library.discard(lexicon.filename)
+        self.language_box.removeItem(self.language_box.findData(lexicon.filename))
+        if lexicon is not self.session: return
+        self.session = None
+        for other in self.library:
+            if self.open_language(other): return
+        QApplication.quit()
+
+    def choose_lexicon(self):
+        start = os.path.dirname(os.path.abspath(self.session.filename))
+        filename, _ = QFileDialog.getSaveFileName(self, "Open or Create Lexicon", start, "Lexicons (*.json)",
+                                                  options=QFileDialog.DontConfirmOverwrite)
+        if not filename: return
+        lexicon = self.library.add(filename)
+        if self.language_box.findData(lexicon.filename) < 0:
+            self.language_box.addItem(lexicon.name, lexicon.filename)
+            self.language_box.setItemData(self.language_box.count() - 1, lexicon.filename, Qt.ToolTipRole)
+        self.open_language(lexicon)
+
+    def show_shared_words(self):
+        """Lists every Lore word saved in more than one language, in the results panel."""
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            shared = self.library.duplicates()
+        except LexiconError as e:
+            QMessageBox.critical(self, "Cannot Read Lexicon", str(e))
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        self.search_input.blockSignals(True)
+        self.search_input.clear()
+        self.search_input.blockSignals(False)
+        self.results_model.set_hits([hit for word in sorted(shared) for hit in shared[word]], show_languages=True)
+        self.results_label.setText(f"{len(shared)} words saved in more than one language")
+        self.right_stack.setCurrentIndex(1)
+
+    # --- Loading ---
+
+    def create_model(self, session, category):
+        model = LexiconTableModel(session.data[category], self)
+        model.dataChanged.connect(lambda index, *_, s=session, cat=category: self.entry_edited(s, cat, index))
+        return model
+
+    @timed("load.slice")
+    def load_more(self, session):
+        deadline = time.perf_counter() + self.LOAD_SLICE
+        for category, page in session.pages:
+            if category in session.models:
+                session.models[category].append_entries(page)
+                session.counts[category] += len(page)
+            else:
+                session.data[category].extend(page)
+            if time.perf_counter() > deadline:
+                if session is self.session: self.update_stats()
+                QTimer.singleShot(0, lambda: self.load_more_safely(session))
+                return
+        self.finish_loading(session)
+
+    def load_more_safely(self, session):
+        try:
+            self.load_more(session)
+        except LexiconError as e:
+            # Nothing can have been saved yet, so dropping the language leaves its file as it was.
+            QMessageBox.critical(self, "Cannot Open Lexicon", str(e))
+            self.drop_language(session)
+
+    def finish_loading(self, session):
+        session.loading = False
+        if session.store.pending:
+            # Journal replay may have edited or removed rows anywhere.
+            for category in self.categories:
+                session.models[category].set_entries(session.data[category])
+                session.counts[category] = len(session.data[category])
+        else:
+            session.ngram_snapshot = session.store.snapshot
+            cached = ReverseIndex.load(index_cache_path(session.filename), session.ngram_snapshot, session.data)
+            if cached is not None:
+                session.reverse_index, session.reverse_snapshot = cached, session.ngram_snapshot
+        session.writer.start()
+        if session is self.session:
+            self.set_editable(True)
+            self.update_stats()
+        self.index_more(session, session.search_index)
+        # Lexicons are never unloaded mid-load, so the library may be over its limit until now.
+        self.library.evict(keep=self.session)
+
+    def set_editable(self, editable):
+        self.add_button.setEnabled(editable)
+        triggers = QTableView.DoubleClicked | QTableView.EditKeyPressed if editable else QTableView.NoEditTriggers
+        for table in self.tables.values():
+            table.setEditTriggers(triggers)
+
+    @timed("index.slice")
+    def index_more(self, session, index):
+        indexes = [session.search_index, session.reverse_index, session.near_words]
+        position = next((i for i, other in enumerate(indexes) if other is index), None)
+        if position is None: return  # Unloaded since; a reload starts its own.
+        if index.index_more(session.data, self.LOAD_SLICE):
+            self.run_search()
+            # Then the next one (the reverse index is already complete if it came from the cache), so plain search is ready first.
+            if position + 1 < len(indexes): self.index_more(session, indexes[position + 1])
+        else:
+            QTimer.singleShot(0, lambda: self.index_more(session, index))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.screen_watched: return
+        # Faces are keyed by DPI already; this only lets the ones for the old screen go.
+        self.windowHandle().screenChanged.connect(lambda _: GLYPHS.clear())
+        self.screen_watched = True
+
+    def closeEvent(self, event):
+        loaded = [lexicon for lexicon in self.library if lexicon.loaded]
+        for lexicon in loaded:
+            try:
+                lexicon.writer.flush()
+            except LexiconError as e:
+                answer = QMessageBox.critical(self, "Save Failed", f"{e}\n\nQuit anyway and lose the unsaved changes?",
+                                              QMessageBox.Yes | QMessageBox.No)
+                if answer != QMessageBox.Yes:
+                    event.ignore()
+                    return
+        for lexicon in loaded:
+            try:
+                lexicon.writer.close()
+            except (OSError, LexiconError):
+                continue  # Only reached when the user chose to quit without the failed changes.
+            lexicon.save_caches()
+        super().closeEvent(event)
+
+    def show_save_state(self, filename, dirty, error):
+        if self.session is None or filename != self.session.filename: return
+        if error:
+            self.save_label.setText("Save failed, retrying")
+            self.save_label.setToolTip(error)
+            self.save_label.setStyleSheet("color: #e57373;")
+        else:
+            self.save_label.setText("Saving..." if dirty else "Saved")
+            self.save_label.setToolTip("")
+            self.save_label.setStyleSheet("color: #ffb74d;" if dirty else "color: #81c784;")
+
+    def setup_ui(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        main_layout = QHBoxLayout(central_widget)
+
+        # LEFT PANEL
+        left_panel = QWidget()
+        left_layout = QVBoxLayout(left_panel)
+        left_panel.setFixedWidth(500)
+        
+        gen_group = QFrame()
+        gen_group.setStyleSheet("background-color: #2b2b2b; border-radius: 8px; padding: 10px;")
+        gen_layout = QVBoxLayout(gen_group)
+        self.gen_result_display = LoreWordLabel("...")
+        self.gen_result_display.setFixedHeight(80)
+        self.gen_result_display.setContentsMargins(0, 10, 0, 0)
+        gen_layout.addWidget(self.gen_result_display)
+
+        self.gen_structure_display = QLabel("")
+        self.gen_structure_display.setAlignment(Qt.AlignCenter)
+        self.gen_structure_display.setFixedHeight(30)
+        self.gen_structure_display.setStyleSheet("color: #888; font-size: 14px; font-style: italic; margin-bottom: 10px;")
+        gen_layout.addWidget(self.gen_structure_display)
+        
+        btn_generate = QPushButton("Generate Random Word")
+        btn_generate.clicked.connect(self.run_generator)
+        btn_generate.setStyleSheet("QPushButton { background-color: #0277bd; color: white; padding: 8px; border-radius: 4px; font-weight: bold; } QPushButton:hover { background-color: #039be5; } QPushButton:pressed { background-color: #01579b; }")
+        gen_layout.addWidget(btn_generate)
+        gen_options = QHBoxLayout()
+        self.gen_mode = QComboBox()
+        for label, mode in (("Syllable Templates", "templates"), ("Like Saved Words", "ngram")):
+            self.gen_mode.addItem(label, mode)
+        self.unique_check = QCheckBox("Only new words (skip saved and already generated)")
+        self.unique_check.setStyleSheet("color: #ccc;")
+        self.distinct_check = QCheckBox("Not one glyph off a saved word")
+        self.distinct_check.setStyleSheet("color: #ccc;")
+        gen_options.addWidget(self.gen_mode)
+        gen_options.addWidget(self.unique_check)
+        gen_options.addWidget(self.distinct_check)
+        gen_layout.addLayout(gen_options)
+        left_layout.addWidget(gen_group)
+        left_layout.addSpacing(10)
+
+        # MANUAL ENTRY
+        form_layout = QGridLayout()
+        
+        self.input_conlang = RichLineEdit()
+        self.input_conlang.setPlaceholderText("New Word")
+        
+        self.input_english = QLineEdit()
+        self.input_english.setPlaceholderText("English Definition")
+        self.input_english.setFixedHeight(50)
+        self.input_english.setStyleSheet("font-size: 14pt; padding: 5px;")
+        
+        self.input_notes = QLineEdit()
+        self.input_notes.setPlaceholderText("Etymology / Root Notes")
+        self.input_notes.setFixedHeight(50)
+        self.input_notes.setStyleSheet("font-size: 14pt; padding: 5px;")
+        
+        form_layout.addWidget(QLabel("Word:"), 0, 0)
+        form_layout.addWidget(self.input_conlang, 0, 1)
+        form_layout.addWidget(QLabel("Def:"), 1, 0)
+        form_layout.addWidget(self.input_english, 1, 1)
+        form_layout.addWidget(QLabel("Root:"), 2, 0)
+        form_layout.addWidget(self.input_notes, 2, 1)
+        left_layout.addLayout(form_layout)
+        
+        self.add_button = QPushButton("Save to Dictionary")
+        self.add_button.setMinimumHeight(45)
+        self.add_button.setStyleSheet("QPushButton { background-color: #2e7d32; color: white; font-weight: bold; border-radius: 4px; font-size: 16px; } QPushButton:hover { background-color: #388e3c; } QPushButton:pressed { background-color: #1b5e20; }")
+        self.add_button.clicked.connect(self.add_entry)
+        self.add_button.setEnabled(False)
+        left_layout.addWidget(self.add_button)
+        
+        left_layout.addSpacing(15)
+        left_layout.addWidget(QLabel("Touch Keyboard:"))
+        keyboard = self.create_keyboard()
+        left_layout.addWidget(keyboard)
+        left_layout.addStretch()
+        
+        # RIGHT PANEL
+        right_panel = QWidget()
+        right_layout = QVBoxLayout(right_panel)
+
+        language_row = QHBoxLayout()
+        self.language_box = QComboBox()
+        self.language_box.activated.connect(lambda i: self.open_language(self.library.add(self.language_box.itemData(i))))
+        btn_open = QPushButton("Open Lexicon...")
+        btn_open.clicked.connect(self.choose_lexicon)
+        btn_shared = QPushButton("Shared Words")
+        btn_shared.setToolTip("Lore words saved in more than one language")
+        btn_shared.clicked.connect(self.show_shared_words)
+        language_row.addWidget(QLabel("Language:"))
+        language_row.addWidget(self.language_box, 1)
+        language_row.addWidget(btn_open)
+        language_row.addWidget(btn_shared)
+        right_layout.addLayout(language_row)
+
+        search_row = QHBoxLayout()
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search words, definitions and notes")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(self.run_search)
+        self.search_mode = QComboBox()
+        for label, mode in (("Contains", "substring"), ("Starts With", "prefix"), ("Exact Glyphs", "exact"),
+                            ("Meaning", "meaning"), ("From Root", "root"), ("Descendants", "descendants")):
+            self.search_mode.addItem(label, mode)
+        self.search_mode.currentIndexChanged.connect(self.run_search)
+        self.search_all = QCheckBox("All languages")
+        self.search_all.toggled.connect(self.run_search)
+        search_row.addWidget(self.search_input)
+        search_row.addWidget(self.search_mode)
+        search_row.addWidget(self.search_all)
+        right_layout.addLayout(search_row)
+
+        self.tabs = QTabWidget()
+        for category in self.categories:
+            tab = QWidget()
+            t_layout = QVBoxLayout(tab)
+            # Each language brings its own models; this one only stands in until the first is shown.
+            table = self.create_table(LexiconTableModel([], self))
+            delete = QShortcut(QKeySequence.Delete, table)
+            delete.setContext(Qt.WidgetShortcut)
+            delete.activated.connect(lambda cat=category: self.delete_selected(cat))
+            self.tables[category] = table
+            t_layout.addWidget(table)
+            self.tabs.addTab(tab, category.title())
+
+        self.results_model = SearchResultsModel(self)
+        self.results_table = self.create_table(self.results_model)
+        self.results_table.doubleClicked.connect(self.show_search_hit)
+        self.results_label = QLabel("")
+        results_panel = QWidget()
+        results_layout = QVBoxLayout(results_panel)
+        results_layout.setContentsMargins(0, 0, 0, 0)
+        results_layout.addWidget(self.results_label)
+        results_layout.addWidget(self.results_table)
+
+        self.right_stack = QStackedWidget()
+        self.right_stack.addWidget(self.tabs)
+        self.right_stack.addWidget(results_panel)
+        right_layout.addWidget(self.right_stack)
+        self.stats_label = QLabel("Total Words: 0")
+        self.save_label = QLabel("Saved")
+        self.save_label.setStyleSheet("color: #81c784;")
+        stats_row = QHBoxLayout()
+        stats_row.addWidget(self.stats_label)
+        stats_row.addStretch()
+        stats_row.addWidget(self.save_label)
+        if instrument.enabled:
+            self.stats_panel = StatsPanel(self)
+            btn_timings = QPushButton("Timings (F12)")
+            btn_timings.clicked.connect(self.stats_panel.show)
+            stats_row.addWidget(btn_timings)
+            QShortcut(QKeySequence(Qt.Key_F12), self, self.stats_panel.show)
+        right_layout.addLayout(stats_row)
+        main_layout.addWidget(left_panel)
+        main_layout.addWidget(right_panel)
+
+    def create_table(self, model):
+        table = QTableView()
+        table.setModel(model)
+        table.setItemDelegateForColumn(0, LoreWordDelegate(table))
+        table.setEditTriggers(QTableView.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        # Fixed row heights keep scrolling cost independent of lexicon size.
+        rows = table.verticalHeader()
+        rows.setSectionResizeMode(QHeaderView.Fixed)
+        rows.setDefaultSectionSize(30)
+        self.fit_columns(table)
+        return table
+
+    def fit_columns(self, table):
+        # Per-section modes are lost when the table gets a new model, so this runs again on every switch.
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
+        header.setResizeContentsPrecision(0)  # Size the notes column from the visible rows only.
+
+    def create_keyboard(self):
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setSpacing(4)
+        KEY_STYLE = "QPushButton { background-color: #444; border: 1px solid #555; border-radius: 5px; } QPushButton:hover { background-color: #555; border-color: #777; } QPushButton:pressed { background-color: #222; border-color: #333; }"
+        for row_data in KEYBOARD_LAYOUT:
+            row = QHBoxLayout()
+            row.setSpacing(4)
+            row.addStretch() 
+            for key_id, label in row_data:
+                text_color = "#ffab91" if label in VOWELS else "#81d4fa"
+                btn = GlyphButton(label, text_color)
+                btn.setFixedSize(45, 45)
+                btn.setFont(QFont("Arial", 14))
+                btn.clicked.connect(lambda ch=False, k=key_id, l=label: self.handle_keypress(k, l))
+                btn.setStyleSheet(KEY_STYLE)
+                row.addWidget(btn)
+            row.addStretch()
+            layout.addLayout(row)
+        
+        ctrl_row = QHBoxLayout()
+        ctrl_row.addStretch()
+        
+        self.shift_btn = QPushButton("SHIFT")
+        self.shift_btn.setCheckable(True)
+        self.shift_btn.setFixedSize(80, 45)
+        self.shift_btn.setStyleSheet("""
+            QPushButton { background-color: #333; color: white; font-weight: bold; border: 1px solid #555; border-radius: 5px; }
+            QPushButton:hover { background-color: #444; border-color: #777; }
+            QPushButton:checked { background-color: #ff9800; color: black; border-color: #e65100; }
+        """)
+        self.shift_btn.toggled.connect(self.toggle_shift)
+        ctrl_row.addWidget(self.shift_btn)
+
+        self.alt_btn = QPushButton("ALT")
+        self.alt_btn.setCheckable(True)
+        self.alt_btn.setFixedSize(80, 45)
+        self.alt_btn.setStyleSheet("""
+            QPushButton { background-color: #333; color: white; font-weight: bold; border: 1px solid #555; border-radius: 5px; }
+            QPushButton:hover { background-color: #444; border-color: #777; }
+            QPushButton:checked { background-color: #29b6f6; color: black; border-color: #0288d1; }
+        """)
+        self.alt_btn.toggled.connect(self.toggle_alt)
+        ctrl_row.addWidget(self.alt_btn)
+        
+        CTRL_STYLE = "QPushButton { background-color: #333; color: white; border: 1px solid #555; border-radius: 5px; } QPushButton:hover { background-color: #444; border-color: #777; } QPushButton:pressed { background-color: #222; border-color: #111; }"
+        
+        space_btn = QPushButton("Space")
+        space_btn.setFixedSize(150, 45)
+        space_btn.setStyleSheet(CTRL_STYLE)
+        space_btn.clicked.connect(lambda: self.input_conlang.insert(" "))
+        ctrl_row.addWidget(space_btn)
+        
+        back_btn = QPushButton("⌫")
+        back_btn.setFixedSize(60, 45)
+        back_btn.setStyleSheet(CTRL_STYLE)
+        back_btn.clicked.connect(self.backspace)
+        ctrl_row.addWidget(back_btn)
+        
+        ctrl_row.addStretch()
+        layout.addLayout(ctrl_row)
+        return container
+
+    def toggle_shift(self, checked):
+        self.shift_active = checked
+        if checked: self.alt_btn.setChecked(False)
+
+    def toggle_alt(self, checked):
+        self.alt_active = checked
+        if checked: self.shift_btn.setChecked(False)
+        else: self.combo.reset()
+
+    def replace_last_chars(self, n, new_text):
+        self.input_conlang.replace_last(n, new_text)
+
+    @timed("key.handle")
+    def handle_keypress(self, key_id, default_char):
+        if self.shift_active:
+            self.input_conlang.insert(SHIFT_KEYS.get(key_id, default_char))
+            self.shift_btn.setChecked(False)
+            self.input_conlang.setFocus()
+            return
+
+        if self.alt_active:
+            self.input_conlang.insert(default_char)
+            self.input_conlang.setFocus()
+            result, keys, still_active = self.combo.feed(key_id)
+            if result:
+                self.replace_last_chars(keys, result)
+            if not still_active:
+                self.alt_btn.setChecked(False)
+            return
+
+        self.input_conlang.insert(default_char)
+        self.input_conlang.setFocus()
+
+    @timed("key.backspace")
+    def backspace(self):
+        self.input_conlang.backspace()
+        self.input_conlang.setFocus()
+        self.combo.back()
+
+    @timed("run_generator")
+    def run_generator(self):
+        session = self.session
+        distinct = self.distinct_check.isChecked()
+        if distinct and (session.loading or len(session.near_words) < sum(session.counts.values())):
+            self.gen_structure_display.setText("(still indexing the lexicon)")
+            return
+        if self.unique_check.isChecked() and session.seen_words is None:
+            session.seen_words = SeenWords(lexicon_words(session.data))
+        for _ in range(self.NEAR_ATTEMPTS if distinct else 1):
+            word, structure = self.draw_word(session)
+            if word is None: return
+            if not distinct or not session.near_words.has_near(word): break
+        else:
+            QMessageBox.information(self, "No Distinct Words", "Every word tried was within one glyph of a saved word.")
+            return
+        self.gen_result_display.setText(word)
+        self.gen_structure_display.setText(structure)
+        self.input_conlang.setText(word)
+
+    def draw_word(self, session):
+        """One word and its structure from the chosen generator, or (None, None) after saying why not."""
+        if self.gen_mode.currentData() == "ngram":
+            if session.loading:
+                self.gen_structure_display.setText("(still loading the lexicon)")
+                return None, None
+            if session.ngram is None:
+                session.ngram = load_or_train(session.filename, session.data, session.ngram_snapshot)
+            word = session.ngram.generate(seen=session.seen_words if self.unique_check.isChecked() else None)
+            if word is None:
+                QMessageBox.information(self, "No Words", "Save some words first, or there are no new ones left to find.")
+                return None, None
+            structure = f"like saved words ({session.ngram.order}-grams)"
+            if self.unique_check.isChecked():
+                structure = f"{structure}   ({session.seen_words.rejection_rate:.0%} rejected)"
+        elif self.unique_check.isChecked():
+            word, structure = WordGenerator.generate_unique_word(session.seen_words)
+            if word is None:
+                QMessageBox.information(self, "No New Words", "Could not find a word that is not already taken.")
+                return None, None
+            structure = f"{structure}   ({session.seen_words.rejection_rate:.0%} rejected)"
+        else:
+            word, structure = WordGenerator.generate_word()
+        return word, structure
+
+    @timed("add_entry")
+    def add_entry(self):
+        conlang = self.input_conlang.text().strip()
+        english = self.input_english.text().strip()
+        notes = self.input_notes.text().strip()
+        if not conlang or not english:
+            QMessageBox.warning(self, "Missing Info", "Need word and definition.")
+            return
+        session = self.session
+        if len(session.near_words) == sum(session.counts.values()):
+            near = session.near_words.near(conlang, limit=self.NEAR_SHOWN)
+            if near and not self.confirm_near(session, conlang, near): return
+        cat = self.categories[self.tabs.currentIndex()]
+        entry = Entry(conlang, english, notes)
+        session.models[cat].append_entry(entry)
+        session.search_index.added(cat, session.data[cat])
+        session.reverse_index.added(cat, session.data[cat])
+        session.near_words.added(cat, session.data[cat])
+        if session.seen_words is not None: session.seen_words.add(conlang)
+        if session.ngram is not None: session.ngram.train([conlang])
+        session.ngram_snapshot = None
+        session.counts[cat] += 1
+        session.writer.append(cat, entry)
+        self.update_stats()
+        self.input_conlang.clear()
+        self.input_english.clear()
+        self.input_notes.clear()
+        self.gen_result_display.setText("...")
+        self.gen_structure_display.setText("")
+
+    def confirm_near(self, session, conlang, near):
+        lines = []
+        for distance, word in near:
+            meanings = "; ".join(entry.get('english', '') for _, entry in session.search_index.search(word, "exact", 3))
+            lines.append(f"{word}   {meanings}" + ("   (this very word)" if distance == 0 else ""))
+        answer = QMessageBox.question(self, "Similar Words", f"Saved words within one glyph of {conlang}:\n\n" + "\n".join(lines) + "\n\nSave it anyway?")
+        return answer == QMessageBox.Yes
+
+    @timed("delete_selected")
+    def delete_selected(self, category):
+        session = self.session
+        if session.loading: return
+        table = self.tables[category]
+        rows = [index.row() for index in table.selectionModel().selectedRows()]
+        if not rows: return
+        answer = QMessageBox.question(self, "Delete Entries", f"Delete {len(rows)} selected entr{'y' if len(rows) == 1 else 'ies'}?")
+        if answer != QMessageBox.Yes: return
+        session.search_index.removing(category, rows, session.data[category])
+        session.reverse_index.removing(category, rows, session.data[category])
+        session.near_words.removing(category, rows, session.data[category])
+        if session.ngram is not None:
+            for row in set(rows):
+                for word in session.data[category][row].get('conlang', '').split():
+                    session.ngram.remove(word)
+        session.ngram_snapshot = None
+        session.models[category].remove_rows(rows)
+        session.counts[category] -= len(rows)
+        session.writer.delete(category, rows)
+        self.update_stats()
+
+    @timed("entry_edited")
+    def entry_edited(self, session, category, index):
+        key = LexiconTableModel.KEYS[index.column()]
+        entry = session.data[category][index.row()]
+        session.writer.update(category, index.row(), key, entry[key])
+        session.search_index.changed(category, index.row(), entry)
+        session.reverse_index.changed(category, index.row(), entry)
+        session.near_words.changed(category, index.row(), entry)
+
+    @timed("run_search")
+    def run_search(self):
+        query = self.search_input.text().strip()
+        if not query:
+            self.right_stack.setCurrentIndex(0)
+            return
+        mode = self.search_mode.currentData()
+        index_of = (lambda s: s.reverse_index) if mode in REVERSE_MODES else (lambda s: s.search_index)
+        everywhere = self.search_all.isChecked()
+        sessions = [lexicon for lexicon in self.library if lexicon.loaded] if everywhere else [self.session]
+        hits = []
+        for session in sessions:
+            found = index_of(session).search(query, mode, SearchIndex.LIMIT - len(hits))
+            hits += [(session, category, entry) for category, entry in found]
+            if len(hits) >= SearchIndex.LIMIT: break
+        self.results_model.set_hits(hits, show_languages=everywhere)
+        count = f"{len(hits)}+" if len(hits) >= SearchIndex.LIMIT else str(len(hits))
+        still_indexing = any(s.loading or len(index_of(s)) < sum(s.counts.values()) for s in sessions)
+        notes = [" (still indexing...)"] if still_indexing else []
+        if len(sessions) < len(self.library):
+            missing = len(self.library) - len(sessions)
+            notes.append(f" ({missing} language{'s' if missing > 1 else ''} not in memory; open {'them' if missing > 1 else 'it'} to search)")
+        self.results_label.setText(f"{count} results" + "".join(notes))
+        self.right_stack.setCurrentIndex(1)
+
+    def show_search_hit(self, index):
+        session, category, entry = self.results_model.hits[index.row()]
+        self.search_input.clear()
+        if not self.open_language(session): return
+        row = next((r for r, e in enumerate(session.data.get(category, [])) if e is entry), None)
+        self.right_stack.setCurrentIndex(0)
+        if row is None: return
+        self.tabs.setCurrentIndex(self.categories.index(category))
+        table = self.tables[category]
+        table.selectRow(row)
+        table.scrollTo(session.models[category].index(row, 0), QTableView.PositionAtCenter)
+
+    def update_stats(self):
+        total = sum(self.session.counts.values())
+        self.stats_label.setText(f"Total Words: {total} (loading...)" if self.session.loading else f"Total Words: {total}")
+
+def main(filename=DEFAULT_FILENAME, others=()):
+    app = QApplication(sys.argv)
+    app.setStyle("Fusion")
+    try:
+        window = VocabVault(filename, others)
+    except LexiconError as e:
+        # Refuse to start rather than open an empty lexicon that would later overwrite the file.
+        QMessageBox.critical(None, "Cannot Open Lexicon", str(e))
+        return 1
+    window.show()
+    return app.exec()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import atexit
+import functools
+
+# ==========================================
+#            INSTRUMENTATION
+# ==========================================
+
+# WORDFORGE_PROFILE=1 records timings; WORDFORGE_PROFILE=<file.json> also writes them there on exit.
+ENV_VAR = "WORDFORGE_PROFILE"
+
+class Histogram:
+    """
+    Latency histogram with logarithmic buckets, STEPS per doubling (at most 12.5%
+    wide at the default), so percentiles cost a fixed amount of memory however many
+    samples arrive.
+    """
+    STEPS = 8
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.buckets = {}
+
+    def add(self, ns):
+        self.count += 1
+        self.total += ns
+        if ns > self.max: self.max = ns
+        # bit_length gives the doubling; the bits just below the top one pick the step within it.
+        bits = ns.bit_length()
+        step = (ns * 2 * self.STEPS >> bits) - self.STEPS if bits > 3 else 0
+        bucket = bits * self.STEPS + step
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def upper(self, bucket):
+        bits, step = divmod(bucket, self.STEPS)
+        if bits <= 3: return 1 << bits
+        return ((self.STEPS + step + 1) << bits) // (2 * self.STEPS)
+
+    def percentile(self, p):
+        """Upper edge of the bucket holding the p-th percentile, in ns (never above the true max)."""
+        if not self.count: return 0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank: return min(self.upper(bucket), self.max)
+        return self.max
+
+    def summary(self):
+        ms = 1e-6
+        return {"count": self.count, "total_ms": self.total * ms,
+                "mean_ms": self.total / self.count * ms if self.count else 0.0,
+                "p50_ms": self.percentile(50) * ms, "p99_ms": self.percentile(99) * ms,
+                "max_ms": self.max * ms}
+
+class Recorder:
+    """Per-operation latency histograms, filled in by the timed() wrappers."""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, name, ns):
+        histogram = self.histograms.get(name)
+        if histogram is None: histogram = self.histograms[name] = Histogram()
+        histogram.add(ns)
+
+    def summary(self):
+        return {name: self.histograms[name].summary() for name in sorted(self.histograms)}
+
+    def reset(self):
+        self.histograms.clear()
+
+    def dump(self, filename):
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({"operations": self.summary()}, f, indent=4)
+            f.write("\n")
+
+RECORDER = Recorder()
+enabled = False
+dump_path = None
+
+def enable(path=None):
+    """
+    Turns recording on, optionally dumping to `path` at exit. Only functions
+    decorated after this call are timed, so call it before importing gui.
+    """
+    global enabled, dump_path
+    if path and dump_path is None: atexit.register(lambda: RECORDER.dump(dump_path))
+    enabled = True
+    dump_path = path or dump_path
+
+def timed(name):
+    """
+    Decorator recording each call's latency under `name`. While recording is
+    off the function is returned untouched, so it costs nothing.
+    """
+    def decorate(fn):
+        if not enabled: return fn
+        record, clock = RECORDER.record, time.perf_counter_ns
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, clock() - start)
+        return wrapper
+    return decorate
+
+_setting = os.environ.get(ENV_VAR, "")
+if _setting and _setting != "0":
+    enable(None if _setting == "1" else _setting)
@@ -0,0 +1,118 @@
+from lore import KEYBOARD_LAYOUT, LONG_VOWEL_MAP, COMBO_MAP, DISABLED_KEYS
+
+# ==========================================
+#           COMPILED KEY MAPS
+# ==========================================
+# KEYBOARD_LAYOUT, LONG_VOWEL_MAP, COMBO_MAP and DISABLED_KEYS compiled into
+# lookup tables and a trie, shared by the keyboard and bulk transliteration.
+
+class KeyNode:
+    __slots__ = ("children", "output")
+
+    def __init__(self):
+        self.children = {}
+        self.output = None
+
+def build_trie(pairs):
+    root = KeyNode()
+    for keys, glyph in pairs:
+        node = root
+        for key in keys:
+            node = node.children.setdefault(key, KeyNode())
+        node.output = glyph
+    return root
+
+BASE_KEYS = {key: glyph for row in KEYBOARD_LAYOUT for key, glyph in row}
+SHIFT_KEYS = {key: LONG_VOWEL_MAP.get(key, glyph) for key, glyph in BASE_KEYS.items()}
+COMBO_TRIE = build_trie(COMBO_MAP.items())
+
+class ComboMachine:
+    """
+    ALT-mode state: walks COMBO_TRIE one key at a time, so each keystroke is a
+    single dict lookup however many combos there are.
+    """
+    def __init__(self, trie=COMBO_TRIE):
+        self.trie = trie
+        self.path = [trie]
+
+    @property
+    def buffer_length(self):
+        return len(self.path) - 1
+
+    def feed(self, key):
+        """
+        Returns (glyph, keys, active). glyph is set when `key` completes a combo
+        and should replace the last `keys` typed glyphs; active is False once ALT
+        mode should end (combo finished, or no combo starts this way).
+        """
+        node = self.path[-1].children.get(key)
+        if node is None:
+            self.reset()
+            return None, 0, False
+        self.path.append(node)
+        if node.output is not None:
+            keys = self.buffer_length
+            self.reset()
+            return node.output, keys, False
+        return None, 0, True
+
+    def back(self):
+        if len(self.path) > 1: self.path.pop()
+
+    def reset(self):
+        del self.path[1:]
+
+# ==========================================
+#           BULK TRANSLITERATION
+# ==========================================
+
+def case_variants(keys):
+    # Upper-case consonants type the same glyph (SHIFT on a consonant is a no-op),
+    # but an upper-case vowel means SHIFT, i.e. a long vowel, so it cannot start or continue a combo.
+    variants = [""]
+    for key in keys:
+        options = [key] if key in LONG_VOWEL_MAP else [key, key.upper()]
+        variants = [v + o for v in variants for o in options]
+    return variants
+
+TRANSLITERATION_TRIE = build_trie(
+    list(BASE_KEYS.items())
+    + [(key.upper(), glyph) for key, glyph in SHIFT_KEYS.items()]
+    + [(variant, glyph) for keys, glyph in COMBO_MAP.items() for variant in case_variants(keys)]
+)
+DROPPED = set(DISABLED_KEYS) | {key.upper() for key in DISABLED_KEYS}
+
+def transliterate(latin_text):
+    """
+    Converts romanized text to Lore glyphs in one left-to-right pass, taking the
+    longest match at each position:
+      - a lower-case key types its KEYBOARD_LAYOUT glyph
+      - an upper-case vowel types its long vowel (as SHIFT would)
+      - a COMBO_MAP pair such as "sh" or "ya" types its compound glyph (as ALT would)
+    Disabled keys are dropped, like on the keyboard; anything else (spaces,
+    punctuation, digits) is kept as is.
+    """
+    out = []
+    i, n = 0, len(latin_text)
+    root = TRANSLITERATION_TRIE
+    while i < n:
+        node, j = root, i
+        glyph, end = None, i
+        while j < n:
+            node = node.children.get(latin_text[j])
+            if node is None: break
+            j += 1
+            if node.output is not None:
+                glyph, end = node.output, j
+        if glyph is not None:
+            out.append(glyph)
+            i = end
+        else:
+            if latin_text[i] not in DROPPED: out.append(latin_text[i])
+            i += 1
+    return "".join(out)
+
+def transliterate_lines(lines):
+    """Lazily transliterates an iterable of lines, e.g. an open word list."""
+    for line in lines:
+        yield transliterate(line)
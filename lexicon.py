@@ -0,0 +1,681 @@
+import re
+import json
+import os
+import time
+import queue
+import atexit
+import codecs
+import gc
+import hashlib
+import threading
+import contextlib
+
+from instrument import timed
+
+# ==========================================
+#              LEXICON FILES
+# ==========================================
+
+DEFAULT_FILENAME = "future_lang.json"
+CATEGORIES = ["dictionary", "phrases"]
+
+class LexiconError(Exception):
+    """Raised when a lexicon file or its journal cannot be read."""
+
+def empty_lexicon():
+    return {cat: [] for cat in CATEGORIES}
+
+# ==========================================
+#              ENTRIES
+# ==========================================
+
+class Entry:
+    """
+    One lexicon entry, standing in for the dict {"conlang", "english", "notes"}
+    in about a third of the memory: the fields live in slots, with no per-entry
+    dict or key table. It reads like that dict (get, [], in, keys, items,
+    dict(entry), ==) and dumps to the same JSON. Only those three fields can be
+    set; entries with other keys or another key order are left as dicts (see
+    compact_entry), so the two can sit in the same list.
+
+    Unlike dicts of strings, Entries are tracked by the cycle collector, so
+    loaders read them with the collector paused (see collector_paused).
+    """
+    __slots__ = ("conlang", "english", "notes")
+    FIELDS = __slots__
+
+    def __init__(self, conlang="", english="", notes=""):
+        self.conlang = conlang
+        self.english = english
+        self.notes = notes
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in Entry.FIELDS else default
+
+    def __getitem__(self, key):
+        if key not in Entry.FIELDS: raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in Entry.FIELDS: raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in Entry.FIELDS
+
+    def __iter__(self):
+        return iter(Entry.FIELDS)
+
+    def __len__(self):
+        return 3
+
+    def keys(self):
+        return Entry.FIELDS
+
+    def values(self):
+        return (self.conlang, self.english, self.notes)
+
+    def items(self):
+        return (("conlang", self.conlang), ("english", self.english), ("notes", self.notes))
+
+    def copy(self):
+        return Entry(self.conlang, self.english, self.notes)
+
+    def __eq__(self, other):
+        if type(other) is Entry: return self.values() == other.values()
+        if isinstance(other, dict): return dict(self.items()) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+def compact_entry(entry, pool=None):
+    """
+    The Entry for a parsed entry dict, or the dict itself if its keys are not
+    exactly conlang, english, notes, in that order. `pool`, a dict kept for one
+    load, makes equal conlang and notes strings one object.
+    """
+    if type(entry) is not dict or tuple(entry) != Entry.FIELDS: return entry
+    conlang, english, notes = entry.values()
+    if pool is not None:
+        conlang = pool.setdefault(conlang, conlang)
+        notes = pool.setdefault(notes, notes)
+    return Entry(conlang, english, notes)
+
+@contextlib.contextmanager
+def collector_paused():
+    """
+    Keeps the cycle collector off while entries are allocated in bulk: each
+    Entry counts towards its thresholds, so a load would otherwise trigger
+    hundreds of collections that walk everything read so far.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled: gc.enable()
+
+def write_atomic(filename, text):
+    # Write beside the target and rename over it, so a crash leaves either the old file or the new one.
+    tmp = filename + ".tmp"
+    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, filename)
+
+def dump_lexicon(data):
+    """
+    The same text as json.dumps(data, indent=4, ensure_ascii=False), about twice
+    as fast: json only uses its C encoder without indent, so the usual shape (lists
+    of flat string entries) is laid out here, quoting with the C string encoder.
+    """
+    quote = json.encoder.encode_basestring
+    parts = []
+    for key, value in data.items():
+        if type(key) is not str: return json.dumps(data, indent=4, ensure_ascii=False, default=dict)
+        if type(value) is not list or not value:
+            parts.append(quote(key) + ": " + json.dumps(value, indent=4, ensure_ascii=False, default=dict).replace("\n", "\n    "))
+            continue
+        entries = []
+        for entry in value:
+            try:
+                if not entry: raise TypeError
+                entries.append("{\n            " + ",\n            ".join([quote(k) + ": " + quote(v) for k, v in entry.items()])
+                               + "\n        }")
+            except (TypeError, AttributeError):
+                # Not a flat dict of strings: let json lay it out, one level deeper.
+                entries.append(json.dumps(entry, indent=4, ensure_ascii=False, default=dict).replace("\n", "\n        "))
+        parts.append(quote(key) + ": [\n        " + ",\n        ".join(entries) + "\n    ]")
+    if not parts: return "{}"
+    return "{\n    " + ",\n    ".join(parts) + "\n}"
+
+def read_snapshot(filename):
+    """Returns (data, fingerprint) for a JSON lexicon file."""
+    data = empty_lexicon()
+    reader = SnapshotReader(filename, pool={})
+    with collector_paused():
+        for key, entry in reader:
+            data.setdefault(key, []).append(entry)
+    reader.finish(data)
+    return data, reader.fingerprint
+
+def fingerprint(raw):
+    return f"{len(raw)}:{hashlib.blake2b(raw, digest_size=16).hexdigest()}"
+
+class SnapshotReader:
+    """
+    Streams (category, entry) pairs out of a JSON lexicon a chunk at a time, so
+    the raw text and the parsed lexicon are never both held in memory.
+    Entries come out as Entry objects wherever they fit (see compact_entry).
+    Top-level values that are not lists are kept aside and restored by finish().
+    """
+    CHUNK = 1 << 20
+    WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+    def __init__(self, filename, chunk_size=CHUNK, pool=None):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.keys = []
+        self.extras = {}
+        self.fingerprint = None
+        self.pool = pool    # see compact_entry; None when streaming, so memory stays flat
+
+    def __iter__(self):
+        if not os.path.exists(self.filename):
+            self.fingerprint = fingerprint(b"")
+            return
+        self.hasher = hashlib.blake2b(digest_size=16)
+        self.size = 0
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.scan = json.JSONDecoder().scan_once
+        self.buf, self.pos, self.eof = "", 0, False
+        with open(self.filename, 'rb') as self.file:
+            if self.peek() is not None:
+                yield from self.parse_object()
+            if self.peek() is not None:
+                self.fail("unexpected data after the lexicon")
+        self.fingerprint = f"{self.size}:{self.hasher.hexdigest()}"
+
+    def finish(self, data):
+        """Restores extra top-level values and the file's key order into data."""
+        for key in self.keys:
+            data[key] = self.extras[key] if key in self.extras else data.pop(key, [])
+        return data
+
+    def parse_object(self):
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str): self.fail("expected a category name")
+            self.expect(":")
+            self.keys.append(key)
+            if self.peek() == "[":
+                self.pos += 1
+                if self.peek() == "]":
+                    self.pos += 1
+                else:
+                    yield from self.parse_entries(key)
+            else:
+                self.extras[key] = self.value()
+            if self.separator("}"): return
+
+    def parse_entries(self, key):
+        skip, compact, pool = self.WHITESPACE.match, compact_entry, self.pool
+        while True:
+            # Fast path: walk every entry that sits wholly inside the buffer.
+            buf, pos, scan = self.buf, self.pos, self.scan
+            end_of_buf = len(buf)
+            while True:
+                pos = skip(buf, pos).end()
+                try:
+                    entry, end = scan(buf, pos)
+                except (ValueError, StopIteration):
+                    break
+                after = skip(buf, end).end()
+                if after >= end_of_buf: break
+                if buf[after] == ",":
+                    yield key, compact(entry, pool)
+                    pos = after + 1
+                elif buf[after] == "]":
+                    yield key, compact(entry, pool)
+                    self.pos = after + 1
+                    return
+                else:
+                    break
+            # Slow path: one entry that straddles the buffer edge (or is malformed).
+            self.pos = pos
+            yield key, compact(self.value(), pool)
+            if self.separator("]"): return
+
+    def fill(self):
+        chunk = self.file.read(self.chunk_size)
+        self.size += len(chunk)
+        self.hasher.update(chunk)
+        self.eof = not chunk
+        if self.pos > len(self.buf) // 2:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        self.buf += self.decoder.decode(chunk, final=self.eof)
+
+    def peek(self):
+        """Skips whitespace and returns the next character, or None at the end of the file."""
+        while True:
+            self.pos = self.WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf): return self.buf[self.pos]
+            if self.eof: return None
+            self.fill()
+
+    def expect(self, char):
+        if self.peek() != char: self.fail(f"expected {char!r}")
+        self.pos += 1
+
+    def separator(self, close):
+        char = self.peek()
+        self.pos += 1
+        if char == close: return True
+        if char != ",": self.fail(f"expected ',' or {close!r}")
+        return False
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.scan(self.buf, self.pos)
+            except (ValueError, StopIteration) as e:
+                # Most likely the value runs past the buffer; only an error once the file is exhausted.
+                if self.eof: self.fail(str(e) if isinstance(e, ValueError) else "expected a value")
+                self.fill()
+                continue
+            # A number cut off by the buffer edge still parses, so make sure more digits cannot follow.
+            if end == len(self.buf) and not self.eof:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+    def fail(self, message):
+        raise LexiconError(f"{self.filename} is not a valid lexicon: {message}")
+
+class JsonStore:
+    """
+    The original format: every change rewrites the whole file (now atomically).
+    """
+    PAGE_SIZE = 5000
+
+    def __init__(self, filename=DEFAULT_FILENAME):
+        self.filename = filename
+        self.data = None
+        self.pending = 0
+        # Fingerprint of the file on disk; with pending == 0 it describes self.data too.
+        self.snapshot = None
+
+    def load(self):
+        data, pages = self.open_pages()
+        for category, page in pages:
+            data[category].extend(page)
+        return data
+
+    def open_pages(self, page_size=PAGE_SIZE):
+        """
+        Starts a streaming load. Returns the lexicon dict, empty for now, and an
+        iterator of (category, entries) pages. The caller extends data[category]
+        with each page; once the iterator is exhausted the lexicon is complete.
+        """
+        self.data = empty_lexicon()
+        return self.data, self.read_pages(page_size)
+
+    def read_pages(self, page_size):
+        reader = SnapshotReader(self.filename, pool={})
+        entries = iter(reader)
+        key, entry = next(entries, (None, None))
+        while key is not None:
+            self.data.setdefault(key, [])
+            page_key, page = key, []
+            # One page at a time, so the collector is back on whenever the caller has control.
+            with collector_paused():
+                while key == page_key and len(page) < page_size:
+                    page.append(entry)
+                    key, entry = next(entries, (None, None))
+            yield page_key, page
+        reader.finish(self.data)
+        self.loaded(reader.fingerprint)
+
+    def loaded(self, snapshot):
+        self.snapshot = snapshot
+
+    # The change methods record edits the caller has already made to self.data.
+    def append(self, category, entry):
+        self.record([{"op": "add", "cat": category, "entry": entry}])
+
+    def update(self, category, row, key, value):
+        self.record([{"op": "set", "cat": category, "row": row, "key": key, "value": value}])
+
+    def delete(self, category, rows):
+        self.record([{"op": "del", "cat": category, "rows": sorted(set(rows))}])
+
+    def record(self, ops):
+        """Persists a batch of changes (journal ops) that are already applied to self.data."""
+        self.save_all(self.data)
+
+    def save_all(self, data):
+        self.data = data
+        raw = dump_lexicon(data)
+        write_atomic(self.filename, raw)
+        self.snapshot = fingerprint(raw.encode('utf-8'))
+
+    def compact(self, force=False):
+        pass
+
+    def close(self):
+        pass
+
+class JournalStore(JsonStore):
+    """
+    Keeps the JSON file as a snapshot and appends each change as one line to
+    `<file>.journal`, so a write costs the size of the entry, not the lexicon.
+    Every COMPACT_EVERY changes (and on close) the journal is folded back into
+    the snapshot. The journal's first line names the snapshot it belongs to, so
+    a journal left behind by an interrupted compaction is never replayed twice.
+    """
+    COMPACT_EVERY = 1000
+
+    def __init__(self, filename=DEFAULT_FILENAME, compact_every=None):
+        super().__init__(filename)
+        self.journal_name = filename + ".journal"
+        self.compact_every = compact_every or self.COMPACT_EVERY
+        self.journal = None
+
+    def loaded(self, snapshot):
+        self.snapshot = snapshot
+        self.pending = self.replay(snapshot)
+        self.open_journal(snapshot, keep=self.pending > 0)
+
+    def replay(self, snapshot):
+        if not os.path.exists(self.journal_name): return 0
+        with open(self.journal_name, 'r', encoding='utf-8') as f:
+            lines = f.read().split("\n")
+        if not lines[0]: return 0
+        try:
+            header = json.loads(lines[0])
+        except ValueError as e:
+            raise LexiconError(f"{self.journal_name} has a corrupt header: {e}") from e
+        if header.get("snapshot") != snapshot:
+            # Already folded into the snapshot by a compaction that stopped before resetting the journal.
+            return 0
+        count = 0
+        for n, line in enumerate(lines[1:], start=2):
+            if not line: continue
+            try:
+                op = json.loads(line)
+            except ValueError as e:
+                if n == len(lines):
+                    # Torn final write from a crash: that change never completed, so drop it.
+                    write_atomic(self.journal_name, "\n".join(lines[:-1]) + "\n")
+                    break
+                raise LexiconError(f"{self.journal_name} line {n} is corrupt: {e}") from e
+            apply_change(self.data, op)
+            count += 1
+        return count
+
+    def open_journal(self, snapshot, keep=False):
+        if self.journal: self.journal.close()
+        if not keep:
+            write_atomic(self.journal_name, json.dumps({"snapshot": snapshot}) + "\n")
+        self.journal = open(self.journal_name, 'a', encoding='utf-8', newline='')
+
+    def record(self, ops):
+        if self.journal is None:
+            # A compaction stopped partway, so the journal on disk may not follow the snapshot:
+            # save everything (self.data already holds these ops) as a new snapshot instead.
+            self.compact(force=True)
+            return
+        # One write and one fsync for the whole batch.
+        start = self.journal.tell()
+        try:
+            self.journal.write("".join(json.dumps(op, ensure_ascii=False, default=dict) + "\n" for op in ops))
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+        except BaseException:
+            # The caller retries the whole batch, so none of it may stay behind: a repeated
+            # op (a second "del") would replay to different data, a torn line would not load.
+            self.rewind(start)
+            raise
+        self.pending += len(ops)
+        if self.pending >= self.compact_every:
+            try:
+                self.compact()
+            except OSError:
+                pass    # The batch is saved either way; the next one, or close(), compacts again.
+
+    def rewind(self, size):
+        journal, self.journal = self.journal, None
+        try:
+            # Closing may still flush some of the failed batch; the truncate cuts it off again.
+            journal.close()
+        except OSError:
+            pass
+        try:
+            os.truncate(self.journal_name, size)
+            self.journal = open(self.journal_name, 'a', encoding='utf-8', newline='')
+        except OSError:
+            pass    # self.journal stays None, so the next record() rewrites the snapshot.
+
+    def save_all(self, data):
+        self.data = data
+        self.compact(force=True)
+
+    def compact(self, force=False):
+        if not self.pending and not force: return
+        raw = dump_lexicon(self.data).encode('utf-8')
+        # New journal header first, then the snapshot, then the journal: any crash in
+        # between leaves a snapshot/journal pair that replays to the same lexicon.
+        tmp_journal = self.journal_name + ".next"
+        with open(tmp_journal, 'w', encoding='utf-8', newline='') as f:
+            f.write(json.dumps({"snapshot": fingerprint(raw)}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        write_atomic(self.filename, raw.decode('utf-8'))
+        # The old journal no longer matches the snapshot; if the swap below fails, record() compacts again.
+        if self.journal: self.journal.close()
+        self.journal = None
+        os.replace(tmp_journal, self.journal_name)
+        self.snapshot = fingerprint(raw)
+        self.pending = 0
+        self.journal = open(self.journal_name, 'a', encoding='utf-8', newline='')
+
+    def close(self):
+        self.compact()
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+def apply_change(data, op):
+    entries = data.setdefault(op["cat"], [])
+    kind = op["op"]
+    if kind == "add":
+        entries.append(compact_entry(op["entry"]))
+    elif kind == "set":
+        # A new object rather than an edit in place: a BackgroundWriter's lists share their entries with the caller's.
+        entry = entries[op["row"]]
+        if type(entry) is Entry and op["key"] not in Entry.FIELDS:
+            entry = dict(entry.items())
+        else:
+            entry = entry.copy()
+        entry[op["key"]] = op["value"]
+        entries[op["row"]] = entry
+    elif kind == "del":
+        for row in sorted(op["rows"], reverse=True):
+            del entries[row]
+    else:
+        raise LexiconError(f"unknown journal operation {kind!r}")
+
+class BackgroundWriter:
+    """
+    Runs a store's writes on a worker thread, so the caller never waits on the disk.
+
+    The caller edits its lexicon and reports each change here, just as it would
+    to the store. The worker keeps its own copy of the entry lists, applies the
+    changes to that, and saves each burst (everything queued within COALESCE
+    seconds) with a single store.record(): one journal write and fsync, or one
+    file rewrite for JsonStore. Compaction dumps the worker's copy, so it never
+    sees a row the UI has added or deleted but not yet reported. The entries
+    themselves are shared until apply_change replaces one it edits, so only
+    edited entries are ever held twice; an edit can reach a compaction early,
+    which its journal line then repeats to no effect.
+
+    on_state(dirty, error) is called, from either thread, whenever the saved
+    state changes. close(), which also runs at exit, returns only once every
+    reported change is on disk.
+    """
+    COALESCE = 0.05
+    RETRY = 2.0
+
+    def __init__(self, store, on_state=None):
+        self.store = store
+        self.on_state = on_state
+        self.queue = queue.Queue()
+        self.unsaved = []           # applied to the copy, not yet on disk (retried after a failed write)
+        self.outstanding = 0        # reported changes not yet on disk
+        self.error = None
+        self.done = threading.Condition()
+        self.thread = None
+        self.closed = False
+        # Timed here, not where it is defined: the writer is made after --profile turns recording on.
+        self.record = timed("save.write")(store.record)
+
+    @property
+    def dirty(self):
+        return self.outstanding > 0
+
+    def start(self):
+        """Call once the lexicon is fully loaded and before reporting any change."""
+        # The lists are copied here, so changes the caller makes from now on reach the copy only through the queue.
+        self.store.data = {cat: list(entries) if isinstance(entries, list) else entries
+                           for cat, entries in self.store.data.items()}
+        self.thread = threading.Thread(target=self.run, name="lexicon-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def append(self, category, entry):
+        self.put({"op": "add", "cat": category, "entry": dict(entry)})
+
+    def update(self, category, row, key, value):
+        self.put({"op": "set", "cat": category, "row": row, "key": key, "value": value})
+
+    def delete(self, category, rows):
+        self.put({"op": "del", "cat": category, "rows": sorted(set(rows))})
+
+    def put(self, op):
+        with self.done:
+            self.outstanding += 1
+            became_dirty = self.outstanding == 1
+        self.queue.put(op)
+        if became_dirty: self.notify()
+
+    def notify(self):
+        if self.on_state: self.on_state(self.dirty, str(self.error) if self.error else "")
+
+    def run(self):
+        while True:
+            try:
+                ops, stop = [self.queue.get(timeout=self.RETRY if self.unsaved else None)], False
+            except queue.Empty:
+                self.write([])  # Nothing new, but a failed write is waiting to be retried.
+                continue
+            deadline = time.monotonic() + self.COALESCE
+            while ops[-1] is not None:
+                try:
+                    ops.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if ops[-1] is None:
+                ops.pop()
+                stop = True
+            if ops or self.unsaved: self.write(ops)
+            if stop: return
+
+    def write(self, ops):
+        for op in ops:
+            apply_change(self.store.data, op)
+        self.unsaved += ops
+        try:
+            self.record(self.unsaved)
+        except (OSError, LexiconError) as e:
+            # Keep the changes; the next burst, or close(), tries again.
+            with self.done:
+                self.error = e
+                self.done.notify_all()
+            self.notify()
+            return
+        with self.done:
+            self.outstanding -= len(self.unsaved)
+            self.unsaved, self.error = [], None
+            self.done.notify_all()
+        self.notify()
+
+    def flush(self):
+        """Waits until every reported change is saved. Raises the error if a write failed."""
+        with self.done:
+            while self.outstanding and self.error is None:
+                self.done.wait()
+            if self.error: raise LexiconError(f"could not save {self.store.filename}: {self.error}")
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        atexit.unregister(self.close)
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            if self.unsaved:
+                # Last chance for a write that failed earlier; an error now reaches the caller.
+                self.record(self.unsaved)
+                self.outstanding, self.unsaved = 0, []
+        self.store.close()
+
+STORES = {"json": JsonStore, "journal": JournalStore}
+DEFAULT_STORE = "journal"
+
+def open_store(filename=DEFAULT_FILENAME, backend=DEFAULT_STORE):
+    return STORES[backend](filename)
+
+def load_lexicon(filename=DEFAULT_FILENAME, with_snapshot=False):
+    """
+    Reads a lexicon including any changes still in its journal. With `with_snapshot`
+    returns (data, fingerprint), the fingerprint being None if the journal changed anything.
+    """
+    data, snapshot = read_snapshot(filename)
+    journal = JournalStore(filename)
+    journal.data = data
+    changed = journal.replay(snapshot)
+    if with_snapshot: return data, None if changed else snapshot
+    return data
+
+def iter_entries(filename=DEFAULT_FILENAME):
+    """
+    Yields (category, entry) for every entry in a lexicon. Streams straight from
+    the file when its journal holds no changes; otherwise loads it whole to replay them.
+    """
+    journal = filename + ".journal"
+    if os.path.exists(journal):
+        with open(journal, 'rb') as f:
+            f.readline()
+            changed = bool(f.readline().strip())
+        if changed:
+            for category, entries in load_lexicon(filename).items():
+                if isinstance(entries, list):
+                    for entry in entries:
+                        yield category, entry
+            return
+    yield from SnapshotReader(filename)
+
+def save_lexicon(data, filename=DEFAULT_FILENAME):
+    store = JournalStore(filename)
+    store.save_all(data)
+    store.close()
@@ -0,0 +1,157 @@
+import os
+from collections import OrderedDict
+
+from lexicon import LexiconError, open_store, iter_entries
+from search import SearchIndex
+
+# ==========================================
+#              LEXICON LIBRARY
+# ==========================================
+
+class Lexicon:
+    """
+    One lexicon file in a LexiconLibrary. Nothing is read until load();
+    unload() gets every change onto disk and lets the entries go.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.name = os.path.splitext(os.path.basename(filename))[0]
+        self.store = None
+        self.data = None
+
+    @property
+    def loaded(self):
+        return self.data is not None
+
+    @property
+    def busy(self):
+        """True while the lexicon must not be unloaded."""
+        return False
+
+    def load(self):
+        self.store = open_store(self.filename)
+        self.data = self.store.load()
+
+    def unload(self):
+        self.store.close()
+        self.store = self.data = None
+
+    def entries(self):
+        """(category, entry) pairs: from memory when loaded, else streamed from the file."""
+        if not self.loaded: return iter_entries(self.filename)
+        return ((category, entry) for category, entries in self.data.items()
+                if isinstance(entries, list) for entry in entries)
+
+class LexiconLibrary:
+    """
+    Many lexicon files side by side, each loaded on first use. At most
+    `capacity` stay loaded: using another one unloads (saving it first) the
+    one used longest ago. Busy lexicons are skipped, and so is any whose
+    unload fails; that one stays loaded and is tried again next time.
+
+    `factory(filename)` makes the Lexicon objects, so the window can add its
+    own per-lexicon state.
+    """
+    CAPACITY = 4
+
+    def __init__(self, filenames=(), capacity=CAPACITY, factory=Lexicon):
+        self.capacity = capacity
+        self.factory = factory
+        self.lexicons = {}              # path -> Lexicon, in the order they were added
+        self.recent = OrderedDict()     # paths of loaded lexicons, least recently used first
+        for filename in filenames:
+            self.add(filename)
+
+    def __iter__(self):
+        return iter(self.lexicons.values())
+
+    def __len__(self):
+        return len(self.lexicons)
+
+    def add(self, filename):
+        key = os.path.abspath(filename)
+        if key not in self.lexicons: self.lexicons[key] = self.factory(filename)
+        return self.lexicons[key]
+
+    def discard(self, filename):
+        """Forgets a lexicon without unloading it (for one that failed to load)."""
+        key = os.path.abspath(filename)
+        self.lexicons.pop(key, None)
+        self.recent.pop(key, None)
+
+    def get(self, filename):
+        """The lexicon, loaded, as the most recently used."""
+        lexicon = self.add(filename)
+        key = os.path.abspath(filename)
+        if not lexicon.loaded: lexicon.load()
+        self.recent[key] = True
+        self.recent.move_to_end(key)
+        self.evict(keep=lexicon)
+        return lexicon
+
+    def evict(self, keep=None):
+        for key in list(self.recent):
+            if len(self.recent) <= self.capacity: return
+            lexicon = self.lexicons[key]
+            if lexicon is keep or lexicon.busy: continue
+            try:
+                lexicon.unload()
+            except (OSError, LexiconError):
+                continue
+            del self.recent[key]
+
+    def close(self):
+        """Unloads everything. Raises the first failure, after trying every lexicon."""
+        failure = None
+        for key in list(self.recent):
+            try:
+                self.lexicons[key].unload()
+                del self.recent[key]
+            except (OSError, LexiconError) as e:
+                failure = failure or e
+        if failure: raise failure
+
+    # --- Across lexicons ---
+
+    def search(self, query, mode="substring", limit=None):
+        """
+        Yields (lexicon, category, entry) for entries matching `query` in any
+        lexicon: "exact" compares the Lore word, "substring" looks in every field.
+        Loaded lexicons are searched in memory; the rest are streamed from disk
+        without being loaded.
+        """
+        if not query: return
+        folded = query.lower()
+        found = 0
+        for lexicon in self:
+            for category, entry in lexicon.entries():
+                if mode == "exact":
+                    if entry.get('conlang', '') != query: continue
+                elif folded not in SearchIndex.text(entry):
+                    continue
+                yield lexicon, category, entry
+                found += 1
+                if limit is not None and found >= limit: return
+
+    def duplicates(self):
+        """
+        {Lore word: [(lexicon, category, entry), ...]} for every word saved in
+        more than one lexicon. Two streaming passes, so only the words themselves
+        are held, never a second copy of the lexicons.
+        """
+        first = {}      # word -> index of the first lexicon holding it, or -1 once a second one does
+        lexicons = list(self)
+        for i, lexicon in enumerate(lexicons):
+            for _, entry in lexicon.entries():
+                word = entry.get('conlang', '')
+                seen = first.setdefault(word, i)
+                if seen != i and seen != -1: first[word] = -1
+        shared = {word for word, i in first.items() if i == -1}
+        del first
+        found = {}
+        for lexicon in lexicons:
+            for category, entry in lexicon.entries():
+                word = entry.get('conlang', '')
+                if word in shared: found.setdefault(word, []).append((lexicon, category, entry))
+        return found
@@ -0,0 +1,164 @@
+from functools import lru_cache
+
+# ==========================================
+#        MASTER CHARACTER DEFINITIONS
+# ==========================================
+# Change characters here, and they update everywhere.
+
+class LORE:
+    # --- VOWELS ---
+    # Short
+    A_SHORT = 'a'
+    E_SHORT = 'э'
+    I_SHORT = 'ɪ'
+    O_SHORT = 'o'
+    U_SHORT = 'h'
+    
+    # Long (Shifted)
+    A_LONG = 'ʌ'
+    E_LONG = 'и'
+    I_LONG = 'ꭅ'
+    O_LONG = 'ꟻ'
+    U_LONG = 'ю'
+    
+    # Compounds (Alt)
+    YA = 'я'
+    YE = 'e'
+    YO = 'ᴇ'
+    OO = 'У'
+    OE = 'ɶ'
+
+    # --- CONSONANTS ---
+    Q = 'q'
+    P = 'p'
+    T = 'ᴛ'
+    B = 'b'
+    P_CYR = 'п'
+    C = 'c'
+    D_CYR = 'д'
+    V = 'v'
+    G_CYR = 'г'
+    X = 'x'
+    D = 'd'
+    K_SMALL = 'ᴋ'
+    L_CYR = 'Ԓ' 
+    Z = 'z'
+    B_SMALL = 'ʙ'
+    B_CYR = 'Б'
+    N_SMALL = 'ʜ'
+    M_SMALL = 'ᴍ'
+    
+    # Compounds
+    ZH = 'ж'
+    TS = 'ц'
+    CH = 'ч'
+    SH = 'ш'
+    SK = 'ϣ'
+    TH = 'Ұ'
+    DH = 'њ'
+    NG = 'Ꙗ'
+    ST = 'ʒ'
+
+# ==========================================
+#           LORE CONFIGURATION
+# ==========================================
+
+VOWELS = [
+    LORE.A_SHORT, LORE.E_SHORT, LORE.I_SHORT, LORE.O_SHORT, LORE.U_SHORT, 
+    LORE.A_LONG, LORE.E_LONG, LORE.I_LONG, LORE.O_LONG, LORE.U_LONG, 
+    LORE.YA, LORE.YE, LORE.YO, LORE.OO, LORE.OE
+]
+
+CONSONANTS = [
+    LORE.Q, LORE.P, LORE.T, LORE.B, LORE.P_CYR, LORE.C, LORE.D_CYR, LORE.V, LORE.G_CYR, 
+    LORE.X, LORE.D, LORE.K_SMALL, LORE.L_CYR, LORE.Z, LORE.B_SMALL, LORE.B_CYR, LORE.N_SMALL, LORE.M_SMALL, 
+    LORE.ZH, LORE.TS, LORE.CH, LORE.SH, LORE.SK, LORE.TH, LORE.DH, LORE.NG, LORE.ST
+]
+
+# --- VISUAL TWEAKS ---
+
+# 1. TABLE/INPUT CORRECTIONS (Base font ~14pt)
+TABLE_SIZE_CORRECTIONS = {
+    LORE.O_LONG: "10.5pt", 
+    LORE.OO:     "10.5pt", 
+    LORE.B_CYR:  "10.5pt", 
+    LORE.TH:     "10.5pt", 
+    LORE.NG:     "10.5pt", 
+    LORE.L_CYR:  "10.5pt",
+}
+
+# 2. HEADER CORRECTIONS (Base font ~32px/24pt)
+HEADER_SIZE_CORRECTIONS = {
+    LORE.O_LONG: "17pt", 
+    LORE.OO:     "17.5pt",
+    LORE.B_CYR:  "17pt", 
+    LORE.TH:     "17pt", 
+    LORE.NG:     "17pt", 
+    LORE.L_CYR:  "17pt",
+}
+
+# Keyboard Layout (Visual Mapping)
+KEYBOARD_LAYOUT = [
+    [('w', LORE.Q), ('e', LORE.E_SHORT), ('r', LORE.P), ('t', LORE.T), ('y', LORE.B), ('u', LORE.U_SHORT), ('i', LORE.I_SHORT), ('o', LORE.O_SHORT), ('p', LORE.P_CYR)],
+    [('a', LORE.A_SHORT), ('s', LORE.C), ('d', LORE.D_CYR), ('f', LORE.V), ('g', LORE.G_CYR), ('h', LORE.X), ('j', LORE.D), ('k', LORE.K_SMALL), ('l', LORE.L_CYR)],
+    [('z', LORE.Z), ('v', LORE.B_SMALL), ('b', LORE.B_CYR), ('n', LORE.N_SMALL), ('m', LORE.M_SMALL)]
+]
+
+
+# SHIFT: Single Character replacements (Long Vowels)
+LONG_VOWEL_MAP = {
+    "a": LORE.A_LONG, 
+    "e": LORE.E_LONG, 
+    "i": LORE.I_LONG, 
+    "o": LORE.O_LONG, 
+    "u": LORE.U_LONG
+}
+
+# ALT: Compound Character replacements
+COMBO_MAP = {
+    # Vowel Compounds
+    "ya": LORE.YA, "ye": LORE.YE, "yo": LORE.YO, "oo": LORE.OO, "oe": LORE.OE,
+    # Consonant Compounds
+    "ts": LORE.TS, "zh": LORE.ZH, "sh": LORE.SH, "kh": LORE.CH, 
+    "sk": LORE.SK, "st": LORE.ST, "th": LORE.TH, "dh": LORE.DH, "ng": LORE.NG
+}
+
+DISABLED_KEYS = ['q', 'x', 'c']
+
+# ==========================================
+#              RICH TEXT
+# ==========================================
+
+# Each corrected glyph maps straight to its finished span. Only a handful of glyphs need
+# correcting, so a few C-level str.replace passes beat any per-character loop.
+def compile_visual_mode(corrections, base_size):
+    spans = tuple((char, f"<span style='font-size:{scale};'>{char}</span>") for char, scale in corrections.items())
+    return spans, f"<span style='font-size:{base_size};'>", "</span>"
+
+VISUAL_MODES = {
+    'table':  compile_visual_mode(TABLE_SIZE_CORRECTIONS, "14pt"),
+    'header': compile_visual_mode(HEADER_SIZE_CORRECTIONS, "32px"),
+}
+
+@lru_cache(maxsize=65536)
+def apply_visual_fixes(text, mode='table'):
+    if not text: return ""
+    spans, head, tail = VISUAL_MODES['header' if mode == 'header' else 'table']
+    for char, span in spans:
+        if char in text:
+            text = text.replace(char, span)
+    return head + text + tail
+
+def apply_visual_fixes_batch(texts, mode='table'):
+    """apply_visual_fixes for a whole list at once, as a handful of passes over one joined string."""
+    texts = list(texts)
+    if not texts: return []
+    spans, head, tail = VISUAL_MODES['header' if mode == 'header' else 'table']
+    # The spans are plain ASCII, so the NUL separators survive every pass.
+    joined = "\0".join(texts)
+    for char, span in spans:
+        joined = joined.replace(char, span)
+    rendered = (head + joined.replace("\0", tail + "\0" + head) + tail).split("\0")
+    if "" in texts:
+        rendered = [html if text else "" for html, text in zip(rendered, texts)]
+    return rendered
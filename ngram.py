@@ -0,0 +1,227 @@
+import json
+import random
+from collections import Counter
+from array import array
+
+from lexicon import write_atomic
+
+# ==========================================
+#            N-GRAM GENERATOR
+# ==========================================
+
+ORDER = 3
+CACHE_SUFFIX = ".ngram"
+
+class NgramModel:
+    """
+    Glyph n-gram model of the saved Lore words, for generating new words that
+    sound like them.
+
+    Glyphs are numbered as they are first seen; 0 marks the start and end of a
+    word. The previous order-1 glyph IDs are packed into one int, which keys two
+    parallel arrays: the IDs seen next and how often. Phrases are split into
+    words. Sampling uses an alias table per context (Vose), built the first time
+    that context is drawn from and dropped whenever add() or remove() changes it,
+    so each glyph costs one random number and two array lookups.
+
+    save()/load() keep the model beside the lexicon, tagged with the snapshot
+    fingerprint it was trained on, so an unchanged lexicon is never retrained.
+    """
+    BOUNDARY = 0
+    BITS = 16
+    MAX_ATTEMPTS = 200
+
+    def __init__(self, order=ORDER):
+        if order < 2: raise ValueError("an n-gram model needs an order of at least 2")
+        self.order = order
+        self.span = 1 << (self.BITS * (order - 1))   # contexts are kept modulo this
+        self.glyphs = [""]
+        self.ids = {}
+        self.nexts = {}     # context -> array('H') of following glyph IDs
+        self.counts = {}    # context -> array('I') of their counts
+        self.tables = {}    # context -> (array('d') probabilities, array('H') aliases)
+        self.words = 0
+
+    def glyph_id(self, glyph):
+        gid = self.ids.get(glyph)
+        if gid is None:
+            gid = self.ids[glyph] = len(self.glyphs)
+            self.glyphs.append(glyph)
+        return gid
+
+    # --- Training ---
+
+    def train(self, words):
+        """Adds every word of every entry in `words` (conlang strings)."""
+        # Counting n-gram substrings is done in C; only the few thousand distinct ones get folded in.
+        n, pad = self.order, "\0" * (self.order - 1)
+        grams, total = Counter(), 0
+        for text in words:
+            for word in text.split():
+                padded = pad + word + "\0"
+                grams.update([padded[i:i + n] for i in range(len(word) + 1)])
+                total += 1
+        for gram, count in grams.items():
+            key = 0
+            for glyph in gram[:-1]:
+                key = ((key << self.BITS) | (self.glyph_id(glyph) if glyph != "\0" else self.BOUNDARY)) % self.span
+            self.bump(key, self.glyph_id(gram[-1]) if gram[-1] != "\0" else self.BOUNDARY, count)
+        self.words += total
+        return self
+
+    def add(self, word, weight=1):
+        """Counts one word (weight=-1 takes it back out). Returns False if there was nothing to remove."""
+        if not word: return False
+        if weight < 0 and not self.contains(word): return False
+        key, span, bits = 0, self.span, self.BITS
+        for gid in [self.glyph_id(glyph) for glyph in word] + [self.BOUNDARY]:
+            self.bump(key, gid, weight)
+            key = ((key << bits) | gid) % span
+        self.words += weight
+        return True
+
+    def remove(self, word):
+        return self.add(word, -1)
+
+    def contains(self, word):
+        """True if every transition of `word` has a count, i.e. it can be removed."""
+        key = 0
+        for glyph in list(word) + [None]:
+            gid = self.BOUNDARY if glyph is None else self.ids.get(glyph)
+            nexts = self.nexts.get(key)
+            if gid is None or nexts is None or gid not in nexts: return False
+            key = ((key << self.BITS) | gid) % self.span
+        return True
+
+    def bump(self, key, gid, weight):
+        nexts = self.nexts.get(key)
+        if nexts is None:
+            nexts = self.nexts[key] = array('H')
+            self.counts[key] = array('I')
+        self.tables.pop(key, None)
+        try:
+            i = nexts.index(gid)
+        except ValueError:
+            nexts.append(gid)
+            self.counts[key].append(weight)
+            return
+        count = self.counts[key][i] + weight
+        if count > 0:
+            self.counts[key][i] = count
+        else:
+            del nexts[i]
+            del self.counts[key][i]
+            if not nexts:
+                del self.nexts[key]
+                del self.counts[key]
+
+    # --- Sampling ---
+
+    def table(self, key):
+        table = self.tables.get(key)
+        if table is None:
+            table = self.tables[key] = alias_table(self.counts[key])
+        return table
+
+    def sample(self, max_length=12, rand=random.random):
+        """One word straight from the model, or None if it ran past max_length."""
+        out, key, span, bits = [], 0, self.span, self.BITS
+        glyphs, nexts_of = self.glyphs, self.nexts
+        while len(out) <= max_length:
+            nexts = nexts_of.get(key)
+            if nexts is None: return None
+            prob, alias = self.table(key)
+            u = rand() * len(nexts)
+            i = int(u)
+            gid = nexts[i] if u - i < prob[i] else nexts[alias[i]]
+            if gid == self.BOUNDARY: return "".join(out)
+            out.append(glyphs[gid])
+            key = ((key << bits) | gid) % span
+        return None
+
+    def generate(self, min_length=2, max_length=12, seen=None, attempts=MAX_ATTEMPTS, rand=random.random):
+        """
+        A word of min_length..max_length glyphs. With `seen` (a SeenWords), words
+        already taken are skipped and the result is recorded there, as in
+        WordGenerator.generate_unique_word. Returns None if `attempts` samples all missed.
+        """
+        if not self.words: return None
+        for _ in range(attempts):
+            word = self.sample(max_length, rand)
+            if word is None or len(word) < min_length: continue
+            if seen is not None and not seen.add_new([word])[0]: continue
+            return word
+        return None
+
+    # --- Cache ---
+
+    def save(self, filename, snapshot):
+        keys = sorted(self.nexts)
+        flat_nexts, flat_counts = array('H'), array('I')
+        for key in keys:
+            flat_nexts += self.nexts[key]
+            flat_counts += self.counts[key]
+        state = {"snapshot": snapshot, "order": self.order, "words": self.words, "glyphs": self.glyphs[1:],
+                 "contexts": keys, "sizes": [len(self.nexts[key]) for key in keys],
+                 "nexts": flat_nexts.tolist(), "counts": flat_counts.tolist()}
+        write_atomic(filename, json.dumps(state, ensure_ascii=False, separators=(",", ":")))
+
+    @classmethod
+    def load(cls, filename, snapshot, order=ORDER):
+        """The cached model, or None if there is none for this snapshot and order."""
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            # Only a cache: anything unreadable is simply retrained.
+            return None
+        if not isinstance(state, dict) or state.get("snapshot") != snapshot or state.get("order") != order: return None
+        model = cls(order)
+        for glyph in state["glyphs"]:
+            model.glyph_id(glyph)
+        model.words = state["words"]
+        nexts, counts, start = state["nexts"], state["counts"], 0
+        for key, size in zip(state["contexts"], state["sizes"]):
+            model.nexts[key] = array('H', nexts[start:start + size])
+            model.counts[key] = array('I', counts[start:start + size])
+            start += size
+        return model
+
+def alias_table(counts):
+    """Vose's alias method: column i keeps its own ID with probability prob[i], else takes alias[i]."""
+    n, total = len(counts), sum(counts)
+    prob = [count * n / total for count in counts]
+    alias = [0] * n
+    small = [i for i, p in enumerate(prob) if p < 1.0]
+    large = [i for i, p in enumerate(prob) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        alias[s] = l
+        prob[l] -= 1.0 - prob[s]
+        (small if prob[l] < 1.0 else large).append(l)
+    for i in small + large:
+        prob[i] = 1.0
+    return array('d', prob), array('H', alias)
+
+def lexicon_words(data):
+    return (e.get('conlang', '') for entries in data.values() if isinstance(entries, list) for e in entries)
+
+def cache_path(filename):
+    return filename + CACHE_SUFFIX
+
+def load_or_train(filename, data, snapshot=None, order=ORDER):
+    """
+    The model for the lexicon `filename`, whose entries are `data`. `snapshot` is
+    the store's fingerprint when data matches the file exactly (store.pending == 0);
+    with it the cache beside the file is used, or written after training.
+    """
+    cache = cache_path(filename)
+    model = NgramModel.load(cache, snapshot, order) if snapshot else None
+    if model is None:
+        model = NgramModel(order).train(lexicon_words(data))
+        if snapshot:
+            try:
+                model.save(cache, snapshot)
+            except OSError:
+                pass  # Retrained next time instead.
+    return model
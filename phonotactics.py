@@ -0,0 +1,210 @@
+import os
+import json
+import random
+from bisect import bisect
+from itertools import accumulate
+
+from lore import LORE
+
+# ==========================================
+#              PHONOTACTICS
+# ==========================================
+
+# Lives beside the program and future_lang.json rather than in the working directory.
+PHONOTACTICS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "phonotactics.json")
+
+class PhonotacticsError(Exception):
+    """Raised when the phonotactics file is missing something or names an unknown glyph."""
+
+class Phonotactics:
+    """
+    Syllable structures and adjacency rules, compiled once into lookup tables so
+    that every draw is a single random number: no retry loops, no list copies.
+
+    - classes:    named sets of LORE glyphs (S, L, C), plus unions of them (V)
+    - structures: weighted syllable shapes, each a sequence of slot classes;
+                  a shape with several `variants` splits its weight evenly
+    - no_repeats: a glyph never directly follows itself
+    - forbid:     [before, after] class pairs that may not sit side by side
+    - rewrites:   after a glyph of class `after`, a drawn `replace` structure
+                  becomes one of `with`, chosen evenly
+
+    Compiled, every rule becomes a table keyed by the previous glyph:
+    `structures[context[prev]]` holds cumulative weights with the rewrites
+    folded in, and `candidates[slot][prev]` holds the glyphs allowed in that slot.
+    Glyphs are numbered in class order; `start` is the "no previous glyph" key.
+    """
+
+    def __init__(self, spec, source="phonotactics"):
+        self.source = source
+        try:
+            self.compile(spec)
+        except (KeyError, TypeError, ValueError, ZeroDivisionError) as e:
+            raise PhonotacticsError(f"{source} is not valid: {e!r}") from e
+
+    def compile(self, spec):
+        members = {}
+        self.glyphs = []
+        for name, glyph_names in spec["classes"].items():
+            glyphs = []
+            for glyph_name in glyph_names:
+                glyph = getattr(LORE, glyph_name, None)
+                if not isinstance(glyph, str): raise ValueError(f"unknown glyph {glyph_name!r} in class {name!r}")
+                if glyph not in self.glyphs: self.glyphs.append(glyph)
+                glyphs.append(self.glyphs.index(glyph))
+            members[name] = glyphs
+        for name, parts in spec.get("unions", {}).items():
+            members[name] = [g for part in parts for g in members[part]]
+
+        self.start = len(self.glyphs)
+        contexts = range(self.start + 1)
+        self.class_names = list(members)
+        self.class_of = {name: i for i, name in enumerate(self.class_names)}
+
+        no_repeats = spec.get("no_repeats", False)
+        forbidden = set()
+        for before, after in spec.get("forbid", []):
+            forbidden.update((a, b) for a in members[before] for b in members[after])
+
+        def candidates(glyphs, prev):
+            allowed = tuple(g for g in glyphs if not (no_repeats and g == prev) and (prev, g) not in forbidden)
+            # Rules that rule out a whole class fall back to the class, as the old retry loops did.
+            return allowed or tuple(glyphs)
+
+        self.candidates = [[candidates(members[name], prev) for prev in contexts] for name in self.class_names]
+
+        self.names = list(spec["structures"])
+        self.weights = [spec["structures"][name]["weight"] for name in self.names]
+        self.entries = []   # (structure index, slot class indexes)
+        variants_of = {}
+        for s, name in enumerate(self.names):
+            structure = spec["structures"][name]
+            variants = structure.get("variants") or [structure["slots"]]
+            variants_of[name] = [len(self.entries) + v for v in range(len(variants))]
+            self.entries.extend((s, tuple(self.class_of[slot] for slot in slots)) for slots in variants)
+        self.width = max(len(slots) for _, slots in self.entries)
+
+        rewrites = spec.get("rewrites", [])
+        tables, self.context = {}, []
+        for prev in contexts:
+            weights = dict(zip(self.names, self.weights))
+            for rule in rewrites:
+                if prev == self.start or prev not in members[rule["after"]]: continue
+                moved = sum(weights[name] for name in rule["replace"])
+                for name in rule["replace"]:
+                    weights[name] = 0
+                for name in rule["with"]:
+                    weights[name] += moved / len(rule["with"])
+            entry_weights = [0] * len(self.entries)
+            for name, weight in weights.items():
+                for e in variants_of[name]:
+                    entry_weights[e] = weight / len(variants_of[name])
+            key = tuple(entry_weights)
+            if key not in tables:
+                used = [e for e, w in enumerate(entry_weights) if w > 0]
+                cum = list(accumulate(entry_weights[e] for e in used))
+                tables[key] = (len(tables), tuple(used), cum, cum[-1])
+            self.context.append(tables[key][0])
+        self.structures = [table[1:] for table in tables.values()]
+        self.arrays = None
+
+    # --- One word at a time ---
+
+    def sample_word(self, syllables, rand=random.random, choice=random.choice):
+        """Returns (word, structure) for a word of exactly `syllables` syllables."""
+        word, names, prev = [], [], self.start
+        entries, candidates = self.entries, self.candidates
+        for _ in range(syllables):
+            used, cum, total = self.structures[self.context[prev]]
+            s, slots = entries[used[bisect(cum, rand() * total)]]
+            names.append(self.names[s])
+            for slot in slots:
+                prev = choice(candidates[slot][prev])
+                word.append(prev)
+        glyphs = self.glyphs
+        return "".join([glyphs[g] for g in word]), "-".join(names)
+
+    # --- Whole arrays at once ---
+
+    def compile_arrays(self, np):
+        if self.arrays is not None: return self.arrays
+        # candidates[slot class, previous glyph, k], padded, with the count of real entries beside it.
+        widest = max(len(allowed) for rows in self.candidates for allowed in rows)
+        candidates = np.zeros((len(self.candidates), self.start + 1, widest), dtype=np.int16)
+        counts = np.zeros(candidates.shape[:2], dtype=np.int64)
+        for c, rows in enumerate(self.candidates):
+            for prev, allowed in enumerate(rows):
+                candidates[c, prev, :len(allowed)] = allowed
+                counts[c, prev] = len(allowed)
+        # Entry slots as a matrix, -1 past the end of shorter entries.
+        slots = np.full((len(self.entries), self.width), -1, dtype=np.intp)
+        for e, (_, entry_slots) in enumerate(self.entries):
+            slots[e, :len(entry_slots)] = entry_slots
+        structures = [(np.array(used), np.array(cum), total) for used, cum, total in self.structures]
+        self.arrays = (np.array(self.context), structures, candidates, counts, slots,
+                       np.array([s for s, _ in self.entries]))
+        return self.arrays
+
+    def sample_batch(self, np, rng, size, min_syllables, max_syllables):
+        """Returns (words, structures) lists for `size` words, drawn from `rng`."""
+        context, structures, candidates, counts, slots, structure_of = self.compile_arrays(np)
+
+        lengths = rng.integers(min_syllables, max_syllables + 1, size=size)
+        ids = np.full((size, max_syllables * self.width), -1, dtype=np.int16)
+        pos = np.zeros(size, dtype=np.intp)
+        # Structure number + 1 of each syllable, 0 past the end of the word.
+        syllables = np.zeros((size, max_syllables), dtype=np.int16)
+
+        for j in range(max_syllables):
+            rows = np.nonzero(lengths > j)[0]
+            if not len(rows): break
+            p = pos[rows]
+            prev = np.where(p > 0, ids[rows, p - 1], self.start)
+
+            ctx = context[prev]
+            entry = np.empty(len(rows), dtype=np.intp)
+            for c, (used, cum, total) in enumerate(structures):
+                sel = ctx == c
+                k = int(sel.sum())
+                if k: entry[sel] = used[np.searchsorted(cum, rng.random(k) * total, side='right')]
+            syllables[rows, j] = structure_of[entry] + 1
+
+            # Slot by slot across every row at once; each glyph is the next slot's context.
+            for offset in range(self.width):
+                slot = slots[entry, offset]
+                live = slot >= 0
+                if not live.all():
+                    rows, p, prev, slot = rows[live], p[live], prev[live], slot[live]
+                    entry = entry[live]
+                if not len(rows): break
+                # floor(u * n) < n for any u in [0, 1), so this is an even draw over the real entries.
+                pick = (rng.random(len(rows)) * counts[slot, prev]).astype(np.intp)
+                prev = candidates[slot, prev, pick]
+                ids[rows, p + offset] = prev
+                pos[rows] = p + offset + 1
+
+        # Glyph IDs -> code points; the -1 padding maps to NUL, which NumPy strips from str arrays.
+        table = np.array([ord(g) for g in self.glyphs] + [0], dtype=np.uint32)
+        words = np.ascontiguousarray(table[ids]).view(f'<U{ids.shape[1]}').ravel()
+
+        # Only a few hundred structure sequences exist, so build each string once.
+        base = len(self.names) + 1
+        if base ** max_syllables <= np.iinfo(np.int64).max:
+            # One int64 per word sorts far faster than rows, while the digits still fit.
+            codes = syllables.astype(np.int64) @ (base ** np.arange(max_syllables - 1, -1, -1, dtype=np.int64))
+            _, first, inverse = np.unique(codes, return_index=True, return_inverse=True)
+            unique_rows = syllables[first]
+        else:
+            unique_rows, inverse = np.unique(syllables, axis=0, return_inverse=True)
+        names = self.names
+        labels = ["-".join([names[s - 1] for s in row if s]) for row in unique_rows.tolist()]
+        labels = np.array(labels, dtype=object)[inverse.ravel()]
+        return words.tolist(), labels.tolist()
+
+def load_phonotactics(filename=PHONOTACTICS_FILE):
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PhonotacticsError(f"cannot read {filename}: {e}") from e
+    return Phonotactics(spec, filename)
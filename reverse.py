@@ -0,0 +1,213 @@
+import json
+from array import array
+from functools import lru_cache
+from itertools import count
+
+from lexicon import write_atomic
+from search import LexiconIndex, TOKEN_RE
+
+# ==========================================
+#       REVERSE DICTIONARY AND ROOTS
+# ==========================================
+
+CACHE_SUFFIX = ".index"
+REVERSE_MODES = ["meaning", "root", "descendants"]
+
+# Words too common to say anything about a meaning or a root.
+MEANING_STOPWORDS = frozenset("a an the to of be".split())
+ROOT_STOPWORDS = frozenset("a an the to of and or in with from root roots".split())
+
+class ReverseIndex(LexiconIndex):
+    """
+    Inverted indexes over the English definitions and the etymology notes:
+
+    - meaning:     entries whose definition has every word of the query ("which words mean X")
+    - root:        entries whose notes name the root ("which words derive from Y")
+    - descendants: those entries, then every entry whose notes name one of their
+                   Lore words, and so on down
+
+    Any word of the notes except a few little ones ("from", "the", "root") counts
+    as a root reference, so a root can be named by its Lore word or its gloss
+    ("root: sky"). Descendants only follow Lore words.
+
+    Postings are kept like SearchIndex's (a bare doc, or an array of docs once a
+    second arrives, with removed entries left as tombstones), and the
+    LexiconIndex hooks keep it in step with the lexicon.
+    save()/load() keep it beside the lexicon, tagged with the snapshot fingerprint,
+    so an unchanged lexicon is never reindexed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # No tuple per doc: a million of them cost more to allocate than the rest of load() together.
+        self.docs = []          # doc -> entry, or None once removed
+        self.doc_category = array('B')  # doc -> position in self.categories
+        self.categories = []
+        self.doc_of = {}        # id(entry) -> doc
+        self.meanings = {}      # definition word -> doc or array of docs
+        self.roots = {}         # notes word -> doc or array of docs
+
+    def add(self, category, entry):
+        doc = len(self.docs)
+        self.docs.append(entry)
+        self.doc_category.append(self.category_number(category))
+        self.doc_of[id(entry)] = doc
+        self.live += 1
+        post(self.meanings, meaning_terms(entry.get('english', '')), doc)
+        post(self.roots, root_terms(entry.get('notes', '')), doc)
+
+    def remove(self, entry):
+        doc = self.doc_of.pop(id(entry), None)
+        if doc is None: return None
+        self.docs[doc] = None
+        self.live -= 1
+        return self.categories[self.doc_category[doc]]
+
+    def category_number(self, category):
+        if category not in self.categories: self.categories.append(category)
+        return self.categories.index(category)
+
+    # --- Queries ---
+
+    def search(self, query, mode="meaning", limit=LexiconIndex.LIMIT):
+        """Returns up to `limit` (category, entry) pairs, oldest first."""
+        if mode == "meaning":
+            docs = self.meaning_docs(query)
+        elif mode == "root":
+            docs = self.root_docs(query.lower().split())
+        elif mode == "descendants":
+            docs = self.descendant_docs(query)
+        else:
+            raise ValueError(f"unknown reverse search mode {mode!r}")
+        return [self.hit(doc) for doc in sorted(docs)[:limit]]
+
+    def defined_as(self, query, limit=LexiconIndex.LIMIT):
+        """(category, entry) pairs whose whole definition is `query`, ignoring case."""
+        folded = query.strip().lower()
+        docs = sorted(doc for doc in self.meaning_docs(query) if self.docs[doc].get('english', '').lower() == folded)
+        return [self.hit(doc) for doc in docs[:limit]]
+
+    def hit(self, doc):
+        return self.categories[self.doc_category[doc]], self.docs[doc]
+
+    def meaning_docs(self, query):
+        terms = meaning_terms(query)
+        if not terms: return set()
+        rarest = min(terms, key=lambda t: postings_size(self.meanings.get(t)))
+        found = self.live_docs(self.meanings.get(rarest))
+        if len(terms) == 1: return found
+        # Re-reading the few candidates' definitions beats building a set from every other term's postings.
+        return {doc for doc in found if terms <= meaning_terms(self.docs[doc].get('english', ''))}
+
+    def root_docs(self, roots):
+        found = set()
+        for root in roots:
+            found |= self.live_docs(self.roots.get(root))
+        return found
+
+    def descendant_docs(self, root):
+        """Breadth first, so each entry is reached once even if the notes loop back."""
+        found, seen, roots = set(), set(), set(root.lower().split())
+        while roots:
+            seen.update(roots)
+            docs = self.root_docs(roots) - found
+            found |= docs
+            roots = {word for doc in docs for word in self.docs[doc].get('conlang', '').lower().split()} - seen
+        return found
+
+    def live_docs(self, docs):
+        if docs is None: return set()
+        return {d for d in ((docs,) if type(docs) is int else docs) if self.docs[d] is not None}
+
+    # --- Cache ---
+
+    def save(self, filename, snapshot, data):
+        """Writes the index of `data`, which must match the lexicon file at `snapshot`."""
+        # Docs are renumbered in lexicon order, so load() can rebuild them from the entries alone.
+        number, counts = {}, {}
+        for category, entries in data.items():
+            if not isinstance(entries, list): continue
+            counts[category] = len(entries)
+            for entry in entries:
+                number[id(entry)] = len(number)
+        renumber = [number.get(id(entry)) if entry is not None else None for entry in self.docs]
+        state = {"snapshot": snapshot, "counts": counts}
+        for name in ("meanings", "roots"):
+            terms, sizes, flat = [], [], array('I')
+            for term, docs in getattr(self, name).items():
+                docs = [renumber[d] for d in ((docs,) if type(docs) is int else docs) if renumber[d] is not None]
+                if not docs: continue
+                terms.append(term)
+                sizes.append(len(docs))
+                flat.extend(docs)
+            state[name] = {"terms": terms, "sizes": sizes, "docs": flat.tolist()}
+        write_atomic(filename, json.dumps(state, ensure_ascii=False, separators=(",", ":")))
+
+    @classmethod
+    def load(cls, filename, snapshot, data):
+        """The cached index of `data`, or None if there is none for this snapshot."""
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            # Only a cache: anything unreadable is simply rebuilt.
+            return None
+        if not isinstance(state, dict) or state.get("snapshot") != snapshot: return None
+        counts = {category: len(entries) for category, entries in data.items() if isinstance(entries, list)}
+        if state.get("counts") != counts: return None
+        index = cls()
+        for category, entries in data.items():
+            if not isinstance(entries, list): continue
+            index.doc_of.update(zip(map(id, entries), count(len(index.docs))))
+            index.docs += entries
+            index.doc_category += array('B', [index.category_number(category)]) * len(entries)
+        index.live = len(index.docs)
+        index.cursor = counts
+        for name in ("meanings", "roots"):
+            postings, saved, start = getattr(index, name), state[name], 0
+            for term, size in zip(saved["terms"], saved["sizes"]):
+                postings[term] = saved["docs"][start] if size == 1 else array('I', saved["docs"][start:start + size])
+                start += size
+        return index
+
+def post(postings, terms, doc):
+    for term in terms:
+        docs = postings.get(term)
+        if docs is None:
+            postings[term] = doc
+        elif type(docs) is int:
+            postings[term] = array('I', (docs, doc))
+        else:
+            docs.append(doc)
+
+def postings_size(docs):
+    return 0 if docs is None else 1 if type(docs) is int else len(docs)
+
+def meaning_terms(text):
+    return set(TOKEN_RE.findall(text.lower())) - MEANING_STOPWORDS
+
+@lru_cache(maxsize=4096)
+def root_terms(text):
+    # Notes repeat a lot ("borrowed", "root: sky"), so most calls are cache hits.
+    return frozenset(TOKEN_RE.findall(text.lower())) - ROOT_STOPWORDS
+
+def cache_path(filename):
+    return filename + CACHE_SUFFIX
+
+def load_or_build(filename, data, snapshot=None):
+    """
+    The index of the lexicon `filename`, whose entries are `data`. As with
+    ngram.load_or_train, `snapshot` (the store's fingerprint when data matches the
+    file) lets the cache beside the file be used, or written after building.
+    """
+    cache = cache_path(filename)
+    index = ReverseIndex.load(cache, snapshot, data) if snapshot else None
+    if index is None:
+        index = ReverseIndex()
+        index.index_more(data)
+        if snapshot:
+            try:
+                index.save(cache, snapshot, data)
+            except OSError:
+                pass  # Rebuilt next time instead.
+    return index
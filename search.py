@@ -0,0 +1,245 @@
+import re
+import time
+import bisect
+from array import array
+from functools import partial
+from collections import defaultdict
+
+# ==========================================
+#              SEARCH INDEX
+# ==========================================
+
+SEARCH_FIELDS = ["conlang", "english", "notes"]
+SEARCH_MODES = ["prefix", "substring", "exact"]
+
+# Lowercasing is safe for Lore words too: no two LORE glyphs fold to the same character.
+TOKEN_RE = re.compile(r"\w+")
+SEPARATOR = "\x00"
+
+class LexiconIndex:
+    """
+    Base for indexes that follow a lexicon dict entry by entry. Subclasses
+    define add(category, entry) and remove(entry), which returns the entry's
+    category, or None if it was not indexed; this class catches up with a
+    freshly loaded lexicon a budget at a time (index_more) and keeps the
+    index right through the added/removing/changed hooks while it does.
+    """
+    LIMIT = 200
+    BATCH = 500
+
+    def __init__(self):
+        self.cursor = {}        # category -> rows of the lexicon indexed so far
+        self.live = 0
+
+    def __len__(self):
+        return self.live
+
+    def add(self, category, entry):
+        raise NotImplementedError
+
+    def remove(self, entry):
+        raise NotImplementedError
+
+    def add_many(self, category, entries):
+        for entry in entries:
+            self.add(category, entry)
+
+    def merge_terms(self):
+        pass
+
+    # --- Keeping up with a lexicon dict ---
+
+    def index_more(self, data, budget=None):
+        """Indexes entries not seen yet, for up to `budget` seconds. Returns True once caught up."""
+        deadline = None if budget is None else time.perf_counter() + budget
+        for category, entries in data.items():
+            if not isinstance(entries, list): continue
+            row = self.cursor.get(category, 0)
+            while row < len(entries):
+                batch = entries[row:row + self.BATCH]
+                self.add_many(category, batch)
+                row += len(batch)
+                self.cursor[category] = row
+                if deadline and time.perf_counter() > deadline: return False
+        self.merge_terms()
+        return True
+
+    def added(self, category, entries):
+        """Call after appending to entries."""
+        if self.cursor.get(category, 0) == len(entries) - 1:
+            self.add(category, entries[-1])
+            self.cursor[category] = len(entries)
+
+    def removing(self, category, rows, entries):
+        """Call before rows are deleted from entries."""
+        cursor = self.cursor.get(category, 0)
+        behind = [row for row in set(rows) if row < cursor]
+        for row in behind:
+            self.remove(entries[row])
+        self.cursor[category] = cursor - len(behind)
+
+    def changed(self, category, row, entry):
+        if row < self.cursor.get(category, 0):
+            self.update(entry)
+
+    def update(self, entry):
+        """Re-indexes an entry after one of its fields changed in place."""
+        category = self.remove(entry)
+        if category is not None:
+            self.add(category, entry)
+
+class SearchIndex(LexiconIndex):
+    """
+    In-memory index over the conlang, english and notes fields of every category.
+
+    - prefix:    words (and whole Lore words) starting with the query, from a sorted term list
+    - substring: any field containing the query, narrowed by trigram postings
+                 (queries under three characters read unigram or bigram postings instead)
+    - exact:     Lore words exactly equal to the query, glyph for glyph
+
+    Entries are added, changed and removed one at a time; nothing is ever rebuilt.
+    Each indexed entry gets a document number; a removed or edited entry's old
+    number is left as a tombstone, so postings are append-only arrays.
+
+    A freshly loaded lexicon is indexed in the background with index_more(); the
+    added/removing/changed hooks keep the index right while that is under way.
+    """
+    SCAN = 4        # candidates per result checked directly before intersecting postings
+
+    def __init__(self):
+        super().__init__()
+        self.docs = []          # doc -> (category, entry, conlang as indexed), or None once removed
+        self.doc_of = {}        # id(entry) -> doc
+        self.exact = {}         # conlang -> [doc, ...]
+        self.term_docs = {}     # term -> doc, or array of docs once a second one arrives
+        self.terms = []         # sorted terms
+        self.new_terms = []     # terms not merged into self.terms yet
+        self.trigrams = defaultdict(partial(array, 'I'))  # trigram -> docs
+        self.short_grams = defaultdict(partial(array, 'I'))  # single glyph or pair -> docs
+
+    def add(self, category, entry):
+        doc = len(self.docs)
+        conlang = entry.get('conlang', '')
+        self.docs.append((category, entry, conlang))
+        self.doc_of[id(entry)] = doc
+        self.live += 1
+
+        self.exact.setdefault(conlang, []).append(doc)
+
+        text = self.text(entry)
+        terms = set(TOKEN_RE.findall(text))
+        terms.add(conlang.lower())
+        term_docs = self.term_docs
+        for term in terms:
+            docs = term_docs.get(term)
+            if docs is None:
+                # Most terms belong to one entry; a bare int is far smaller than an array.
+                term_docs[term] = doc
+                self.new_terms.append(term)
+            elif type(docs) is int:
+                term_docs[term] = array('I', (docs, doc))
+            else:
+                docs.append(doc)
+
+        trigrams = self.trigrams
+        for gram in set(map(''.join, zip(text, text[1:], text[2:]))):
+            trigrams[gram].append(doc)
+        # Grams holding the separator are kept too: no query has one, and filtering costs more.
+        short_grams = self.short_grams
+        for gram in set(text).union(map(''.join, zip(text, text[1:]))):
+            short_grams[gram].append(doc)
+
+    def remove(self, entry):
+        doc = self.doc_of.pop(id(entry), None)
+        if doc is None: return None
+        category, _, conlang = self.docs[doc]
+        docs = self.exact[conlang]
+        docs.remove(doc)
+        if not docs: del self.exact[conlang]
+        self.docs[doc] = None
+        self.live -= 1
+        return category
+
+    @staticmethod
+    def text(entry):
+        return SEPARATOR.join(entry.get(field, '') for field in SEARCH_FIELDS).lower()
+
+    def search(self, query, mode="substring", limit=LexiconIndex.LIMIT):
+        """Returns up to `limit` (category, entry) pairs, oldest first."""
+        if not query: return []
+        if mode == "exact":
+            docs = self.exact.get(query, [])[:limit]
+        elif mode == "prefix":
+            docs = self.search_prefix(query.lower(), limit)
+        elif len(query) < 3:
+            docs = self.search_short(query.lower(), limit)
+        else:
+            docs = self.search_substring(query.lower(), limit)
+        return [self.docs[doc][:2] for doc in docs]
+
+    def search_prefix(self, prefix, limit):
+        self.merge_terms()
+        found, seen = [], set()
+        i = bisect.bisect_left(self.terms, prefix)
+        while i < len(self.terms) and self.terms[i].startswith(prefix):
+            docs = self.term_docs[self.terms[i]]
+            for doc in (docs,) if type(docs) is int else docs:
+                if doc not in seen and self.docs[doc] is not None:
+                    seen.add(doc)
+                    found.append(doc)
+                    if len(found) >= limit: break
+            if len(found) >= limit: break
+            i += 1
+        found.sort()
+        return found[:limit]
+
+    def search_substring(self, query, limit):
+        grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        postings = [self.trigrams.get(gram) for gram in grams]
+        if not postings: return []
+        if not all(postings): return []
+        postings.sort(key=len)
+        candidates = postings[0]
+        if len(postings) == 1 or len(candidates) <= limit:
+            return self.confirm(candidates, query, grams, limit)
+        # A common query fills the limit from the first few candidates, so try those before narrowing.
+        first = candidates[:self.SCAN * limit]
+        found = self.confirm(first, query, grams, limit)
+        if len(found) >= limit or len(first) == len(candidates): return found
+        # Narrow the rest of the rarest trigram's docs by the next ones, while those are cheap to scan.
+        rest = set(candidates[len(first):])
+        for docs in postings[1:]:
+            if len(docs) > 32 * len(rest): break
+            rest.intersection_update(docs)
+        return found + self.confirm(sorted(rest), query, grams, limit - len(found))
+
+    def search_short(self, query, limit):
+        # Postings are in doc order, so the first `limit` live docs are the oldest matches.
+        found = []
+        for doc in self.short_grams.get(query, ()):
+            if self.docs[doc] is not None:
+                found.append(doc)
+                if len(found) >= limit: break
+        return found
+
+    def confirm(self, candidates, query, grams, limit):
+        # Check each candidate against the text: trigrams can match out of order.
+        found = []
+        for doc in candidates:
+            hit = self.docs[doc]
+            if hit is not None and (len(grams) == 1 or query in self.text(hit[1])):
+                found.append(doc)
+                if len(found) >= limit: break
+        return found
+
+    def merge_terms(self):
+        if not self.new_terms: return
+        if len(self.new_terms) < 64:
+            for term in self.new_terms:
+                bisect.insort(self.terms, term)
+        else:
+            # Two sorted runs: Timsort merges them in linear time.
+            self.new_terms.sort()
+            self.terms += self.new_terms
+            self.terms.sort()
+        self.new_terms = []
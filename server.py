@@ -0,0 +1,377 @@
+import sys
+import json
+import random
+import asyncio
+import traceback
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+
+from generator import BATCH_THRESHOLD, WordGenerator, SeenWords
+from ngram import load_or_train, lexicon_words, cache_path as ngram_cache_path
+from lexicon import CATEGORIES, LexiconError, BackgroundWriter, Entry, open_store
+from search import SEARCH_MODES, SearchIndex
+from reverse import REVERSE_MODES, load_or_build, cache_path as index_cache_path
+from similar import NearWords, DistinctWords
+
+# ==========================================
+#              LEXICON SERVICE
+# ==========================================
+
+class RequestError(Exception):
+    """A request the service refuses; `status` is the HTTP status to answer with."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def param(params, name, kind, default=None):
+    """params[name] as an int or bool. Query strings only carry text, so that is converted too."""
+    value = params.get(name, default)
+    if value is None: return None
+    if kind is bool:
+        if isinstance(value, bool): return value
+        if isinstance(value, str): return value.lower() in ("1", "true", "yes")
+        raise RequestError(f"{name} must be true or false")
+    if isinstance(value, int) and not isinstance(value, bool): return value
+    if isinstance(value, str) and value.lstrip("-").isdigit(): return int(value)
+    raise RequestError(f"{name} must be an integer")
+
+def entry_json(category, entry):
+    return {"category": category, "conlang": entry.get('conlang', ''), "english": entry.get('english', ''),
+            "notes": entry.get('notes', '')}
+
+class LexiconService:
+    """
+    One lexicon held in memory for every client, with its search indexes, and the
+    operations the server offers on it. Each operation takes a dict of parameters
+    and returns a JSON-ready dict, or raises RequestError.
+
+    Operations run one at a time, so they never see each other's changes half made:
+    the server runs generate (and batches) on a worker thread, the rest on the event
+    loop, and never two at once. New entries go to a BackgroundWriter: the single
+    writer that puts them on disk, coalescing bursts into one journal write.
+    """
+    MAX_WORDS = 100_000
+    MAX_RESULTS = 1000
+    MAX_SYLLABLES = 10
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.store = open_store(filename)
+        self.data = self.store.load()
+        snapshot = None if self.store.pending else self.store.snapshot
+        self.search_index = SearchIndex()
+        self.search_index.index_more(self.data)
+        self.reverse_index = load_or_build(filename, self.data, snapshot)
+        self.near_words = NearWords()
+        self.near_words.index_more(self.data)
+        self.snapshot = snapshot        # None once anything is added
+        self.seen = None                # SeenWords of saved and handed-out words, for unique=true
+        self.ngram = None
+        self.writer = BackgroundWriter(self.store)
+        self.writer.start()
+        self.operations = {"generate": self.generate, "lookup": self.lookup, "search": self.search,
+                           "add": self.add, "stats": self.stats}
+
+    def call(self, name, params):
+        operation = self.operations.get(name)
+        if operation is None: raise RequestError(f"unknown operation {name!r}", 404)
+        if not isinstance(params, dict): raise RequestError("parameters must be a JSON object")
+        return operation(params)
+
+    def batch(self, requests):
+        """Runs [{"op": ..., parameters...}, ...] in order; a failed one gives {"error": ...} in its place."""
+        if not isinstance(requests, list): raise RequestError("a batch must be a JSON array")
+        results = []
+        for request in requests:
+            try:
+                if not isinstance(request, dict): raise RequestError("each batch item must be a JSON object")
+                results.append(self.call(request.get("op"), request))
+            except RequestError as e:
+                results.append({"error": str(e), "status": e.status})
+        return {"results": results}
+
+    # --- Operations ---
+
+    def generate(self, params):
+        n = param(params, "n", int, 1)
+        low, high = param(params, "min", int, 1), param(params, "max", int, 3)
+        seed, unique = param(params, "seed", int), param(params, "unique", bool, False)
+        distance = param(params, "distance", int, 0)
+        mode = params.get("mode", "templates")
+        if not 0 <= n <= self.MAX_WORDS: raise RequestError(f"n must be 0..{self.MAX_WORDS}")
+        if not 1 <= low <= high <= self.MAX_SYLLABLES: raise RequestError(f"need 1 <= min <= max <= {self.MAX_SYLLABLES}")
+        if not 0 <= distance <= self.near_words.max_distance:
+            raise RequestError(f"distance must be 0..{self.near_words.max_distance}")
+        if unique and self.seen is None:
+            self.seen = SeenWords(lexicon_words(self.data))
+        seen = self.seen if unique else None
+        if distance:
+            # Apart from the saved words and each other; unlike unique, not from earlier answers.
+            seen = DistinctWords(self.near_words, distance)
+        if mode == "templates":
+            if seed is not None or n > BATCH_THRESHOLD:
+                if seen is not None:
+                    words, structures = WordGenerator.generate_unique_batch(n, seen, low, high, seed=seed)
+                else:
+                    words, structures = WordGenerator.generate_batch(n, low, high, seed=seed)
+            else:
+                words, structures = [], []
+                for _ in range(n):
+                    word, structure = (WordGenerator.generate_unique_word(seen, low, high) if seen is not None
+                                       else WordGenerator.generate_word(low, high))
+                    if word is None: break
+                    words.append(word)
+                    structures.append(structure)
+            return {"words": words, "structures": structures}
+        rand = random.Random(seed)
+        if mode == "ngram":
+            if self.ngram is None:
+                self.ngram = load_or_train(self.filename, self.data, self.snapshot)
+            words = []
+            for _ in range(n):
+                word = self.ngram.generate(seen=seen, rand=rand.random)
+                if word is None: break
+                words.append(word)
+            return {"words": words}
+        if mode == "uniform":
+            space = WordGenerator.word_space(low, high)
+            words, misses = [], 0
+            while len(words) < n and misses < 1000:
+                word = space.sample(rand.randrange)
+                if seen is None or seen.add_new([word])[0]:
+                    words.append(word)
+                    misses = 0
+                else:
+                    misses += 1
+            return {"words": words, "ranks": [space.rank(word) for word in words]}
+        raise RequestError("mode must be templates, ngram or uniform")
+
+    def lookup(self, params):
+        """Entries whose Lore word or whole definition is `query`, as `wordforge lookup` finds them."""
+        query = str(params.get("query", "")).strip()
+        if not query: raise RequestError("query is required")
+        hits = self.search_index.search(query, "exact", self.MAX_RESULTS)
+        hits += [(category, entry) for category, entry in self.reverse_index.defined_as(query, self.MAX_RESULTS)
+                 if entry.get('conlang', '') != query]
+        return {"entries": [entry_json(category, entry) for category, entry in hits]}
+
+    def search(self, params):
+        query = str(params.get("query", "")).strip()
+        mode = params.get("mode", "substring")
+        limit = param(params, "limit", int, SearchIndex.LIMIT)
+        if not 1 <= limit <= self.MAX_RESULTS: raise RequestError(f"limit must be 1..{self.MAX_RESULTS}")
+        if mode in REVERSE_MODES:
+            hits = self.reverse_index.search(query, mode, limit)
+        elif mode in SEARCH_MODES:
+            hits = self.search_index.search(query, mode, limit)
+        else:
+            raise RequestError(f"mode must be one of {', '.join(SEARCH_MODES + REVERSE_MODES)}")
+        return {"entries": [entry_json(category, entry) for category, entry in hits]}
+
+    def add(self, params):
+        """
+        Adds one entry, or every entry of "entries". Nothing is added if any of them
+        is invalid. "near" lists, per entry, the words already saved within one glyph
+        of it; they are added anyway, the client decides what to make of it.
+        """
+        items = params.get("entries", [params])
+        if not isinstance(items, list): raise RequestError("entries must be a JSON array")
+        new = []
+        for item in items:
+            if not isinstance(item, dict): raise RequestError("each entry must be a JSON object")
+            conlang, english = str(item.get("conlang", "")).strip(), str(item.get("english", "")).strip()
+            category = item.get("category", CATEGORIES[0])
+            if not conlang or not english: raise RequestError("each entry needs conlang and english")
+            if category not in CATEGORIES: raise RequestError(f"category must be one of {', '.join(CATEGORIES)}")
+            new.append((category, Entry(conlang, english, str(item.get("notes", "")).strip())))
+        near = []
+        for category, entry in new:
+            near.append([{"conlang": word, "distance": d} for d, word in self.near_words.near(entry.conlang, limit=self.MAX_RESULTS)])
+            entries = self.data[category]
+            entries.append(entry)
+            self.search_index.added(category, entries)
+            self.reverse_index.added(category, entries)
+            self.near_words.added(category, entries)
+            if self.seen is not None: self.seen.add(entry.conlang)
+            if self.ngram is not None: self.ngram.train([entry.conlang])
+            self.writer.append(category, entry)
+        if new: self.snapshot = None
+        return {"added": len(new), "near": near}
+
+    def stats(self, params):
+        return {"entries": {category: len(self.data[category]) for category in CATEGORIES},
+                "saving": self.writer.dirty, "error": str(self.writer.error) if self.writer.error else None}
+
+    def close(self):
+        """Gets every change onto disk; then, like the window, refreshes the caches beside the lexicon."""
+        self.writer.close()
+        snapshot = self.store.snapshot
+        if self.store.pending or not snapshot: return
+        try:
+            if self.ngram is not None:
+                self.ngram.save(ngram_cache_path(self.filename), snapshot)
+            if self.snapshot != snapshot:
+                self.reverse_index.save(index_cache_path(self.filename), snapshot, self.data)
+        except OSError:
+            pass
+
+# ==========================================
+#              HTTP SERVER
+# ==========================================
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 408: "Request Timeout",
+           413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error",
+           501: "Not Implemented"}
+
+class Server:
+    """
+    HTTP/1.1 with JSON bodies, just enough for loopback clients: keep-alive (and
+    pipelining, since requests on a connection are answered in order), Content-Length
+    bodies only, no TLS.
+
+        GET  /stats
+        GET  /generate?n=10&mode=ngram    (query parameters, or)
+        POST /generate  {"n": 10, "min": 1, "max": 3, "seed": 7, "unique": true, "distance": 1, "mode": "templates"}
+        POST /lookup    {"query": "water"}
+        POST /search    {"query": "wat", "mode": "substring", "limit": 50}
+        POST /add       {"conlang": ..., "english": ..., "notes": ..., "category": ...} or {"entries": [...]}
+        POST /batch     [{"op": "lookup", "query": ...}, {"op": "add", ...}, ...]
+
+    Every answer is a JSON object; failures are {"error": message} with a 4xx or 5xx status.
+    Operations in OFFLOAD run on a worker thread, so a big generate does not stall
+    the other connections; one lock keeps every operation to itself. close() stops
+    listening, ends every open connection and waits for the operation in progress.
+    """
+    MAX_BODY = 16 << 20
+    IDLE = 60.0
+    OFFLOAD = {"generate", "batch"}     # operations that can take long enough to stall the loop
+
+    def __init__(self, service):
+        self.service = service
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wordforge-service")
+        self.lock = asyncio.Lock()
+        self.server = None
+        self.connections = {}   # task -> its StreamWriter, for every open connection
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self.server = await asyncio.start_server(self.connection, host, port)
+        return self.server
+
+    async def connection(self, reader, writer):
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.IDLE)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    self.respond(writer, 431, {"error": "request head too large"}, False)
+                    return
+                status, body, keep_alive = await self.request(head, reader)
+                self.respond(writer, status, body, keep_alive)
+                if not keep_alive: return
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.connections[task]
+            writer.close()
+
+    async def request(self, head, reader):
+        """(status, JSON-ready body, keep the connection open)."""
+        try:
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, version = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                if name: headers[name.strip().lower()] = value.strip()
+        except ValueError:
+            return 400, {"error": "malformed request"}, False
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        if "transfer-encoding" in headers:
+            return 501, {"error": "send a Content-Length body"}, False
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            return 400, {"error": "bad Content-Length"}, False
+        if length > self.MAX_BODY:
+            return 413, {"error": "body too large"}, False
+        try:
+            raw = await reader.readexactly(length) if length else b""
+        except asyncio.IncompleteReadError:
+            return 400, {"error": "body ended early"}, False
+        status, body = await self.dispatch(method, target, raw)
+        return status, body, keep_alive
+
+    async def dispatch(self, method, target, raw):
+        url = urlsplit(target)
+        name = url.path.strip("/")
+        try:
+            if method == "GET":
+                params = dict(parse_qsl(url.query))
+            elif method == "POST":
+                try:
+                    params = json.loads(raw) if raw else {}
+                except ValueError as e:
+                    raise RequestError(f"body is not JSON: {e}")
+            else:
+                raise RequestError("use GET or POST", 405)
+            if name == "batch":
+                if method != "POST": raise RequestError("POST a JSON array to /batch", 405)
+                operation = self.service.batch
+            else:
+                operation = partial(self.service.call, name)
+            async with self.lock:
+                if name in self.OFFLOAD:
+                    return 200, await asyncio.get_running_loop().run_in_executor(self.worker, operation, params)
+                return 200, operation(params)
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except LexiconError as e:
+            return 500, {"error": str(e)}
+        except Exception as e:
+            traceback.print_exc()
+            return 500, {"error": f"internal error: {e}"}
+
+    def respond(self, writer, status, body, keep_alive):
+        payload = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(payload)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+
+    async def close(self):
+        """Stops serving; call it before closing the service, so nothing is left pending."""
+        if self.server is not None: self.server.close()
+        # Closing the transport wakes a waiting read with EOF, so each connection ends on its own.
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        if self.server is not None: await self.server.wait_closed()
+        self.worker.shutdown()
+
+async def serve(filename, host="127.0.0.1", port=8765, ready=None):
+    """Runs until cancelled (Ctrl+C), then saves everything. `ready(port)` is called once listening."""
+    service = LexiconService(filename)
+    app = Server(service)
+    try:
+        server = await app.start(host, port)
+        if ready: ready(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+    finally:
+        await app.close()
+        service.close()
+
+def run(filename, host="127.0.0.1", port=8765):
+    def ready(bound):
+        print(f"wordforge: serving {filename} on http://{host}:{bound}/ (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        asyncio.run(serve(filename, host, port, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
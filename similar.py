@@ -0,0 +1,228 @@
+from array import array
+
+from search import LexiconIndex
+
+# ==========================================
+#            NEAR-DUPLICATE WORDS
+# ==========================================
+
+MAX_DISTANCE = 1
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between two glyph strings, or limit + 1 once it is known to exceed limit."""
+    if abs(len(a) - len(b)) > limit: return limit + 1
+    if len(a) > len(b): a, b = b, a
+    if limit <= 1: return one_edit(a, b) if limit else int(a != b)
+    previous = list(range(len(b) + 1))
+    for i, glyph in enumerate(a, 1):
+        # Only cells within `limit` of the diagonal can stay within the limit.
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        current = [i] + [limit + 1] * len(b)
+        best = current[0] if low == 1 else limit + 1
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (glyph != b[j - 1])
+            cost = min(cost, previous[j] + 1, current[j - 1] + 1)
+            current[j] = cost
+            if cost < best: best = cost
+        if best > limit: return limit + 1
+        previous = current
+    return min(previous[len(b)], limit + 1)
+
+def one_edit(a, b):
+    """edit_distance(a, b, 1) for len(a) <= len(b), comparing slices instead of filling a table."""
+    if a == b: return 0
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    # Past the first difference the rest must match, shifted by the glyph b has extra, if any.
+    return 1 if a[i + (len(a) == len(b)):] == b[i + 1:] else 2
+
+class NearWords(LexiconIndex):
+    """
+    Every distinct Lore word of a lexicon, indexed so the saved words within a few
+    edits (glyphs inserted, deleted or replaced) of any word are found without
+    comparing it to all of them.
+
+    Each word is cut into max_distance + 1 segments. A word within max_distance
+    edits of another shares at least one segment with it, starting no more than
+    that many glyphs away, so a query only looks up its own substrings at those
+    few places, in a table of (word length, segment number) -> segment -> words.
+    The candidates found are then checked with a banded edit distance. Words of
+    max_distance glyphs or fewer have an empty segment and are always checked.
+
+    Fed by the LexiconIndex hooks, like SearchIndex, or by
+    add_word/remove_word directly; a word is kept while any entry uses it.
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE):
+        super().__init__()
+        self.max_distance = max_distance
+        self.uses = {}          # word -> entries using it
+        self.ids = {}           # word -> id
+        self.words = []         # id -> word, or None once removed
+        self.free = []          # ids of removed words, for reuse
+        self.segments = {}      # (length, segment number) -> {segment: id or array of ids}
+        self.short = set()      # ids of words too short to have a segment per edit
+
+    def __contains__(self, word):
+        return word in self.uses
+
+    # --- Lexicon hooks ---
+
+    def add(self, category, entry):
+        self.add_word(entry.get('conlang', ''))
+        self.live += 1
+
+    def remove(self, entry):
+        self.remove_word(entry.get('conlang', ''))
+        self.live -= 1
+        return None
+
+    def update(self, entry):
+        pass  # Only the Lore word is indexed, and it is never edited in place.
+
+    # --- Words ---
+
+    def parts(self, length):
+        """(start, size) of each segment of a word of `length` glyphs."""
+        count = self.max_distance + 1
+        size, longer = divmod(length, count)
+        parts, start = [], 0
+        for i in range(count):
+            part = size + (i >= count - longer)
+            parts.append((start, part))
+            start += part
+        return parts
+
+    def add_word(self, word):
+        if not word: return
+        uses = self.uses.get(word, 0)
+        self.uses[word] = uses + 1
+        if uses: return
+        wid = self.free.pop() if self.free else len(self.words)
+        if wid == len(self.words):
+            self.words.append(word)
+        else:
+            self.words[wid] = word
+        self.ids[word] = wid
+        if len(word) <= self.max_distance:
+            self.short.add(wid)
+            return
+        for i, (start, size) in enumerate(self.parts(len(word))):
+            table = self.segments.setdefault((len(word), i), {})
+            segment = word[start:start + size]
+            ids = table.get(segment)
+            if ids is None:
+                table[segment] = wid
+            elif type(ids) is int:
+                table[segment] = array('I', (ids, wid))
+            else:
+                ids.append(wid)
+
+    def remove_word(self, word):
+        uses = self.uses.get(word)
+        if not uses: return
+        if uses > 1:
+            self.uses[word] = uses - 1
+            return
+        del self.uses[word]
+        wid = self.ids.pop(word)
+        self.words[wid] = None
+        self.short.discard(wid)
+        if len(word) > self.max_distance:
+            for i, (start, size) in enumerate(self.parts(len(word))):
+                table = self.segments[(len(word), i)]
+                segment = word[start:start + size]
+                ids = table[segment]
+                if type(ids) is int or len(ids) == 1:
+                    del table[segment]
+                else:
+                    ids.remove(wid)
+        self.free.append(wid)
+
+    # --- Queries ---
+
+    def candidates(self, word, distance):
+        found = set(self.short)
+        n = len(word)
+        for length in range(max(n - distance, self.max_distance + 1), n + distance + 1):
+            for i, (start, size) in enumerate(self.parts(length)):
+                table = self.segments.get((length, i))
+                if not table: continue
+                for at in range(max(0, start - distance), min(start + distance, n - size) + 1):
+                    ids = table.get(word[at:at + size])
+                    if ids is None: continue
+                    if type(ids) is int:
+                        found.add(ids)
+                    else:
+                        found.update(ids)
+        return found
+
+    def near(self, word, distance=None, limit=None):
+        """[(distance, saved word), ...] within `distance` edits of `word` (itself included, at 0), closest first."""
+        distance = self.max_distance if distance is None else distance
+        if distance > self.max_distance: raise ValueError(f"this index finds words at most {self.max_distance} edits apart")
+        found = []
+        for wid in self.candidates(word, distance):
+            other = self.words[wid]
+            d = edit_distance(word, other, distance)
+            if d <= distance: found.append((d, other))
+        found.sort()
+        return found[:limit]
+
+    def has_near(self, word, distance=None):
+        """True if a saved word is within `distance` edits of `word` (or is `word`)."""
+        distance = self.max_distance if distance is None else distance
+        if word in self.uses: return True
+        return any(edit_distance(word, self.words[wid], distance) <= distance
+                   for wid in self.candidates(word, distance))
+
+def near_in(word, words, distance=MAX_DISTANCE, limit=None):
+    """
+    Like NearWords.near, but scanning `words` once instead of building the index:
+    cheaper for a single question, such as one word added from the command line.
+    """
+    found = {(d, other) for other in words
+             if abs(len(other) - len(word)) <= distance and (d := edit_distance(word, other, distance)) <= distance}
+    return sorted(found)[:limit]
+
+class DistinctWords:
+    """
+    Stands in for a SeenWords when generating: a word is new only if it is more
+    than `distance` edits from every word of `saved` (a NearWords, only read) and
+    from every word accepted so far, which are kept apart from the saved ones.
+    """
+
+    def __init__(self, saved, distance=None):
+        self.saved = saved
+        self.distance = saved.max_distance if distance is None else distance
+        self.given = NearWords(self.distance)
+        self.accepted = 0
+        self.rejected = 0
+
+    @property
+    def rejection_rate(self):
+        total = self.accepted + self.rejected
+        return self.rejected / total if total else 0.0
+
+    def add(self, word):
+        self.given.add_word(word)
+
+    def __contains__(self, word):
+        return self.saved.has_near(word, self.distance) or self.given.has_near(word)
+
+    def add_new(self, words, limit=None):
+        """As SeenWords.add_new, with "near a taken word" in place of "taken"."""
+        keep, taken = [], 0
+        for word in words:
+            if limit is not None and taken >= limit:
+                keep.append(False)
+            elif word in self:
+                keep.append(False)
+                self.rejected += 1
+            else:
+                self.given.add_word(word)
+                keep.append(True)
+                self.accepted += 1
+                taken += 1
+        return keep
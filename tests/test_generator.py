@@ -0,0 +1,67 @@
+import hashlib
+
+import pytest
+
+from generator import WordGenerator, SeenWords
+
+np = pytest.importorskip("numpy")
+
+def digest(words):
+    return hashlib.sha256("\n".join(words).encode("utf-8")).hexdigest()
+
+def test_seed_alone_decides_the_corpus():
+    # Three shards, the last one short, so the shard boundaries are exercised.
+    n, shard = 2500, 1000
+    parallel = [digest(w for words, _ in WordGenerator.generate_parallel(n, seed=7, workers=workers, shard_size=shard)
+                       for w in words)
+                for workers in (1, 2, 4)]
+    assert len(set(parallel)) == 1
+
+def test_batch_matches_parallel():
+    n = WordGenerator.BATCH_CHUNK + 10
+    batch, _ = WordGenerator.generate_batch(n, seed=7)
+    parallel = [w for words, _ in WordGenerator.generate_parallel(n, seed=7, workers=2) for w in words]
+    assert digest(batch) == digest(parallel)
+    assert batch != WordGenerator.generate_batch(n, seed=8)[0]
+
+def test_no_words():
+    assert list(WordGenerator.generate_parallel(0, seed=1, workers=2)) == []
+    assert WordGenerator.generate_batch(0, seed=1) == ([], [])
+
+def test_batch_follows_the_rules():
+    space = WordGenerator.word_space(1, 3)
+    words, structures = WordGenerator.generate_batch(20000, 1, 3, seed=3)
+    assert len(words) == len(structures) == 20000
+    assert all(word in space for word in words)
+    names = set(WordGenerator.STRUCTURES)
+    for word, structure in zip(words, structures):
+        parts = structure.split("-")
+        assert 1 <= len(parts) <= 3 and set(parts) <= names
+        assert len(word) == len(structure) - len(parts) + 1
+
+def test_batch_of_long_words():
+    # Enough syllables that one packed code per word would overflow an int64.
+    words, structures = WordGenerator.generate_batch(50, 22, 24, seed=1)
+    assert all(22 <= len(s.split("-")) <= 24 for s in structures)
+    assert all(len(w) == len(s) - s.count("-") for w, s in zip(words, structures))
+
+def test_seen_words_never_let_a_taken_word_through():
+    saved, _ = WordGenerator.generate_batch(20000, seed=11)
+    for seen in (SeenWords(saved), SeenWords(saved, capacity=40000)):
+        # No false negatives: every saved word is taken, and stays taken.
+        assert all(word in seen for word in saved)
+        assert not any(seen.add_new(saved[:5000]))
+        batch, _ = WordGenerator.generate_batch(5000, seed=12)
+        keep = seen.add_new(batch + batch)
+        accepted = [word for word, k in zip(batch + batch, keep) if k]
+        assert len(accepted) == len(set(accepted))
+        assert not set(accepted) & set(saved)
+        assert all(word in seen for word in batch)
+
+def test_unique_batch_skips_saved_words():
+    saved, _ = WordGenerator.generate_batch(3000, 1, 1, seed=13)
+    seen = SeenWords(saved)
+    words, _ = WordGenerator.generate_unique_batch(2000, seen, 1, 1, seed=14)
+    assert len(words) == len(set(words)) == 2000
+    assert not set(words) & set(saved)
+    assert seen.add_new([words[0], "unheard-of"], limit=1) == [False, True]
@@ -0,0 +1,39 @@
+from lore import LORE, KEYBOARD_LAYOUT, LONG_VOWEL_MAP, COMBO_MAP
+from keymap import BASE_KEYS, ComboMachine, transliterate, transliterate_lines
+
+def test_single_keys():
+    for row in KEYBOARD_LAYOUT:
+        for key, glyph in row:
+            assert transliterate(key) == glyph
+    assert transliterate("rat") == LORE.P + LORE.A_SHORT + LORE.T
+
+def test_upper_case_vowels_are_long():
+    for key, glyph in LONG_VOWEL_MAP.items():
+        assert transliterate(key.upper()) == glyph
+    # SHIFT on a consonant types the same glyph.
+    assert transliterate("R") == transliterate("r")
+
+def test_combos_take_the_longest_match():
+    for keys, glyph in COMBO_MAP.items():
+        assert transliterate(keys) == glyph
+    assert transliterate("shya") == LORE.SH + LORE.YA
+    assert transliterate("Sh") == LORE.SH
+    # A long vowel cannot be part of a combo: "yA" is y then a long a.
+    assert transliterate("yA") == BASE_KEYS["y"] + LORE.A_LONG
+
+def test_disabled_and_other_characters():
+    assert transliterate("qxc") == ""
+    assert transliterate("a-a 1!") == LORE.A_SHORT + "-" + LORE.A_SHORT + " 1!"
+    assert list(transliterate_lines(["ya\n", "sh\n"])) == [LORE.YA + "\n", LORE.SH + "\n"]
+
+def test_combo_machine():
+    machine = ComboMachine()
+    assert machine.feed("s") == (None, 0, True)
+    assert machine.buffer_length == 1
+    assert machine.feed("h") == (LORE.SH, 2, False)
+    assert machine.buffer_length == 0
+    assert machine.feed("s") == (None, 0, True)
+    machine.back()
+    assert machine.feed("y") == (None, 0, True)
+    assert machine.feed("a") == (LORE.YA, 2, False)
+    assert machine.feed("w") == (None, 0, False)
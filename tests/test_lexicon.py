@@ -0,0 +1,178 @@
+import os
+import json
+import time
+
+import pytest
+
+from lexicon import BackgroundWriter, JournalStore, SnapshotReader, LexiconError, Entry, compact_entry, dump_lexicon, load_lexicon, save_lexicon
+
+def make_lexicon(path, words):
+    save_lexicon({"dictionary": [Entry(w, w.upper(), "") for w in words], "phrases": []}, str(path))
+    return str(path)
+
+def conlangs(filename):
+    return [entry["conlang"] for entry in load_lexicon(filename)["dictionary"]]
+
+def fail_once(monkeypatch, module, name):
+    real = getattr(module, name)
+    calls = []
+
+    def flaky(*args):
+        calls.append(args)
+        if len(calls) == 1: raise OSError("disk full")
+        return real(*args)
+    monkeypatch.setattr(module, name, flaky)
+    return calls
+
+def test_failed_fsync_is_not_replayed_twice(tmp_path, monkeypatch):
+    filename = make_lexicon(tmp_path / "lang.json", ["old", "kept"])
+    store = JournalStore(filename)
+    data = store.load()
+    writer = BackgroundWriter(store)
+    writer.RETRY = 0.01
+    writer.start()
+    calls = fail_once(monkeypatch, os, "fsync")
+    del data["dictionary"][0]
+    writer.delete("dictionary", [0])
+    data["dictionary"].append(Entry("new", "NEW", ""))
+    writer.append("dictionary", data["dictionary"][-1])
+    with pytest.raises(LexiconError):
+        writer.flush()
+    deadline = time.monotonic() + 5
+    while writer.dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(calls) > 1 and not writer.dirty
+    # Replayed from the journal: the retried "del" must be in it only once.
+    assert conlangs(filename) == ["kept", "new"]
+    writer.close()
+    assert conlangs(filename) == ["kept", "new"]
+
+def test_interrupted_compaction_keeps_later_changes(tmp_path, monkeypatch):
+    filename = make_lexicon(tmp_path / "lang.json", ["one"])
+    store = JournalStore(filename, compact_every=1)
+    data = store.load()
+    real_replace = os.replace
+
+    def replace(src, dst):
+        # The snapshot is written, but the new journal never takes the old one's place.
+        if src.endswith(".journal.next"): raise OSError("interrupted")
+        return real_replace(src, dst)
+    monkeypatch.setattr(os, "replace", replace)
+    data["dictionary"].append(Entry("two", "TWO", ""))
+    store.append("dictionary", data["dictionary"][-1])
+    monkeypatch.setattr(os, "replace", real_replace)
+    data["dictionary"].append(Entry("three", "THREE", ""))
+    store.append("dictionary", data["dictionary"][-1])
+    assert conlangs(filename) == ["one", "two", "three"]
+    store.close()
+    assert conlangs(filename) == ["one", "two", "three"]
+
+def test_writer_copies_only_edited_entries(tmp_path):
+    filename = make_lexicon(tmp_path / "lang.json", ["a", "b"])
+    store = JournalStore(filename)
+    data = store.load()
+    writer = BackgroundWriter(store)
+    writer.start()
+    data["dictionary"][1]["english"] = "bee"
+    writer.update("dictionary", 1, "english", "bee")
+    writer.flush()
+    assert store.data["dictionary"][0] is data["dictionary"][0]
+    assert store.data["dictionary"][1] is not data["dictionary"][1]
+    writer.close()
+    assert load_lexicon(filename)["dictionary"][1]["english"] == "bee"
+
+def test_journal_replays_after_a_crash(tmp_path):
+    filename = make_lexicon(tmp_path / "lang.json", ["a", "b", "c"])
+    store = JournalStore(filename)
+    data = store.load()
+    data["dictionary"].append(Entry("d", "D", ""))
+    store.append("dictionary", data["dictionary"][-1])
+    data["dictionary"][0]["notes"] = "first"
+    store.update("dictionary", 0, "notes", "first")
+    del data["dictionary"][1]
+    store.delete("dictionary", [1])
+    # No close(): the process dies with every change only in the journal, the last line torn.
+    store.journal.write('{"op": "add", "cat": "dicti')
+    store.journal.flush()
+    reloaded = load_lexicon(filename)
+    assert reloaded == data
+    assert reloaded["dictionary"][0]["notes"] == "first"
+    store = JournalStore(filename)
+    assert store.load() == data and store.pending == 3
+    store.close()
+    assert load_lexicon(filename, with_snapshot=True)[1] is not None
+
+def test_compaction_interrupted_before_the_journal_reset(tmp_path, monkeypatch):
+    filename = make_lexicon(tmp_path / "lang.json", ["a"])
+    store = JournalStore(filename)
+    data = store.load()
+    data["dictionary"].append(Entry("b", "B", ""))
+    store.append("dictionary", data["dictionary"][-1])
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if src.endswith(".journal.next"): raise OSError("crashed")
+        return real_replace(src, dst)
+    monkeypatch.setattr(os, "replace", replace)
+    with pytest.raises(OSError):
+        store.compact()
+    # The new snapshot holds "b" and the old journal still adds it: it must not be replayed on top.
+    assert conlangs(filename) == ["a", "b"]
+
+def test_snapshot_reader_matches_json_load(tmp_path):
+    filename = str(tmp_path / "lang.json")
+    data = {"dictionary": [{"conlang": "ɶʜ" * i, "english": f"word {i}", "notes": "é" * (i % 3)} for i in range(200)],
+            "meta": {"version": 2, "tags": ["a", "b"]},
+            "phrases": [{"conlang": "x", "english": "y", "notes": "", "extra": [1, 2.5, None]}],
+            "empty": [],
+            "count": 12345678901234567890}
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    with open(filename, encoding='utf-8') as f:
+        expected = json.load(f)
+    for chunk_size in (1, 7, 64, SnapshotReader.CHUNK):
+        reader = SnapshotReader(filename, chunk_size=chunk_size, pool={})
+        read = {}
+        for key, entry in reader:
+            read.setdefault(key, []).append(entry)
+        reader.finish(read)
+        assert read == expected and list(read) == list(expected)
+
+@pytest.mark.parametrize("text", ['{"dictionary": [{"conlang": "a"}', '{"dictionary": [] extra', '[1, 2]'])
+def test_snapshot_reader_rejects_broken_files(tmp_path, text):
+    filename = tmp_path / "lang.json"
+    filename.write_text(text, encoding='utf-8')
+    with pytest.raises(LexiconError):
+        load_lexicon(str(filename))
+
+def test_entry_reads_like_its_dict():
+    fields = {"conlang": "шa", "english": "sea", "notes": ""}
+    entry = Entry(**fields)
+    assert entry == fields and fields == entry and entry == Entry("шa", "sea", "")
+    assert dict(entry) == fields and list(entry.items()) == list(fields.items())
+    assert entry["english"] == entry.get("english") == "sea"
+    assert entry.get("extra", "none") == "none" and "extra" not in entry
+    with pytest.raises(KeyError):
+        entry["extra"] = 1
+    copy = entry.copy()
+    copy["notes"] = "changed"
+    assert entry["notes"] == "" and copy != entry
+    assert json.dumps(entry, default=dict, ensure_ascii=False) == json.dumps(fields, ensure_ascii=False)
+
+def test_compact_entry_round_trips(tmp_path):
+    pool = {}
+    first = compact_entry({"conlang": "шa", "english": "sea", "notes": ""}, pool)
+    second = compact_entry({"conlang": "шa", "english": "salt", "notes": ""}, pool)
+    assert type(first) is Entry and first.conlang is second.conlang
+    # Other keys, or the same keys in another order, stay dicts.
+    extra = {"conlang": "x", "english": "y", "notes": "", "tag": "z"}
+    reordered = {"english": "y", "conlang": "x", "notes": ""}
+    assert compact_entry(extra) is extra and compact_entry(reordered) is reordered
+    data = {"dictionary": [first, second, extra, reordered], "phrases": []}
+    assert dump_lexicon(data) == json.dumps(data, default=dict, indent=4, ensure_ascii=False)
+    filename = str(tmp_path / "lang.json")
+    save_lexicon(data, filename)
+    loaded = load_lexicon(filename)
+    assert loaded == data
+    assert [type(e) for e in loaded["dictionary"]] == [Entry, Entry, dict, dict]
+    assert list(loaded["dictionary"][3]) == list(reordered)
@@ -0,0 +1,68 @@
+import pytest
+
+from lexicon import Entry, LexiconError, save_lexicon
+from library import Lexicon, LexiconLibrary
+
+class Tracked(Lexicon):
+    """A Lexicon that can be marked busy or made to fail its next unload."""
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.pinned = False
+        self.fail = False
+
+    @property
+    def busy(self):
+        return self.pinned
+
+    def unload(self):
+        if self.fail:
+            self.fail = False
+            raise LexiconError("cannot save")
+        super().unload()
+
+def make_files(tmp_path, count):
+    filenames = []
+    for i in range(count):
+        filename = str(tmp_path / f"lang{i}.json")
+        save_lexicon({"dictionary": [Entry(f"w{i}", f"word {i}", "")], "phrases": []}, filename)
+        filenames.append(filename)
+    return filenames
+
+def loaded(library):
+    return [lexicon.name for lexicon in library if lexicon.loaded]
+
+def test_least_recently_used_is_unloaded(tmp_path):
+    a, b, c = make_files(tmp_path, 3)
+    library = LexiconLibrary([a, b, c], capacity=2)
+    assert loaded(library) == []
+    library.get(a)
+    library.get(b)
+    library.get(a)
+    library.get(c)
+    assert loaded(library) == ["lang0", "lang2"]
+    # Unloaded lexicons are still searched, straight from disk.
+    assert [lexicon.name for lexicon, _, _ in library.search("w1", mode="exact")] == ["lang1"]
+    library.close()
+    assert loaded(library) == [] and not library.recent
+
+def test_busy_and_failing_lexicons_stay_loaded(tmp_path):
+    a, b, c = make_files(tmp_path, 3)
+    library = LexiconLibrary([a, b, c], capacity=1, factory=Tracked)
+    library.get(a).pinned = True
+    library.get(b).fail = True
+    library.get(c)
+    # a is busy and b failed to unload, so both stay over capacity until next time.
+    assert loaded(library) == ["lang0", "lang1", "lang2"]
+    library.get(a).pinned = False
+    assert loaded(library) == ["lang0"]
+
+def test_close_tries_every_lexicon(tmp_path):
+    a, b = make_files(tmp_path, 2)
+    library = LexiconLibrary([a, b], factory=Tracked)
+    library.get(a).fail = True
+    library.get(b)
+    with pytest.raises(LexiconError):
+        library.close()
+    assert loaded(library) == ["lang0"]
+    library.close()
+    assert loaded(library) == []
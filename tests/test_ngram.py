@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from ngram import NgramModel, cache_path, load_or_train
+
+WORDS = ["шaᴛ", "шoᴛ", "яᴋa", "ᴛaᴋ", "aᴋ шa"]
+
+def transitions(model):
+    return {key: dict(zip(model.nexts[key], model.counts[key])) for key in model.nexts}
+
+def test_add_matches_train():
+    trained = NgramModel().train(WORDS + ["ᴛoш"])
+    added = NgramModel().train(WORDS)
+    assert added.add("ᴛoш")
+    assert transitions(added) == transitions(trained)
+    assert added.words == trained.words == 7
+
+def test_remove_undoes_add():
+    model = NgramModel().train(WORDS)
+    before = transitions(model)
+    model.sample(rand=random.Random(1).random)
+    assert model.add("ᴋoᴋo") and model.remove("ᴋoᴋo")
+    assert transitions(model) == before and model.words == 6
+    assert not model.remove("ᴋoᴋo")
+    assert not model.remove("")
+    assert transitions(model) == before
+
+def test_generate_stays_in_bounds():
+    model = NgramModel().train(WORDS)
+    rand = random.Random(7).random
+    for _ in range(50):
+        word = model.generate(min_length=2, max_length=4, rand=rand)
+        assert word is None or 2 <= len(word) <= 4
+        assert word is None or set(word) <= set("".join(WORDS))
+    assert NgramModel().generate() is None
+    with pytest.raises(ValueError):
+        NgramModel(1)
+
+def test_save_and_load(tmp_path):
+    model = NgramModel().train(WORDS)
+    filename = str(tmp_path / "lang.json")
+    model.save(cache_path(filename), "snap-1")
+    loaded = NgramModel.load(cache_path(filename), "snap-1")
+    assert transitions(loaded) == transitions(model)
+    assert loaded.glyphs == model.glyphs and loaded.words == model.words
+    assert NgramModel.load(cache_path(filename), "snap-2") is None
+    assert NgramModel.load(cache_path(filename), "snap-1", order=4) is None
+    assert NgramModel.load(str(tmp_path / "missing"), "snap-1") is None
+
+def test_load_or_train_uses_the_cache(tmp_path):
+    filename = str(tmp_path / "lang.json")
+    data = {"dictionary": [{"conlang": w} for w in WORDS], "phrases": []}
+    model = load_or_train(filename, data, snapshot="snap-1")
+    # The cache, not the (now different) data, answers for the same snapshot.
+    cached = load_or_train(filename, {"dictionary": []}, snapshot="snap-1")
+    assert transitions(cached) == transitions(model)
+    assert load_or_train(filename, {"dictionary": []}, snapshot="snap-2").words == 0
@@ -0,0 +1,58 @@
+from lexicon import Entry
+from search import SearchIndex
+from reverse import ReverseIndex
+
+def lexicon():
+    return {"dictionary": [Entry("ka", "sky", "root"), Entry("lu", "water", ""), Entry("kaz", "cloud", "root: ka"),
+                           Entry("luz", "river", "from lu"), Entry("kazi", "storm cloud", "kaz"),
+                           Entry("ob", "cab driver", "")],
+            "phrases": [Entry("ka lu", "sky water", "")]}
+
+def words(hits):
+    return [entry["conlang"] for _, entry in hits]
+
+def test_substring_matches_brute_force():
+    data = lexicon()
+    index = SearchIndex()
+    index.index_more(data)
+    index.removing("dictionary", [1], data["dictionary"])
+    del data["dictionary"][1]
+    entries = [entry for entries in data.values() for entry in entries]
+    for query in ["ab", "a", "k", "ud", "r", "loud", "z", "sky w", "A"]:
+        expected = [entry["conlang"] for entry in entries if query.lower() in SearchIndex.text(entry)]
+        assert sorted(words(index.search(query))) == sorted(expected), query
+
+def test_short_query_is_not_a_prefix_search():
+    index = SearchIndex()
+    index.index_more(lexicon())
+    assert "ob" in words(index.search("ab", "substring"))
+    assert "ob" not in words(index.search("ab", "prefix"))
+
+def test_reverse_modes():
+    index = ReverseIndex()
+    index.index_more(lexicon())
+    assert words(index.search("cloud", "meaning")) == ["kaz", "kazi"]
+    assert words(index.search("ka", "root")) == ["kaz"]
+    assert words(index.search("ka", "descendants")) == ["kaz", "kazi"]
+    assert words(index.search("ka lu", "descendants")) == ["kaz", "luz", "kazi"]
+    assert len(index) == 7
+
+def test_reverse_index_follows_the_lexicon():
+    data = lexicon()
+    index = ReverseIndex()
+    index.index_more(data)
+    data["dictionary"][2]["notes"] = ""
+    index.changed("dictionary", 2, data["dictionary"][2])
+    data["dictionary"].append(Entry("kao", "dawn", "ka"))
+    index.added("dictionary", data["dictionary"])
+    assert words(index.search("ka", "root")) == ["kao"]
+
+def test_limits_are_oldest_first():
+    data = {"dictionary": [Entry(f"ka{i}", "same word", "") for i in range(50)], "phrases": []}
+    index = SearchIndex()
+    index.index_more(data)
+    index.removing("dictionary", [0], data["dictionary"])
+    del data["dictionary"][0]
+    assert words(index.search("k", "substring", 5)) == ["ka1", "ka2", "ka3", "ka4", "ka5"]
+    assert words(index.search("sa", "substring", 3)) == ["ka1", "ka2", "ka3"]
+    assert len(index.search("same", "prefix", 7)) == 7
@@ -0,0 +1,130 @@
+import json
+import time
+import asyncio
+import http.client
+
+import pytest
+
+from lexicon import Entry, load_lexicon, save_lexicon
+from server import LexiconService, Server, serve
+
+def parse_response(raw):
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    return status, json.loads(body)
+
+async def exchange(port, requests):
+    """Sends every request on one keep-alive connection at once (pipelined) and reads the answers in order."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for method, path, body in requests:
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+                     + payload)
+    await writer.drain()
+    answers = []
+    for _ in requests:
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = next(int(line.split(b":")[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length"))
+        answers.append(parse_response(head + await reader.readexactly(length)))
+    writer.close()
+    return answers
+
+def test_loopback_requests(tmp_path):
+    filename = str(tmp_path / "lang.json")
+    save_lexicon({"dictionary": [Entry("ka", "sky", ""), Entry("lu", "water", "root: sky")], "phrases": []}, filename)
+    service = LexiconService(filename)
+    app = Server(service)
+
+    async def main():
+        server = await app.start("127.0.0.1", 0)
+        try:
+            port = server.sockets[0].getsockname()[1]
+            return await exchange(port, [
+                ("POST", "/lookup", {"query": "water"}),
+                ("GET", "/generate?n=3&seed=4", None),
+                ("POST", "/generate", {"n": 3, "seed": 4}),
+                ("POST", "/add", {"conlang": "kaa", "english": "heaven", "notes": "ka"}),
+                ("POST", "/search", {"query": "ka", "mode": "root"}),
+                ("POST", "/batch", [{"op": "lookup", "query": "kaa"}, {"op": "nope"}]),
+                ("POST", "/generate", {"n": "many"}),
+                ("POST", "/generate", {"n": 1, "max": LexiconService.MAX_SYLLABLES + 1}),
+                ("GET", "/missing", None),
+            ])
+        finally:
+            await app.close()
+    try:
+        answers = asyncio.run(main())
+    finally:
+        service.close()
+    lookup, generated_get, generated_post, added, search, batch, bad, too_long, missing = answers
+    assert lookup == (200, {"entries": [{"category": "dictionary", "conlang": "lu", "english": "water", "notes": "root: sky"}]})
+    assert generated_get[0] == 200 and len(generated_get[1]["words"]) == 3
+    assert generated_get == generated_post
+    assert added == (200, {"added": 1, "near": [[{"conlang": "ka", "distance": 1}]]})
+    assert [entry["conlang"] for entry in search[1]["entries"]] == ["kaa"]
+    assert batch[1]["results"][0]["entries"][0]["english"] == "heaven"
+    assert batch[1]["results"][1]["status"] == 404
+    assert bad[0] == 400 and "error" in bad[1]
+    assert too_long[0] == 400 and str(LexiconService.MAX_SYLLABLES) in too_long[1]["error"]
+    assert missing[0] == 404
+    assert [entry["conlang"] for entry in load_lexicon(filename)["dictionary"]] == ["ka", "lu", "kaa"]
+
+def test_generate_does_not_stall_other_connections(tmp_path):
+    filename = str(tmp_path / "lang.json")
+    save_lexicon({"dictionary": [], "phrases": []}, filename)
+    service = LexiconService(filename)
+    app = Server(service)
+
+    def quick_request(port):
+        # From a thread of its own: a client on the server's loop would stall with it.
+        time.sleep(0.05)
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        start = time.perf_counter()
+        connection.request("PUT", "/stats")
+        status = connection.getresponse().status
+        connection.close()
+        return status, time.perf_counter() - start
+
+    async def main():
+        server = await app.start("127.0.0.1", 0)
+        try:
+            port = server.sockets[0].getsockname()[1]
+            # Refused before it reaches the service, so it only needs the loop.
+            quick = asyncio.create_task(asyncio.to_thread(quick_request, port))
+            start = time.perf_counter()
+            await exchange(port, [("POST", "/generate", {
+                "n": LexiconService.MAX_WORDS, "max": LexiconService.MAX_SYLLABLES, "seed": 1})])
+            return await quick + (time.perf_counter() - start,)
+        finally:
+            await app.close()
+    try:
+        status, quick, slow = asyncio.run(main())
+    finally:
+        service.close()
+    assert status == 405 and quick < slow / 4
+
+def test_stopping_ends_open_connections(tmp_path):
+    filename = str(tmp_path / "lang.json")
+    save_lexicon({"dictionary": [Entry("ka", "sky", "")], "phrases": []}, filename)
+
+    async def main():
+        ready = asyncio.Event()
+        ports = []
+        serving = asyncio.create_task(serve(filename, port=0, ready=lambda port: (ports.append(port), ready.set())))
+        await ready.wait()
+        reader, writer = await asyncio.open_connection("127.0.0.1", ports[0])
+        body = json.dumps({"conlang": "lu", "english": "sea"}).encode("utf-8")
+        writer.write(f"POST /add HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        # The connection is idle, kept alive, when the server is stopped.
+        serving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await serving
+        rest = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return head, rest, asyncio.all_tasks() - {asyncio.current_task()}
+    head, rest, pending = asyncio.run(main())
+    assert pending == set()
+    assert head.startswith(b"HTTP/1.1 200") and json.loads(rest)["added"] == 1
+    assert [entry["conlang"] for entry in load_lexicon(filename)["dictionary"]] == ["ka", "lu"]
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from lexicon import Entry
+from similar import NearWords, DistinctWords, edit_distance, near_in
+
+GLYPHS = "aeiɶʜдш"
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+def random_words(rand, count):
+    return ["".join(rand.choices(GLYPHS, k=rand.randint(1, 6))) for _ in range(count)]
+
+@pytest.mark.parametrize("limit", [0, 1, 2, 3])
+def test_edit_distance_matches_levenshtein(limit):
+    rand = random.Random(limit)
+    for a, b in zip(random_words(rand, 2000), random_words(rand, 2000)):
+        assert edit_distance(a, b, limit) == min(levenshtein(a, b), limit + 1)
+
+@pytest.mark.parametrize("max_distance", [1, 2])
+def test_near_words_match_brute_force(max_distance):
+    rand = random.Random(max_distance)
+    data = {"dictionary": [Entry(word, "x", "") for word in random_words(rand, 400)], "phrases": []}
+    index = NearWords(max_distance)
+    index.index_more(data)
+    # Removing some entries must drop their words, unless another entry still uses them.
+    rows = rand.sample(range(len(data["dictionary"])), 50)
+    index.removing("dictionary", rows, data["dictionary"])
+    for row in sorted(rows, reverse=True):
+        del data["dictionary"][row]
+    saved = {entry.conlang for entry in data["dictionary"]}
+    for word in random_words(rand, 200):
+        distances = [(levenshtein(word, other), other) for other in saved]
+        for distance in range(max_distance + 1):
+            expected = sorted((d, other) for d, other in distances if d <= distance)
+            assert index.near(word, distance) == expected
+            assert index.has_near(word, distance) == bool(expected)
+            assert near_in(word, saved, distance) == expected
+
+def test_distinct_words_keep_their_distance():
+    saved = NearWords()
+    saved.add_word("шai")
+    distinct = DistinctWords(saved)
+    assert distinct.add_new(["шa", "дeд", "дeш", "ɶɶɶ"]) == [False, True, False, True]
+    assert distinct.rejected == 2
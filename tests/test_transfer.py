@@ -0,0 +1,58 @@
+import io
+
+import pytest
+
+from lexicon import LexiconError, Entry
+from transfer import FORMATS, guess_format, import_rows, read_rows, write_rows
+
+ROWS = [
+    ("dictionary", {"conlang": "шa", "english": "sea", "notes": ""}),
+    ("dictionary", {"conlang": "яᴛ", "english": "far, away", "notes": "said \"slowly\""}),
+    ("phrases", {"conlang": "ɪ ᴋo", "english": "I go", "notes": "tab\there"}),
+]
+
+def export(rows, fmt):
+    out = io.StringIO()
+    write_rows(rows, out, fmt)
+    return out.getvalue().splitlines(keepends=True)
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_export_then_import_round_trips(fmt):
+    data = {"dictionary": [], "phrases": []}
+    counts = import_rows(data, read_rows(export(ROWS, fmt), fmt))
+    assert counts == {"added": 3, "duplicates": 0, "skipped": 0}
+    # The TSV export turns tabs inside fields into spaces.
+    expected = {cat: [] for cat in data}
+    for cat, row in ROWS:
+        notes = row["notes"].replace("\t", " ") if fmt == "tsv" else row["notes"]
+        expected[cat].append(Entry(row["conlang"], row["english"], notes))
+    assert data == expected
+
+def test_import_dedupes_and_skips():
+    data = {"dictionary": [Entry("шa", "sea", "")], "phrases": []}
+    rows = [(None, {"conlang": "шa", "english": "again"}),
+            (None, {"conlang": "new", "english": "new"}),
+            (None, {"conlang": "new", "english": "twice"}),
+            (None, {"conlang": "", "english": "empty"}),
+            ("verbs", {"conlang": "x", "english": "unknown category"})]
+    counts = import_rows(data, rows)
+    assert counts == {"added": 1, "duplicates": 2, "skipped": 2}
+    assert [e["conlang"] for e in data["dictionary"]] == ["шa", "new"]
+    data = {"dictionary": [], "phrases": []}
+    assert import_rows(data, rows, dedupe=False)["added"] == 3
+
+def test_import_romanized_and_positional():
+    data = {"dictionary": [], "phrases": []}
+    import_rows(data, read_rows(["sha\tsea\n"], "tsv"), category="phrases", romanized=True)
+    assert data["phrases"] == [Entry("ш" + "a", "sea", "")]
+    rows = list(read_rows(["english,conlang\n", "sea,шa\n"], "csv"))
+    assert rows == [(None, {"english": "sea", "conlang": "шa"})]
+
+def test_bad_jsonl_and_formats():
+    with pytest.raises(LexiconError, match="line 2"):
+        list(read_rows(['{"conlang": "a"}\n', "{oops\n"], "jsonl"))
+    with pytest.raises(LexiconError, match="not a JSON object"):
+        list(read_rows(["[1]\n"], "jsonl"))
+    assert guess_format("words.CSV") == "csv"
+    assert guess_format("words.ndjson") == "jsonl"
+    assert guess_format(None) == "tsv"
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from generator import WordGenerator
+
+def glyph_ids(space, word):
+    # Splits greedily on the longest glyph, as every LORE glyph is one or two characters.
+    ids, i = [], 0
+    while i < len(word):
+        for size in (2, 1):
+            if word[i:i + size] in space.ids:
+                ids.append(space.ids[word[i:i + size]])
+                i += size
+                break
+        else:
+            raise AssertionError(f"{word!r} has an unknown glyph")
+    return tuple(ids)
+
+def test_one_syllable_space_in_rank_order():
+    space = WordGenerator.word_space(1, 1)
+    words = list(space.words())
+    assert len(words) == space.size == len(set(words))
+    keys = [glyph_ids(space, word) for word in words]
+    assert keys == sorted(keys)
+    for rank in range(0, space.size, 97):
+        assert space.rank(words[rank]) == rank
+
+@pytest.mark.parametrize("low, high", [(1, 2), (1, 3), (2, 3)])
+def test_rank_unrank_round_trip(low, high):
+    space = WordGenerator.word_space(low, high)
+    rand = random.Random(low * 10 + high)
+    for rank in [0, 1, space.size - 1] + [rand.randrange(space.size) for _ in range(2000)]:
+        word = space.unrank(rank)
+        assert word in space
+        assert space.rank(word) == rank
+
+def test_generated_words_are_in_the_space():
+    space = WordGenerator.word_space(1, 3)
+    random.seed(5)
+    for _ in range(5000):
+        word, _ = WordGenerator.generate_word(1, 3)
+        assert word in space
+
+def test_parts_cover_the_space_once():
+    space = WordGenerator.word_space(1, 3)
+    parts = [space.part(i, 7) for i in range(7)]
+    assert parts[0][0] == 0 and parts[-1][1] == space.size
+    assert all(a[1] == b[0] for a, b in zip(parts, parts[1:]))
+
+def test_words_outside_the_space():
+    space = WordGenerator.word_space(1, 1)
+    with pytest.raises(ValueError):
+        space.rank(space.unrank(0) * 5)
+    with pytest.raises(IndexError):
+        space.unrank(space.size)
+
+@pytest.mark.parametrize("argv", [["space", "--min", "3", "--max", "1"], ["generate", "--uniform", "--min", "0"],
+                                  ["generate", "--min", "4", "--max", "2"]])
+def test_cli_rejects_bad_syllable_ranges(argv, capsys):
+    import wordforge
+    assert wordforge.main(argv) == 1
+    assert capsys.readouterr().err.startswith("wordforge: need 1 <= --min <= --max")
@@ -0,0 +1,112 @@
+import os
+import csv
+import json
+from collections import Counter
+
+from keymap import transliterate
+from lexicon import CATEGORIES, LexiconError, Entry, collector_paused
+
+# ==========================================
+#            IMPORT / EXPORT
+# ==========================================
+
+FORMATS = ["csv", "tsv", "jsonl"]
+FIELDS = ["category", "conlang", "english", "notes"]
+EXTENSIONS = {".csv": "csv", ".tsv": "tsv", ".tab": "tsv", ".txt": "tsv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# Rows are added to the lexicon this many at a time.
+BATCH = 10000
+
+def guess_format(filename, default="tsv"):
+    return EXTENSIONS.get(os.path.splitext(filename or "")[1].lower(), default)
+
+def read_rows(lines, fmt, source="input"):
+    """
+    Streams (category or None, entry) pairs out of an iterable of text lines.
+
+    CSV and TSV rows are either named by a header row (any of category, conlang,
+    english, notes) or positional: four columns are category, conlang, english,
+    notes, as `export --format tsv` writes them; fewer are conlang, english, notes.
+    JSONL lines are objects with the same keys.
+    """
+    if fmt == "jsonl":
+        for n, line in enumerate(lines, start=1):
+            if not line.strip(): continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise LexiconError(f"{source} line {n} is not valid JSON: {e}") from e
+            if not isinstance(row, dict): raise LexiconError(f"{source} line {n} is not a JSON object")
+            yield row.get("category"), row
+        return
+
+    if fmt == "csv":
+        rows = csv.reader(lines)
+    else:
+        # The TSV export never quotes: tabs and newlines inside fields become spaces.
+        rows = (line.rstrip("\r\n").split("\t") for line in lines)
+    columns = None
+    for row in rows:
+        if not any(row): continue
+        if columns is None:
+            names = [cell.strip().lower() for cell in row]
+            if "conlang" in names and set(names) <= set(FIELDS):
+                columns = names
+                continue
+            columns = FIELDS if len(row) >= 4 else FIELDS[1:]
+        entry = dict(zip(columns, row))
+        yield entry.pop("category", None), entry
+
+def import_rows(data, rows, category=CATEGORIES[0], romanized=False, dedupe=True):
+    """
+    Adds (category, entry) rows to the lexicon dict `data` in batches of BATCH.
+    Rows without a category go to `category`. With `romanized`, conlang forms are
+    run through the keyboard maps first. With `dedupe`, a row whose conlang form is
+    already in the lexicon, or earlier in the same import, is left out.
+    Returns a Counter of added, duplicates and skipped (empty or unknown category) rows.
+    """
+    counts = Counter(added=0, duplicates=0, skipped=0)
+    notes_pool = {}
+    seen = None
+    if dedupe:
+        seen = {e.get('conlang', '') for entries in data.values() if isinstance(entries, list) for e in entries}
+    batches = {cat: [] for cat in CATEGORIES}
+    with collector_paused():
+        for row_category, row in rows:
+            conlang = str(row.get('conlang') or '').strip()
+            english = str(row.get('english') or '').strip()
+            if romanized: conlang = transliterate(conlang)
+            batch = batches.get(row_category or category)
+            if not conlang or not english or batch is None:
+                counts["skipped"] += 1
+                continue
+            if seen is not None:
+                if conlang in seen:
+                    counts["duplicates"] += 1
+                    continue
+                seen.add(conlang)
+            notes = str(row.get('notes') or '').strip()
+            batch.append(Entry(conlang, english, notes_pool.setdefault(notes, notes)))
+            if len(batch) >= BATCH:
+                data.setdefault(row_category or category, []).extend(batch)
+                counts["added"] += len(batch)
+                batch.clear()
+    for cat, batch in batches.items():
+        data.setdefault(cat, []).extend(batch)
+        counts["added"] += len(batch)
+    return counts
+
+def write_rows(entries, out, fmt):
+    """Streams (category, entry) pairs to a text file in one of FORMATS."""
+    if fmt == "jsonl":
+        for cat, item in entries:
+            out.write(json.dumps({"category": cat, **item}, ensure_ascii=False) + "\n")
+    elif fmt == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(FIELDS)
+        for cat, item in entries:
+            writer.writerow((cat, item.get('conlang', ''), item.get('english', ''), item.get('notes', '')))
+    else:
+        for cat, item in entries:
+            fields = (cat, item.get('conlang', ''), item.get('english', ''), item.get('notes', ''))
+            out.write("\t".join(f.replace("\t", " ").replace("\n", " ") for f in fields) + "\n")
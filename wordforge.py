@@ -1,622 +1,410 @@
+"""
+Word Forge entry point.
+
+    python wordforge.py                      # open the editor window
+    python wordforge.py --open other.json    # ... with more languages to switch between
+    python wordforge.py generate -n 10       # headless commands, no Qt import
+    python wordforge.py generate --ngram     # words that sound like the saved ones
+    python wordforge.py generate --distance 1   # none a glyph away from a saved word
+    python wordforge.py space                # how many words are possible, and how many saved
+    python wordforge.py lookup <word>
+    python wordforge.py means <english>      # reverse dictionary
+    python wordforge.py derived <root> [--all]
+    python wordforge.py search <text> [lexicons...]   # across languages
+    python wordforge.py shared <lexicons...>          # words saved in more than one
+    python wordforge.py add <word> <definition> [--notes ...]
+    python wordforge.py export [--format json|tsv|csv|jsonl] [-o file]
+    python wordforge.py import <file> [--romanized]   # csv, tsv or jsonl rows
+    python wordforge.py compact
+    python wordforge.py serve [--port 8765]   # JSON over HTTP on localhost
+    python wordforge.py transliterate [file]     # romanized lines -> Lore
+    python wordforge.py --profile timings.json   # time hot paths, write p50/p99 on exit
+"""
 import sys
-import json
-import os
 import random
-from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                               QHBoxLayout, QTabWidget, QLineEdit, QPushButton, 
-                               QTableWidget, QTableWidgetItem, QHeaderView, 
-                               QMessageBox, QGridLayout, QFrame, QLabel, QTextEdit)
-from PySide6.QtGui import QFont, QColor, QTextCursor
-from PySide6.QtCore import Qt, QObject, QEvent
+import argparse
 
-# ==========================================
-#        MASTER CHARACTER DEFINITIONS
-# ==========================================
-# Change characters here, and they update everywhere.
-
-class LORE:
-    # --- VOWELS ---
-    # Short
-    A_SHORT = 'a'
-    E_SHORT = 'э'
-    I_SHORT = 'ɪ'
-    O_SHORT = 'o'
-    U_SHORT = 'h'
-    
-    # Long (Shifted)
-    A_LONG = 'ʌ'
-    E_LONG = 'и'
-    I_LONG = 'ꭅ'
-    O_LONG = 'ꟻ'
-    U_LONG = 'ю'
-    
-    # Compounds (Alt)
-    YA = 'я'
-    YE = 'e'
-    YO = 'ᴇ'
-    OO = 'У'
-    OE = 'ɶ'
-
-    # --- CONSONANTS ---
-    Q = 'q'
-    P = 'p'
-    T = 'ᴛ'
-    B = 'b'
-    P_CYR = 'п'
-    C = 'c'
-    D_CYR = 'д'
-    V = 'v'
-    G_CYR = 'г'
-    X = 'x'
-    D = 'd'
-    K_SMALL = 'ᴋ'
-    L_CYR = 'Ԓ' 
-    Z = 'z'
-    B_SMALL = 'ʙ'
-    B_CYR = 'Б'
-    N_SMALL = 'ʜ'
-    M_SMALL = 'ᴍ'
-    
-    # Compounds
-    ZH = 'ж'
-    TS = 'ц'
-    CH = 'ч'
-    SH = 'ш'
-    SK = 'ϣ'
-    TH = 'Ұ'
-    DH = 'њ'
-    NG = 'Ꙗ'
-    ST = 'ʒ'
+from lore import (LORE, VOWELS, CONSONANTS, TABLE_SIZE_CORRECTIONS, HEADER_SIZE_CORRECTIONS,
+                  KEYBOARD_LAYOUT, LONG_VOWEL_MAP, COMBO_MAP, DISABLED_KEYS, apply_visual_fixes)
+from generator import BATCH_THRESHOLD, WordGenerator, SeenWords
+from lexicon import DEFAULT_FILENAME, CATEGORIES, LexiconError, Entry, open_store, load_lexicon, iter_entries, dump_lexicon
+import instrument
 
-# ==========================================
-#           LORE CONFIGURATION
-# ==========================================
+# The names the single-file wordforge.py used to define, still importable from here.
+__all__ = ["LORE", "VOWELS", "CONSONANTS", "TABLE_SIZE_CORRECTIONS", "HEADER_SIZE_CORRECTIONS", "KEYBOARD_LAYOUT",
+           "LONG_VOWEL_MAP", "COMBO_MAP", "DISABLED_KEYS", "apply_visual_fixes", "WordGenerator", "main"]
+
+# Qt classes live in gui.py and are only imported when something asks for them.
+GUI_NAMES = ("RichLineEdit", "PhysicalKeyFilter", "VocabVault")
 
-VOWELS = [
-    LORE.A_SHORT, LORE.E_SHORT, LORE.I_SHORT, LORE.O_SHORT, LORE.U_SHORT, 
-    LORE.A_LONG, LORE.E_LONG, LORE.I_LONG, LORE.O_LONG, LORE.U_LONG, 
-    LORE.YA, LORE.YE, LORE.YO, LORE.OO, LORE.OE
-]
-
-CONSONANTS = [
-    LORE.Q, LORE.P, LORE.T, LORE.B, LORE.P_CYR, LORE.C, LORE.D_CYR, LORE.V, LORE.G_CYR, 
-    LORE.X, LORE.D, LORE.K_SMALL, LORE.L_CYR, LORE.Z, LORE.B_SMALL, LORE.B_CYR, LORE.N_SMALL, LORE.M_SMALL, 
-    LORE.ZH, LORE.TS, LORE.CH, LORE.SH, LORE.SK, LORE.TH, LORE.DH, LORE.NG, LORE.ST
-]
-
-# --- VISUAL TWEAKS ---
-
-# 1. TABLE/INPUT CORRECTIONS (Base font ~14pt)
-TABLE_SIZE_CORRECTIONS = {
-    LORE.O_LONG: "10.5pt", 
-    LORE.OO:     "10.5pt", 
-    LORE.B_CYR:  "10.5pt", 
-    LORE.TH:     "10.5pt", 
-    LORE.NG:     "10.5pt", 
-    LORE.L_CYR:  "10.5pt",
-}
-
-# 2. HEADER CORRECTIONS (Base font ~32px/24pt)
-HEADER_SIZE_CORRECTIONS = {
-    LORE.O_LONG: "17pt", 
-    LORE.OO:     "17.5pt",
-    LORE.B_CYR:  "17pt", 
-    LORE.TH:     "17pt", 
-    LORE.NG:     "17pt", 
-    LORE.L_CYR:  "17pt",
-}
-
-# Keyboard Layout (Visual Mapping)
-KEYBOARD_LAYOUT = [
-    [('w', LORE.Q), ('e', LORE.E_SHORT), ('r', LORE.P), ('t', LORE.T), ('y', LORE.B), ('u', LORE.U_SHORT), ('i', LORE.I_SHORT), ('o', LORE.O_SHORT), ('p', LORE.P_CYR)],
-    [('a', LORE.A_SHORT), ('s', LORE.C), ('d', LORE.D_CYR), ('f', LORE.V), ('g', LORE.G_CYR), ('h', LORE.X), ('j', LORE.D), ('k', LORE.K_SMALL), ('l', LORE.L_CYR)],
-    [('z', LORE.Z), ('v', LORE.B_SMALL), ('b', LORE.B_CYR), ('n', LORE.N_SMALL), ('m', LORE.M_SMALL)]
-]
-
-
-# SHIFT: Single Character replacements (Long Vowels)
-LONG_VOWEL_MAP = {
-    "a": LORE.A_LONG, 
-    "e": LORE.E_LONG, 
-    "i": LORE.I_LONG, 
-    "o": LORE.O_LONG, 
-    "u": LORE.U_LONG
-}
-
-# ALT: Compound Character replacements
-COMBO_MAP = {
-    # Vowel Compounds
-    "ya": LORE.YA, "ye": LORE.YE, "yo": LORE.YO, "oo": LORE.OO, "oe": LORE.OE,
-    # Consonant Compounds
-    "ts": LORE.TS, "zh": LORE.ZH, "sh": LORE.SH, "kh": LORE.CH, 
-    "sk": LORE.SK, "st": LORE.ST, "th": LORE.TH, "dh": LORE.DH, "ng": LORE.NG
-}
-
-DISABLED_KEYS = ['q', 'x', 'c']
+def __getattr__(name):
+    if name in GUI_NAMES:
+        import gui
+        return getattr(gui, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ==========================================
-#              APP LOGIC
+#              CLI COMMANDS
 # ==========================================
 
-def apply_visual_fixes(text, mode='table'):
-    if not text: return ""
-    
-    if mode == 'header':
-        corrections = HEADER_SIZE_CORRECTIONS
-        base_size = "32px"
+def cmd_generate(args):
+    if args.distance:
+        args.unique = True
+    if args.ngram:
+        return generate_ngram(args)
+    if not valid_syllables(args): return 1
+    if args.uniform:
+        return generate_uniform(args)
+    if args.unique:
+        return generate_unique(args)
+    if args.workers:
+        return generate_parallel(args)
+    if args.seed is not None or args.n > BATCH_THRESHOLD:
+        words, structures = WordGenerator.generate_batch(args.n, args.min, args.max, seed=args.seed)
+    else:
+        pairs = [WordGenerator.generate_word(args.min, args.max) for _ in range(args.n)]
+        words = [w for w, _ in pairs]
+        structures = [s for _, s in pairs]
+    if args.structure:
+        lines = (f"{w}\t{s}" for w, s in zip(words, structures))
+    else:
+        lines = words
+    sys.stdout.write("\n".join(lines) + "\n")
+    return 0
+
+def generate_parallel(args):
+    if args.output:
+        WordGenerator.write_parallel(args.output, args.n, args.min, args.max, args.seed, args.workers, args.structure)
+        return 0
+    for words, structures in WordGenerator.generate_parallel(args.n, args.min, args.max, args.seed, args.workers):
+        lines = (f"{w}\t{s}" for w, s in zip(words, structures)) if args.structure else words
+        sys.stdout.write("\n".join(lines) + "\n")
+    return 0
+
+def generate_ngram(args):
+    from ngram import ORDER, load_or_train
+    args.order = args.order or ORDER
+    data, snapshot = load_lexicon(args.file, with_snapshot=True)
+    model = load_or_train(args.file, data, snapshot, args.order)
+    seen = taken_words(args, data) if args.unique else None
+    del data
+    rand = random.Random(args.seed).random
+    words = []
+    for _ in range(args.n):
+        word = model.generate(seen=seen, rand=rand)
+        if word is None: break
+        words.append(word)
+    lines = [f"{w}\t{args.order}-gram" for w in words] if args.structure else words
+    if lines: sys.stdout.write("\n".join(lines) + "\n")
+    if len(words) < args.n:
+        print(f"wordforge: only {len(words)} words found; the lexicon needs more saved words", file=sys.stderr)
+        return 1
+    return 0
+
+def generate_uniform(args):
+    space = WordGenerator.word_space(args.min, args.max)
+    rand = random.Random(args.seed).randrange
+    seen = taken_words(args, load_lexicon(args.file)) if args.unique else None
+    words, misses = [], 0
+    while len(words) < args.n and misses < 1000:
+        word = space.sample(rand)
+        if seen is None or seen.add_new([word])[0]:
+            words.append(word)
+            misses = 0
+        else:
+            misses += 1
+    lines = [f"{w}\t{space.rank(w)}" for w in words] if args.structure else words
+    if lines: sys.stdout.write("\n".join(lines) + "\n")
+    if len(words) < args.n:
+        print(f"wordforge: only {len(words)} unused words found for {args.min}-{args.max} syllables", file=sys.stderr)
+        return 1
+    return 0
+
+def generate_unique(args):
+    data = load_lexicon(args.file)
+    seen = taken_words(args, data)
+    del data
+    if args.bloom or args.seed is not None or args.n > BATCH_THRESHOLD:
+        words, structures = WordGenerator.generate_unique_batch(args.n, seen, args.min, args.max, seed=args.seed)
+    else:
+        words, structures = [], []
+        for _ in range(args.n):
+            word, structure = WordGenerator.generate_unique_word(seen, args.min, args.max)
+            if word is None: break
+            words.append(word)
+            structures.append(structure)
+    if args.structure:
+        lines = [f"{w}\t{s}" for w, s in zip(words, structures)]
     else:
-        corrections = TABLE_SIZE_CORRECTIONS
-        base_size = "14pt"
-    
-    html = ""
-    for char in text:
-        if char in corrections:
-            scale = corrections[char]
-            html += f"<span style='font-size:{scale};'>{char}</span>"
+        lines = words
+    if lines: sys.stdout.write("\n".join(lines) + "\n")
+    print(f"{len(words)} new words, {seen.rejected} rejected ({seen.rejection_rate:.2%})" +
+          (f" as within {args.distance} glyph{'s' if args.distance > 1 else ''} of another" if args.distance else ""), file=sys.stderr)
+    if len(words) < args.n:
+        print(f"wordforge: only {len(words)} unused words found for {args.min}-{args.max} syllables", file=sys.stderr)
+        return 1
+    return 0
+
+def taken_words(args, data):
+    """The SeenWords that --unique draws against, or with --distance, one that also turns away near misses."""
+    if args.distance:
+        from similar import NearWords, DistinctWords
+        saved = NearWords(args.distance)
+        saved.index_more(data)
+        return DistinctWords(saved)
+    from ngram import lexicon_words
+    saved = list(lexicon_words(data))
+    return SeenWords(saved, capacity=len(saved) + args.n if args.bloom else None)
+
+def valid_syllables(args):
+    if 1 <= args.min <= args.max: return True
+    print(f"wordforge: need 1 <= --min <= --max, got {args.min} and {args.max}", file=sys.stderr)
+    return False
+
+def cmd_space(args):
+    if not valid_syllables(args): return 1
+    space = WordGenerator.word_space(args.min, args.max)
+    if args.rank or args.unrank is not None or args.part:
+        for word in args.rank or []:
+            try:
+                print(f"{word}\t{space.rank(word)}")
+            except ValueError as e:
+                print(f"wordforge: {e}", file=sys.stderr)
+                return 1
+        if args.unrank is not None:
+            if not 0 <= args.unrank < space.size:
+                print(f"wordforge: rank must be 0..{space.size - 1}", file=sys.stderr)
+                return 1
+            print(f"{space.unrank(args.unrank)}\t{args.unrank}")
+        if args.part:
+            index, parts = args.part
+            start, stop = space.part(index - 1, parts)
+            for rank, word in enumerate(space.words(start, stop), start=start):
+                sys.stdout.write(f"{word}\t{rank}\n")
+        return 0
+    from ngram import lexicon_words
+    saved = space.coverage(lexicon_words(load_lexicon(args.file)))
+    print(f"{space.size:,} words of {args.min}-{args.max} syllables")
+    print(f"{saved:,} of them saved ({saved / space.size:.6%})")
+    return 0
+
+def parse_part(text):
+    try:
+        index, parts = (int(n) for n in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected K/N, e.g. 3/8")
+    if not 1 <= index <= parts: raise argparse.ArgumentTypeError("K must be 1..N")
+    return index, parts
+
+def cmd_lookup(args):
+    data = load_lexicon(args.file)
+    query = args.query.strip()
+    found = 0
+    for cat in args.category or CATEGORIES:
+        for item in data.get(cat, []):
+            if item.get('conlang', '') == query or item.get('english', '').lower() == query.lower():
+                print(f"{cat}\t{item.get('conlang', '')}\t{item.get('english', '')}\t{item.get('notes', '')}")
+                found += 1
+    return 0 if found else 1
+
+def cmd_reverse(args):
+    from reverse import load_or_build
+    data, snapshot = load_lexicon(args.file, with_snapshot=True)
+    index = load_or_build(args.file, data, snapshot)
+    found = index.search(args.query.strip(), args.mode, len(index))
+    for cat, item in found:
+        print(f"{cat}\t{item.get('conlang', '')}\t{item.get('english', '')}\t{item.get('notes', '')}")
+    return 0 if found else 1
+
+def cmd_search(args):
+    from library import LexiconLibrary
+    library = LexiconLibrary([args.file, *args.lexicons])
+    found = 0
+    for lexicon, cat, item in library.search(args.query.strip(), "exact" if args.exact else "substring", args.limit):
+        print(f"{lexicon.name}\t{cat}\t{item.get('conlang', '')}\t{item.get('english', '')}\t{item.get('notes', '')}")
+        found += 1
+    return 0 if found else 1
+
+def cmd_shared(args):
+    from library import LexiconLibrary
+    shared = LexiconLibrary([args.file, *args.lexicons]).duplicates()
+    for word in sorted(shared):
+        print(word + "\t" + "\t".join(f"{lexicon.name}:{cat}:{item.get('english', '')}" for lexicon, cat, item in shared[word]))
+    return 0
+
+def cmd_add(args):
+    conlang, english = args.conlang.strip(), args.english.strip()
+    if not conlang or not english:
+        print("Need word and definition.", file=sys.stderr)
+        return 2
+    from ngram import lexicon_words
+    from similar import MAX_DISTANCE, near_in
+    store = open_store(args.file)
+    data = store.load()
+    # Only a warning: the command line cannot ask, and near twins are sometimes wanted.
+    for distance, word in near_in(conlang, lexicon_words(data), MAX_DISTANCE):
+        print(f"wordforge: {word} is already saved" if distance == 0 else
+              f"wordforge: {word} is {distance} glyph{'s' if distance > 1 else ''} from {conlang}", file=sys.stderr)
+    entry = Entry(conlang, english, args.notes.strip())
+    data[args.category].append(entry)
+    store.append(args.category, entry)
+    return 0
+
+def cmd_serve(args):
+    import server  # asyncio and the HTTP code are only needed here.
+    return server.run(args.file, args.host, args.port)
+
+def cmd_compact(args):
+    store = open_store(args.file)
+    store.load()
+    store.compact(force=True)
+    store.close()
+    return 0
+
+def cmd_export(args):
+    from transfer import guess_format, write_rows
+    fmt = args.format or ("json" if args.output is None else guess_format(args.output, "json"))
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if fmt == 'json':
+            out.write(dump_lexicon(load_lexicon(args.file)) + "\n")
         else:
-            html += char
-            
-    return f"<span style='font-size:{base_size};'>{html}</span>"
-
-class RichLineEdit(QTextEdit):
-    """
-    A Custom Widget that looks like a QLineEdit but supports Rich Text (HTML).
-    """
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.setAcceptRichText(True)
-        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.setTabChangesFocus(True)
-        self.setLineWrapMode(QTextEdit.NoWrap)
-        self.setFixedHeight(50) 
-        
-        self.setStyleSheet("""
-            QTextEdit {
-                font-size: 14pt; 
-                font-weight: bold;
-                padding-top: 8px; 
-                padding-left: 5px;
-                padding-right: 5px;
-                border: 1px solid #555; 
-                border-radius: 2px;
-                background-color: #2b2b2b; 
-                color: white;
-            }
-        """)
-
-    def keyPressEvent(self, event):
-        if event.key() in (Qt.Key_Return, Qt.Key_Enter):
-            return 
-        super().keyPressEvent(event)
-
-    def setText(self, text):
-        styled = apply_visual_fixes(text, mode='table')
-        self.setHtml(styled)
-        self.moveCursor(QTextCursor.End)
-        
-    def text(self):
-        return self.toPlainText()
-        
-    def insert(self, text):
-        styled = apply_visual_fixes(text, mode='table')
-        self.textCursor().insertHtml(styled)
-        
-    def backspace(self):
-        self.textCursor().deletePreviousChar()
-
-class WordGenerator:
-    GEN_SHORT = [LORE.A_SHORT, LORE.E_SHORT, LORE.I_SHORT, LORE.O_SHORT, LORE.U_SHORT]
-    GEN_LONG = [LORE.A_LONG, LORE.E_LONG, LORE.I_LONG, LORE.O_LONG, LORE.U_LONG, 
-                LORE.YE, LORE.YO, LORE.OO, LORE.YA, LORE.OE]
-    
-    ALL_VOWELS = GEN_SHORT + GEN_LONG
-
-    @staticmethod
-    def generate_word(min_syllables=1, max_syllables=3):
-        word = ""
-        structure_log = [] 
-        syllables = random.randint(min_syllables, max_syllables)
-        
-        for i in range(syllables):
-            structure = random.choices(
-                ["CV", "CVC", "VC", "CVV", "V", "CCV", "VCC"], 
-                weights=[25, 25, 20, 10, 5, 10, 5],
-                k=1
-            )[0]
-            
-            prev_char = word[-1] if word else None
-            if prev_char in WordGenerator.ALL_VOWELS and structure in ["V", "VC", "VCC"]:
-                structure = random.choice(["CV", "CVC", "CCV"])
-            
-            structure_log.append(structure)
-            syllable = ""
-            
-            if structure == "V":
-                v = random.choice(WordGenerator.ALL_VOWELS)
-                if prev_char:
-                    while v == prev_char: v = random.choice(WordGenerator.ALL_VOWELS)
-                syllable = v
-            elif structure == "CV":
-                c = random.choice(CONSONANTS)
-                while c == prev_char: c = random.choice(CONSONANTS)
-                v = random.choice(WordGenerator.ALL_VOWELS)
-                syllable = c + v
-            elif structure == "CVC":
-                c1 = random.choice(CONSONANTS)
-                while c1 == prev_char: c1 = random.choice(CONSONANTS)
-                v = random.choice(WordGenerator.ALL_VOWELS)
-                c2 = random.choice(CONSONANTS)
-                while c2 == v: c2 = random.choice(CONSONANTS)
-                syllable = c1 + v + c2
-            elif structure == "VC":
-                valid = WordGenerator.ALL_VOWELS.copy()
-                if prev_char in valid: valid.remove(prev_char)
-                if prev_char in WordGenerator.GEN_SHORT: valid = [x for x in valid if x not in WordGenerator.GEN_SHORT]
-                v = random.choice(valid) if valid else random.choice(WordGenerator.GEN_LONG)
-                c = random.choice(CONSONANTS)
-                while c == v: c = random.choice(CONSONANTS)
-                syllable = v + c
-            elif structure == "CVV":
-                c = random.choice(CONSONANTS)
-                while c == prev_char: c = random.choice(CONSONANTS)
-                pair = random.choice(['LL', 'SL', 'LS'])
-                v1 = random.choice(WordGenerator.GEN_LONG) if pair[0] == 'L' else random.choice(WordGenerator.GEN_SHORT)
-                v2 = random.choice(WordGenerator.GEN_LONG) if pair[1] == 'L' else random.choice(WordGenerator.GEN_SHORT)
-                while v2 == v1: v2 = random.choice(WordGenerator.GEN_LONG) if pair[1] == 'L' else random.choice(WordGenerator.GEN_SHORT)
-                syllable = c + v1 + v2
-            elif structure == "CCV":
-                c1 = random.choice(CONSONANTS)
-                while c1 == prev_char: c1 = random.choice(CONSONANTS)
-                c2 = random.choice(CONSONANTS)
-                while c2 == c1: c2 = random.choice(CONSONANTS)
-                v = random.choice(WordGenerator.ALL_VOWELS)
-                syllable = c1 + c2 + v
-            elif structure == "VCC":
-                valid = WordGenerator.ALL_VOWELS.copy()
-                if prev_char in valid: valid.remove(prev_char)
-                if prev_char in WordGenerator.GEN_SHORT: valid = [x for x in valid if x not in WordGenerator.GEN_SHORT]
-                v = random.choice(valid) if valid else random.choice(WordGenerator.GEN_LONG)
-                c1 = random.choice(CONSONANTS)
-                while c1 == v: c1 = random.choice(CONSONANTS)
-                c2 = random.choice(CONSONANTS)
-                while c2 == c1: c2 = random.choice(CONSONANTS)
-                syllable = v + c1 + c2
-
-            word += syllable
-        return word, "-".join(structure_log)
-
-class PhysicalKeyFilter(QObject):
-    def __init__(self, parent_window):
-        super().__init__()
-        self.window = parent_window
-        self.key_map = {}
-        for row in KEYBOARD_LAYOUT:
-            for key_id, lore_char in row:
-                self.key_map[key_id] = lore_char
-
-    def eventFilter(self, obj, event):
-        if event.type() == QEvent.KeyPress:
-            key_text = event.text().lower()
-            if key_text in DISABLED_KEYS: return True 
-            if event.key() == Qt.Key_Backspace:
-                self.window.backspace()
-                return True 
-            if event.key() == Qt.Key_Space:
-                self.window.input_conlang.insert(" ")
-                return True
-            
-            if event.modifiers() & Qt.ShiftModifier:
-                self.window.shift_active = True
-                self.window.shift_btn.setChecked(True)
-            if event.modifiers() & Qt.AltModifier:
-                self.window.alt_active = True
-                self.window.alt_btn.setChecked(True)
-
-            if event.modifiers() & (Qt.ControlModifier): return False
-            
-            if key_text in self.key_map:
-                lore_char = self.key_map[key_text]
-                self.window.handle_keypress(key_text, lore_char)
-                return True 
-        return super().eventFilter(obj, event)
-
-class VocabVault(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Word Forge")
-        self.resize(1200, 750)
-        font = QFont("Arial", 12)
-        self.setFont(font)
-        self.filename = "future_lang.json"
-        self.categories = ["dictionary", "phrases"]
-        self.tables = {} 
-        self.data = self.load_data()
-        
-        self.shift_active = False
-        self.alt_active = False 
-        self.alt_buffer = "" 
-        
-        self.setup_ui()
-        self.key_filter = PhysicalKeyFilter(self)
-        self.input_conlang.installEventFilter(self.key_filter)
-
-    def load_data(self):
-        default_data = {cat: [] for cat in self.categories}
-        if not os.path.exists(self.filename): return default_data
-        try:
-            with open(self.filename, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                return json.loads(content) if content else default_data
-        except: return default_data
-
-    def save_data(self):
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
-
-    def setup_ui(self):
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        main_layout = QHBoxLayout(central_widget)
-
-        # LEFT PANEL
-        left_panel = QWidget()
-        left_layout = QVBoxLayout(left_panel)
-        left_panel.setFixedWidth(500)
-        
-        gen_group = QFrame()
-        gen_group.setStyleSheet("background-color: #2b2b2b; border-radius: 8px; padding: 10px;")
-        gen_layout = QVBoxLayout(gen_group)
-        self.gen_result_display = QLabel("...")
-        self.gen_result_display.setAlignment(Qt.AlignCenter)
-        
-        self.gen_result_display.setFixedHeight(80) 
-        self.gen_result_display.setStyleSheet("color: white; margin-top: 10px;") 
-        self.gen_result_display.setTextInteractionFlags(Qt.TextSelectableByMouse)
-        gen_layout.addWidget(self.gen_result_display)
-
-        self.gen_structure_display = QLabel("")
-        self.gen_structure_display.setAlignment(Qt.AlignCenter)
-        self.gen_structure_display.setFixedHeight(30)
-        self.gen_structure_display.setStyleSheet("color: #888; font-size: 14px; font-style: italic; margin-bottom: 10px;")
-        gen_layout.addWidget(self.gen_structure_display)
-        
-        btn_generate = QPushButton("Generate Random Word")
-        btn_generate.clicked.connect(self.run_generator)
-        btn_generate.setStyleSheet("QPushButton { background-color: #0277bd; color: white; padding: 8px; border-radius: 4px; font-weight: bold; } QPushButton:hover { background-color: #039be5; } QPushButton:pressed { background-color: #01579b; }")
-        gen_layout.addWidget(btn_generate)
-        left_layout.addWidget(gen_group)
-        left_layout.addSpacing(10)
-
-        # MANUAL ENTRY
-        form_layout = QGridLayout()
-        
-        self.input_conlang = RichLineEdit()
-        self.input_conlang.setPlaceholderText("New Word")
-        
-        self.input_english = QLineEdit()
-        self.input_english.setPlaceholderText("English Definition")
-        self.input_english.setFixedHeight(50)
-        self.input_english.setStyleSheet("font-size: 14pt; padding: 5px;")
-        
-        self.input_notes = QLineEdit()
-        self.input_notes.setPlaceholderText("Etymology / Root Notes")
-        self.input_notes.setFixedHeight(50)
-        self.input_notes.setStyleSheet("font-size: 14pt; padding: 5px;")
-        
-        form_layout.addWidget(QLabel("Word:"), 0, 0)
-        form_layout.addWidget(self.input_conlang, 0, 1)
-        form_layout.addWidget(QLabel("Def:"), 1, 0)
-        form_layout.addWidget(self.input_english, 1, 1)
-        form_layout.addWidget(QLabel("Root:"), 2, 0)
-        form_layout.addWidget(self.input_notes, 2, 1)
-        left_layout.addLayout(form_layout)
-        
-        self.add_button = QPushButton("Save to Dictionary")
-        self.add_button.setMinimumHeight(45)
-        self.add_button.setStyleSheet("QPushButton { background-color: #2e7d32; color: white; font-weight: bold; border-radius: 4px; font-size: 16px; } QPushButton:hover { background-color: #388e3c; } QPushButton:pressed { background-color: #1b5e20; }")
-        self.add_button.clicked.connect(self.add_entry)
-        left_layout.addWidget(self.add_button)
-        
-        left_layout.addSpacing(15)
-        left_layout.addWidget(QLabel("Touch Keyboard:"))
-        keyboard = self.create_keyboard()
-        left_layout.addWidget(keyboard)
-        left_layout.addStretch()
-        
-        # RIGHT PANEL
-        right_panel = QWidget()
-        right_layout = QVBoxLayout(right_panel)
-        self.tabs = QTabWidget()
-        for category in self.categories:
-            tab = QWidget()
-            t_layout = QVBoxLayout(tab)
-            table = QTableWidget()
-            table.setColumnCount(3)
-            table.setHorizontalHeaderLabels(["Lore Word", "Definition", "Notes"])
-            header = table.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.Stretch)
-            header.setSectionResizeMode(1, QHeaderView.Stretch)
-            header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-            self.tables[category] = table
-            t_layout.addWidget(table)
-            self.tabs.addTab(tab, category.title())
-        right_layout.addWidget(self.tabs)
-        self.stats_label = QLabel("Total Words: 0")
-        right_layout.addWidget(self.stats_label)
-        main_layout.addWidget(left_panel)
-        main_layout.addWidget(right_panel)
-
-        for category in self.categories:
-            self.refresh_table(category)
-
-    def create_keyboard(self):
-        container = QWidget()
-        layout = QVBoxLayout(container)
-        layout.setSpacing(4)
-        KEY_STYLE = "QPushButton {{ background-color: #444; color: {color}; border: 1px solid #555; border-radius: 5px; }} QPushButton:hover {{ background-color: #555; border-color: #777; }} QPushButton:pressed {{ background-color: #222; border-color: #333; }}"
-        for row_data in KEYBOARD_LAYOUT:
-            row = QHBoxLayout()
-            row.setSpacing(4)
-            row.addStretch() 
-            for key_id, label in row_data:
-                btn = QPushButton(label)
-                btn.setFixedSize(45, 45)
-                btn.setFont(QFont("Arial", 14))
-                btn.clicked.connect(lambda ch=False, k=key_id, l=label: self.handle_keypress(k, l))
-                text_color = "#ffab91" if label in VOWELS else "#81d4fa"
-                btn.setStyleSheet(KEY_STYLE.format(color=text_color))
-                row.addWidget(btn)
-            row.addStretch()
-            layout.addLayout(row)
-        
-        ctrl_row = QHBoxLayout()
-        ctrl_row.addStretch()
-        
-        self.shift_btn = QPushButton("SHIFT")
-        self.shift_btn.setCheckable(True)
-        self.shift_btn.setFixedSize(80, 45)
-        self.shift_btn.setStyleSheet("""
-            QPushButton { background-color: #333; color: white; font-weight: bold; border: 1px solid #555; border-radius: 5px; }
-            QPushButton:hover { background-color: #444; border-color: #777; }
-            QPushButton:checked { background-color: #ff9800; color: black; border-color: #e65100; }
-        """)
-        self.shift_btn.toggled.connect(self.toggle_shift)
-        ctrl_row.addWidget(self.shift_btn)
-
-        self.alt_btn = QPushButton("ALT")
-        self.alt_btn.setCheckable(True)
-        self.alt_btn.setFixedSize(80, 45)
-        self.alt_btn.setStyleSheet("""
-            QPushButton { background-color: #333; color: white; font-weight: bold; border: 1px solid #555; border-radius: 5px; }
-            QPushButton:hover { background-color: #444; border-color: #777; }
-            QPushButton:checked { background-color: #29b6f6; color: black; border-color: #0288d1; }
-        """)
-        self.alt_btn.toggled.connect(self.toggle_alt)
-        ctrl_row.addWidget(self.alt_btn)
-        
-        CTRL_STYLE = "QPushButton { background-color: #333; color: white; border: 1px solid #555; border-radius: 5px; } QPushButton:hover { background-color: #444; border-color: #777; } QPushButton:pressed { background-color: #222; border-color: #111; }"
-        
-        space_btn = QPushButton("Space")
-        space_btn.setFixedSize(150, 45)
-        space_btn.setStyleSheet(CTRL_STYLE)
-        space_btn.clicked.connect(lambda: self.input_conlang.insert(" "))
-        ctrl_row.addWidget(space_btn)
-        
-        back_btn = QPushButton("⌫")
-        back_btn.setFixedSize(60, 45)
-        back_btn.setStyleSheet(CTRL_STYLE)
-        back_btn.clicked.connect(self.backspace)
-        ctrl_row.addWidget(back_btn)
-        
-        ctrl_row.addStretch()
-        layout.addLayout(ctrl_row)
-        return container
-
-    def toggle_shift(self, checked):
-        self.shift_active = checked
-        if checked: self.alt_btn.setChecked(False)
-
-    def toggle_alt(self, checked):
-        self.alt_active = checked
-        if checked: self.shift_btn.setChecked(False)
-        else: self.alt_buffer = ""
-
-    def replace_last_chars(self, n, new_text):
-        for _ in range(n):
-            self.input_conlang.backspace()
-        self.input_conlang.insert(new_text)
-
-    def handle_keypress(self, key_id, default_char):
-        if self.shift_active:
-            if key_id in LONG_VOWEL_MAP:
-                result = LONG_VOWEL_MAP[key_id]
-                self.input_conlang.insert(result)
-            else:
-                self.input_conlang.insert(default_char)
-            self.shift_btn.setChecked(False)
-            self.input_conlang.setFocus()
-            return
-
-        if self.alt_active:
-            self.input_conlang.insert(default_char)
-            self.input_conlang.setFocus()
-            self.alt_buffer += key_id
-            if self.alt_buffer in COMBO_MAP:
-                result = COMBO_MAP[self.alt_buffer]
-                self.replace_last_chars(len(self.alt_buffer), result)
-                self.alt_btn.setChecked(False)
-                self.alt_buffer = ""
-                return
-            is_prefix = False
-            for code in COMBO_MAP.keys():
-                if code.startswith(self.alt_buffer) and len(code) > len(self.alt_buffer):
-                    is_prefix = True
-                    break
-            if not is_prefix:
-                self.alt_btn.setChecked(False)
-                self.alt_buffer = ""
-            return
-
-        self.input_conlang.insert(default_char)
-        self.input_conlang.setFocus()
-
-    def backspace(self):
-        self.input_conlang.backspace()
-        self.input_conlang.setFocus()
-        if self.alt_buffer: self.alt_buffer = self.alt_buffer[:-1]
-
-    def run_generator(self):
-        word, structure = WordGenerator.generate_word()
-        styled_word = apply_visual_fixes(word, mode='header')
-        self.gen_result_display.setText(styled_word)
-        self.gen_structure_display.setText(structure)
-        self.input_conlang.setText(word)
-
-    def add_entry(self):
-        conlang = self.input_conlang.text().strip()
-        english = self.input_english.text().strip()
-        notes = self.input_notes.text().strip()
-        if not conlang or not english:
-            QMessageBox.warning(self, "Missing Info", "Need word and definition.")
-            return
-        cat = self.categories[self.tabs.currentIndex()]
-        self.data[cat].append({ "conlang": conlang, "english": english, "notes": notes })
-        self.save_data()
-        self.refresh_table(cat)
-        self.input_conlang.clear()
-        self.input_english.clear()
-        self.input_notes.clear()
-        self.gen_result_display.setText("...")
-        self.gen_structure_display.setText("")
-
-    def refresh_table(self, category):
-        table = self.tables[category]
-        items = self.data[category]
-        table.setRowCount(0)
-        self.stats_label.setText(f"Total Words: {sum(len(v) for v in self.data.values())}")
-        
-        for r, item in enumerate(items):
-            table.insertRow(r)
-            lore_word_raw = item.get('conlang', '')
-            lore_word_styled = apply_visual_fixes(lore_word_raw, mode='table')
-            label = QLabel(lore_word_styled)
-            
-            # LEFT ALIGNMENT & PADDING
-            label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-            label.setStyleSheet("padding-left: 2px;")
-            
-            table.setCellWidget(r, 0, label)
-            english_item = QTableWidgetItem(item.get('english', ''))
-            english_item.setFont(QFont("Arial", 12))
-            table.setItem(r, 1, english_item)
-            notes_item = QTableWidgetItem(item.get('notes', ''))
-            notes_item.setFont(QFont("Arial", 12))
-            table.setItem(r, 2, notes_item)
+            # Row formats stream straight from the file, one entry at a time.
+            write_rows(((cat, item) for cat, item in iter_entries(args.file) if cat in CATEGORIES), out, fmt)
+    finally:
+        if out is not sys.stdout: out.close()
+    return 0
+
+def cmd_import(args):
+    from transfer import guess_format, read_rows, import_rows
+    fmt = args.format or guess_format(args.input)
+    source = open(args.input, 'r', encoding='utf-8-sig', newline='') if args.input != "-" else sys.stdin
+    store = open_store(args.file)
+    try:
+        data = store.load()
+        counts = import_rows(data, read_rows(source, fmt, args.input), args.category,
+                             romanized=args.romanized, dedupe=not args.keep_duplicates)
+        # One snapshot write for the whole import rather than a journal line per row.
+        if counts["added"]: store.save_all(data)
+        store.close()
+    finally:
+        if source is not sys.stdin: source.close()
+    print(f"{counts['added']} added, {counts['duplicates']} duplicates, {counts['skipped']} skipped", file=sys.stderr)
+    return 0
+
+def cmd_transliterate(args):
+    from keymap import transliterate_lines
+    source = open(args.input, 'r', encoding='utf-8') if args.input else sys.stdin
+    try:
+        sys.stdout.writelines(transliterate_lines(source))
+    finally:
+        if source is not sys.stdin: source.close()
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="wordforge", description="A tool for creating words for fictional languages.")
+    parser.add_argument("--file", default=DEFAULT_FILENAME, help="lexicon file (default: %(default)s)")
+    parser.add_argument("--open", action="append", default=[], metavar="FILE",
+                        help="with no command, also list this lexicon in the window's language switcher (repeatable)")
+    parser.add_argument("--profile", nargs="?", const="", metavar="FILE",
+                        help="record operation timings (shown under Timings in the window), and write them to FILE on exit")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("generate", help="generate random words")
+    p.add_argument("-n", type=int, default=1, help="number of words")
+    p.add_argument("--min", type=int, default=1, help="minimum syllables")
+    p.add_argument("--max", type=int, default=3, help="maximum syllables")
+    p.add_argument("--seed", type=int, help="seed for reproducible output")
+    p.add_argument("--structure", action="store_true", help="also print each word's syllable structure")
+    p.add_argument("--unique", action="store_true", help="skip words already in the lexicon or already printed")
+    p.add_argument("--bloom", action="store_true", help="with --unique, use a Bloom filter to bound memory on huge runs")
+    p.add_argument("--workers", type=int, help="generate in this many processes (same seed, same words, for any count)")
+    p.add_argument("-o", "--output", help="with --workers, write straight to this file")
+    p.add_argument("--uniform", action="store_true", help="draw evenly from every possible word (see the space command); --structure prints ranks")
+    p.add_argument("--ngram", action="store_true", help="sound like the saved words (a glyph n-gram model) instead of the syllable templates; ignores --min/--max")
+    p.add_argument("--order", type=int, help="with --ngram, glyphs of context plus one (default: 3)")
+    p.add_argument("--distance", type=int, metavar="K", help="like --unique, but also skip words within K glyphs (edits) of a saved or printed word")
+    p.set_defaults(func=cmd_generate)
+
+    p = sub.add_parser("space", help="count every possible word, and how many are saved; rank and unrank words")
+    p.add_argument("--min", type=int, default=1, help="minimum syllables")
+    p.add_argument("--max", type=int, default=3, help="maximum syllables")
+    p.add_argument("--rank", nargs="+", metavar="WORD", help="print each word's rank")
+    p.add_argument("--unrank", type=int, metavar="N", help="print the word ranked N")
+    p.add_argument("--part", type=parse_part, metavar="K/N", help="print part K of N equal slices of the space, with ranks")
+    p.set_defaults(func=cmd_space)
+
+    p = sub.add_parser("lookup", help="find entries by Lore word or English definition")
+    p.add_argument("query")
+    p.add_argument("--category", action="append", choices=CATEGORIES)
+    p.set_defaults(func=cmd_lookup)
+
+    p = sub.add_parser("means", help="reverse dictionary: entries whose definition has every word of the query")
+    p.add_argument("query")
+    p.set_defaults(func=cmd_reverse, mode="meaning")
+
+    p = sub.add_parser("derived", help="entries whose etymology notes name a root (a Lore word or a gloss)")
+    p.add_argument("query", metavar="root")
+    p.add_argument("--all", dest="mode", action="store_const", const="descendants", default="root",
+                   help="also every entry derived from those, and so on down")
+    p.set_defaults(func=cmd_reverse)
+
+    p = sub.add_parser("search", help="find entries in several lexicons at once (--file and any listed here)")
+    p.add_argument("query")
+    p.add_argument("lexicons", nargs="*", metavar="LEXICON")
+    p.add_argument("--exact", action="store_true", help="match the Lore word exactly instead of any field containing the query")
+    p.add_argument("--limit", type=int, help="stop after this many results")
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser("shared", help="list Lore words saved in more than one lexicon (--file and any listed here)")
+    p.add_argument("lexicons", nargs="+", metavar="LEXICON")
+    p.set_defaults(func=cmd_shared)
+
+    p = sub.add_parser("add", help="add an entry to the lexicon")
+    p.add_argument("conlang")
+    p.add_argument("english")
+    p.add_argument("--notes", default="")
+    p.add_argument("--category", default=CATEGORIES[0], choices=CATEGORIES)
+    p.set_defaults(func=cmd_add)
+
+    p = sub.add_parser("serve", help="answer generate, lookup, search and add requests as JSON over HTTP")
+    p.add_argument("--host", default="127.0.0.1", help="address to listen on (default: %(default)s, this machine only)")
+    p.add_argument("--port", type=int, default=8765, help="0 picks a free port (default: %(default)s)")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("compact", help="fold the change journal back into the lexicon file")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("transliterate", help="convert romanized text (one word or phrase per line) to Lore")
+    p.add_argument("input", nargs="?", help="input file (default: stdin)")
+    p.set_defaults(func=cmd_transliterate)
+
+    p = sub.add_parser("export", help="write the lexicon out")
+    p.add_argument("--format", choices=["json", "csv", "tsv", "jsonl"], help="default: from the -o extension, else json")
+    p.add_argument("-o", "--output", help="output file (default: stdout)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="add entries from a CSV, TSV or JSONL file")
+    p.add_argument("input", help="file to read, or - for stdin")
+    p.add_argument("--format", choices=["csv", "tsv", "jsonl"], help="default: from the file extension, else tsv")
+    p.add_argument("--category", default=CATEGORIES[0], choices=CATEGORIES, help="for rows that do not name one")
+    p.add_argument("--romanized", action="store_true", help="conlang column is romanized; convert it with the keyboard maps")
+    p.add_argument("--keep-duplicates", action="store_true", help="also add rows whose Lore word is already in the lexicon")
+    p.set_defaults(func=cmd_import)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.profile is not None:
+        instrument.enable(args.profile or None)
+    if args.command is None:
+        import gui
+        return gui.main(args.file, args.open)
+    try:
+        return instrument.timed(f"cli.{args.command}")(args.func)(args)
+    except LexiconError as e:
+        print(f"wordforge: {e}", file=sys.stderr)
+        return 1
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    app.setStyle("Fusion")
-    window = VocabVault()
-    window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import random
+from bisect import bisect_right
+
+# ==========================================
+#              WORD SPACE
+# ==========================================
+
+BOUNDARY = -1   # NFA entry index for "between syllables"
+
+class WordSpace:
+    """
+    Every distinct word the phonotactics rules can produce with min..max
+    syllables, counted exactly and numbered in a fixed order.
+
+    Different syllable splits can spell the same word (V + CV and VC + V), so
+    the rules are first turned into a deterministic automaton over glyphs. Its
+    states hold the previous glyph and every (syllables so far, structure, slot)
+    position a parse could be at; the structures allowed next and the glyphs
+    allowed in each slot follow from the previous glyph, exactly as sample_word
+    uses them. The automaton has no cycles, so one pass of dynamic programming
+    gives, for each state, how many words can still be finished from it.
+
+    Words are ranked lexicographically by glyph ID (the class order in
+    phonotactics.json), a word coming before any longer word it starts. Ranks
+    are stable for a given rules file, so ranges of them split the space into
+    parts with no word in two.
+    """
+
+    def __init__(self, rules, min_syllables=1, max_syllables=3):
+        if not 1 <= min_syllables <= max_syllables: raise ValueError("need 1 <= min_syllables <= max_syllables")
+        self.rules = rules
+        self.min_syllables = min_syllables
+        self.max_syllables = max_syllables
+        self.ids = {glyph: i for i, glyph in enumerate(rules.glyphs)}
+        self.allowed = [[frozenset(glyphs) for glyphs in rows] for rows in rules.candidates]
+        self.slots = [slots for _, slots in rules.entries]
+        self.build()
+
+    # --- Automaton and counts ---
+
+    def follow(self, prev, positions, glyph):
+        """The NFA positions reachable from `positions` by reading `glyph` after `prev`."""
+        allowed, slots, rules = self.allowed, self.slots, self.rules
+        out = set()
+        for syllables, entry, offset in positions:
+            if entry == BOUNDARY:
+                if syllables == self.max_syllables: continue
+                steps = [(syllables + 1, e, 0) for e in rules.structures[rules.context[prev]][0]]
+            else:
+                steps = [(syllables, entry, offset)]
+            for s, e, k in steps:
+                if glyph not in allowed[slots[e][k]][prev]: continue
+                out.add((s, BOUNDARY, 0) if k + 1 == len(slots[e]) else (s, e, k + 1))
+        return frozenset(out)
+
+    def build(self):
+        """
+        Breadth-first subset construction from the empty word, then counts in
+        reverse order (every edge leads to a later state).
+        """
+        start = (self.rules.start, frozenset([(0, BOUNDARY, 0)]))
+        index = {start: 0}
+        self.edges = []         # state -> [(glyph id, next state)], by glyph
+        self.edge_of = []       # state -> {glyph id: position in edges}
+        self.accepting = []
+        glyphs = range(len(self.rules.glyphs))
+        queue = [start]
+        for prev, positions in queue:
+            edges = []
+            for glyph in glyphs:
+                following = self.follow(prev, positions, glyph)
+                if not following: continue
+                state = (glyph, following)
+                if state not in index:
+                    index[state] = len(queue)
+                    queue.append(state)
+                edges.append((glyph, index[state]))
+            self.edges.append(edges)
+            self.edge_of.append({glyph: i for i, (glyph, _) in enumerate(edges)})
+            self.accepting.append(any(entry == BOUNDARY and self.min_syllables <= s
+                                      for s, entry, _ in positions))
+
+        # counts[q]: words finishable from q. cumulative[q][i]: words through edges[q][:i + 1].
+        self.counts = [0] * len(queue)
+        self.cumulative = [None] * len(queue)
+        for q in reversed(range(len(queue))):
+            total, cumulative = 0, []
+            for _, nxt in self.edges[q]:
+                total += self.counts[nxt]
+                cumulative.append(total)
+            self.cumulative[q] = cumulative
+            self.counts[q] = total + self.accepting[q]
+        self.size = self.counts[0]
+
+    # --- Ranking ---
+
+    def states(self, word):
+        """The states visited reading `word`, or None if it leaves the automaton."""
+        q, path = 0, []
+        for glyph in word:
+            i = self.edge_of[q].get(self.ids.get(glyph))
+            if i is None: return None
+            path.append((q, i))
+            q = self.edges[q][i][1]
+        return path, q
+
+    def __contains__(self, word):
+        found = self.states(word)
+        return found is not None and self.accepting[found[1]]
+
+    def rank(self, word):
+        """The word's number in 0..size-1. Raises ValueError if the rules cannot produce it."""
+        found = self.states(word)
+        if found is None or not self.accepting[found[1]]:
+            raise ValueError(f"{word!r} is not in the word space")
+        rank = 0
+        for q, i in found[0]:
+            # Shorter words first: the prefix itself, if it is a word, then every branch before this glyph.
+            rank += self.accepting[q] + (self.cumulative[q][i - 1] if i else 0)
+        return rank
+
+    def unrank(self, rank):
+        """The word numbered `rank`."""
+        if not 0 <= rank < self.size: raise IndexError(f"rank {rank} is outside 0..{self.size - 1}")
+        glyphs, word, q = self.rules.glyphs, [], 0
+        while True:
+            if self.accepting[q]:
+                if rank == 0: return "".join(word)
+                rank -= 1
+            cumulative = self.cumulative[q]
+            i = bisect_right(cumulative, rank)
+            if i: rank -= cumulative[i - 1]
+            gid, q = self.edges[q][i]
+            word.append(glyphs[gid])
+
+    # --- Sampling and enumeration ---
+
+    def sample(self, rand=random.randrange):
+        """A word drawn uniformly from the whole space (generate_word favours short, common shapes)."""
+        return self.unrank(rand(self.size))
+
+    def words(self, start=0, stop=None):
+        """Yields the words ranked start..stop-1, in order."""
+        stop = self.size if stop is None else min(stop, self.size)
+        for rank in range(max(start, 0), stop):
+            yield self.unrank(rank)
+
+    def part(self, index, parts):
+        """(start, stop) ranks of part `index` of `parts` near-equal, non-overlapping slices."""
+        if not 0 <= index < parts: raise ValueError(f"part {index} is outside 0..{parts - 1}")
+        return self.size * index // parts, self.size * (index + 1) // parts
+
+    def coverage(self, words):
+        """How many distinct words of `words` (e.g. the saved Lore words) lie in the space."""
+        return sum(1 for word in set(words) if word in self)